@@ -0,0 +1,131 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern, URLResolver
+
+# Маршруты, запросы чтения которых под ASGI выполняются в пуле потоков.
+ASYNC_READ_ROUTES = (
+    'titles-list',
+    'titles-detail',
+    'titles-top',
+    'titles-trending',
+    'review-list',
+    'comment-list',
+    'categories-list',
+    'genres-list',
+)
+READ_METHODS = ('GET', 'HEAD')
+
+_read_pool = None
+
+
+def get_read_pool():
+    """Ограниченный пул потоков для ORM-запросов асинхронных обработчиков."""
+    global _read_pool
+    if _read_pool is None:
+        _read_pool = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_READ_THREADS,
+            thread_name_prefix='yamdb-read'
+        )
+    return _read_pool
+
+
+def add_thread_context(request, factory):
+    """
+    Регистрирует контекст, в котором выполняется синхронная часть запроса.
+
+    Под ASGI работа с базой данных идёт в потоках пула, а не в потоке
+    middleware; так middleware подключают свои обёртки (например,
+    `connection.execute_wrapper`) в нужном потоке.
+    """
+    if not hasattr(request, 'thread_context'):
+        request.thread_context = []
+    request.thread_context.append(factory)
+
+
+def run_view(view, request, *args, **kwargs):
+    """Выполняет представление и отрисовывает ответ в текущем потоке."""
+    with ExitStack() as stack:
+        for factory in getattr(request, 'thread_context', ()):
+            stack.enter_context(factory())
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+    return response
+
+
+def run_pooled_view(view, request, *args, **kwargs):
+    """
+    Выполняет представление в потоке пула.
+
+    Соединения с базой данных в потоках пула живут между запросами,
+    поэтому устаревшие закрываются так же, как Django делает это
+    в начале и в конце запроса (с учётом CONN_MAX_AGE).
+    """
+    close_old_connections()
+    try:
+        return run_view(view, request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def make_async_view(view, pooled):
+    """
+    Асинхронный обработчик поверх синхронного представления.
+
+    Если `pooled`, GET и HEAD выполняются в пуле `ASYNC_READ_THREADS`
+    потоков, поэтому запросы чтения обрабатываются параллельно, а не по
+    одному в общем потоке синхронных представлений. Сериализация,
+    пагинация и JSON совпадают с синхронной версией, потому что
+    выполняется тот же код DRF. Остальные запросы, как и синхронные
+    представления под ASGI, идут в общий поток `thread_sensitive`.
+    """
+    sync_view = sync_to_async(
+        functools.partial(run_view, view), thread_sensitive=True
+    )
+
+    async def async_view(request, *args, **kwargs):
+        if not pooled or request.method not in READ_METHODS:
+            return await sync_view(request, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_read_pool(),
+            functools.partial(run_pooled_view, view, request, *args, **kwargs)
+        )
+
+    functools.update_wrapper(async_view, view)
+    return async_view
+
+
+def make_async_patterns(patterns, routes=ASYNC_READ_ROUTES):
+    """
+    Копия URLconf с асинхронными обработчиками на всех маршрутах.
+
+    Запросы чтения маршрутов `routes` выполняются в пуле потоков,
+    остальные — в общем потоке, но так же с контекстом из
+    `add_thread_context`, поэтому middleware работают одинаково.
+    """
+    result = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            pattern = URLResolver(
+                pattern.pattern,
+                make_async_patterns(pattern.url_patterns, routes),
+                pattern.default_kwargs,
+                pattern.app_name,
+                pattern.namespace
+            )
+        else:
+            pattern = URLPattern(
+                pattern.pattern,
+                make_async_view(pattern.callback, pattern.name in routes),
+                pattern.default_args,
+                pattern.name
+            )
+        result.append(pattern)
+    return result
@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.db_router import get_routing_setting
+from users.roles import Roles
+
+User = get_user_model()
+
+TOKEN_VERSION_CLAIM = 'token_version'
+TOKEN_VERSION_KEY = 'token_version:{}'
+CLAIM_FIELDS = ('username', 'role', 'is_staff', 'is_superuser')
+
+
+def get_access_token(user):
+    """
+    Выдаёт токен доступа с ролью и флагами пользователя.
+
+    Этих данных достаточно для проверки прав, поэтому аутентификация
+    по такому токену не загружает пользователя из базы данных.
+    """
+    token = AccessToken.for_user(user)
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+    return token
+
+
+def set_token_version(user_id, version):
+    """Сохраняет в кеше актуальную версию токенов пользователя."""
+    cache.set(
+        TOKEN_VERSION_KEY.format(user_id),
+        version,
+        settings.TOKEN_VERSION_CACHE_TIMEOUT
+    )
+
+
+def get_token_version(user_id):
+    """
+    Возвращает актуальную версию токенов пользователя.
+
+    Версия берётся из кеша; при промахе читается из основной базы
+    данных, а не с реплики, чтобы отзыв токенов не зависел от её
+    отставания. Для удалённого или неактивного пользователя
+    возвращается 0, и ни один его токен не проходит проверку.
+    """
+    version = cache.get(TOKEN_VERSION_KEY.format(user_id))
+    if version is None:
+        version = User.objects.using(
+            get_routing_setting('PRIMARY')
+        ).filter(
+            pk=user_id, is_active=True
+        ).values_list('token_version', flat=True).first() or 0
+        set_token_version(user_id, version)
+    return version
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, восстановленный из утверждений токена."""
+
+    @property
+    def role(self):
+        return self.token.get('role', Roles.USER.value)
+
+    @property
+    def is_admin(self):
+        return (
+            self.role == Roles.ADMIN.value
+            or self.is_staff
+            or self.is_superuser
+        )
+
+    @property
+    def is_moderator(self):
+        return self.role == Roles.MODERATOR.value
+
+    def __eq__(self, other):
+        if isinstance(other, (TokenUser, User)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def as_user(self):
+        """
+        Несохраняемый экземпляр User для связей (author) и сериализации.
+        """
+        user = User(
+            id=self.id,
+            **{field: getattr(self, field) for field in CLAIM_FIELDS}
+        )
+        user._state.adding = False
+        return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без запроса пользователя к базе данных.
+
+    Пользователь строится из утверждений токена. Версия токенов
+    пользователя сверяется с кешем: при смене роли, флагов или
+    активности она увеличивается, и старые токены отклоняются.
+    Токены без утверждений (выданные до появления этого механизма)
+    проверяются как раньше, с загрузкой пользователя.
+    """
+
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        user = ClaimsUser(validated_token)
+        if get_token_version(user.id) != validated_token[TOKEN_VERSION_CLAIM]:
+            raise AuthenticationFailed(
+                'Токен отозван: права пользователя изменились.',
+                code='token_revoked'
+            )
+        return user
+
+
+def get_user_instance(user):
+    """Возвращает экземпляр User для пользователя запроса."""
+    if isinstance(user, ClaimsUser):
+        return user.as_user()
+    return user
@@ -0,0 +1,98 @@
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+VERSION_KEY = 'version:{}'
+STATS_KEY = 'stats:{}:{}'
+STATS_CACHES_KEY = 'stats:caches'
+DEFAULT_LOCAL_CACHE_TIMEOUT = 5
+
+
+def is_cache_shared():
+    """
+    Виден ли кеш всем процессам.
+
+    LocMemCache хранит данные в памяти процесса: версию модели,
+    увеличенную сигналом в одном процессе, другие не видят.
+    """
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def get_versioned_timeout(timeout):
+    """
+    Срок хранения данных, ключ которых включает версии моделей.
+
+    С локальным кешем процесса записи в других процессах не меняют
+    версии, поэтому данные хранятся не дольше LOCAL_CACHE_TIMEOUT.
+    """
+    if is_cache_shared():
+        return timeout
+    return min(timeout, getattr(
+        settings, 'LOCAL_CACHE_TIMEOUT', DEFAULT_LOCAL_CACHE_TIMEOUT
+    ))
+
+
+def get_model_label(model):
+    """Возвращает метку модели вида `app_label.modelname`."""
+    if isinstance(model, str):
+        return model.lower()
+    return model._meta.label_lower
+
+
+def get_model_version(model):
+    """
+    Возвращает текущую версию данных модели.
+
+    Начальное значение берётся из текущего времени, а не с единицы:
+    если счётчик вытеснят из кеша, новые ключи не совпадут со старыми.
+    """
+    return cache.get_or_set(
+        VERSION_KEY.format(get_model_label(model)),
+        lambda: time.time_ns() // 1000,
+        None
+    )
+
+
+def get_models_version(models):
+    """Возвращает общую версию данных нескольких моделей."""
+    return '.'.join(str(get_model_version(model)) for model in models)
+
+
+def bump_model_version(model):
+    """Увеличивает версию данных модели, делая устаревшими её ключи."""
+    key = VERSION_KEY.format(get_model_label(model))
+    try:
+        return cache.incr(key)
+    except ValueError:
+        get_model_version(model)
+        return cache.incr(key)
+
+
+def record_cache_event(name, hit):
+    """Учитывает попадание или промах кеша с именем `name`."""
+    key = STATS_KEY.format(name, 'hits' if hit else 'misses')
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, None)
+    names = cache.get(STATS_CACHES_KEY, set())
+    if name not in names:
+        cache.set(STATS_CACHES_KEY, names | {name}, None)
+
+
+def get_cache_stats():
+    """Возвращает счётчики попаданий и промахов по всем кешам."""
+    stats = {}
+    for name in sorted(cache.get(STATS_CACHES_KEY, set())):
+        hits = cache.get(STATS_KEY.format(name, 'hits'), 0)
+        misses = cache.get(STATS_KEY.format(name, 'misses'), 0)
+        total = hits + misses
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / total if total else None,
+        }
+    return stats
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from api.cache import is_cache_shared
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Несколько рабочих процессов требуют общего кеша."""
+    if getattr(settings, 'SERVER_WORKERS', 1) <= 1 or is_cache_shared():
+        return []
+    return [Error(
+        'SERVER_WORKERS больше 1, а кеш локальный для процесса: версии '
+        'моделей, лимиты запросов и закрепление за основной базой не '
+        'видны другим процессам, и они отдают устаревшие данные.',
+        hint='Настройте в CACHES общий кеш (Redis, Memcached).',
+        id='api.E001',
+    )]
@@ -0,0 +1,229 @@
+import hashlib
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError, connections
+
+from api.cache import get_versioned_timeout
+
+DEFAULT_DATABASE_ROUTING = {
+    'PRIMARY': 'default',
+    'REPLICAS': [],
+    'STICKY_SECONDS': 5,
+    'MAX_LAG': 30,
+    'LAG_CHECK_INTERVAL': 1.0,
+}
+STICKY_KEY = 'db_primary:{}'
+SYNC_TABLE = 'replica_sync'
+
+_routing = ContextVar('db_routing', default=None)
+_lag_checks = {}
+
+
+def get_routing_setting(name):
+    """Возвращает параметр из `settings.DATABASE_ROUTING`."""
+    options = getattr(settings, 'DATABASE_ROUTING', {})
+    return options.get(name, DEFAULT_DATABASE_ROUTING[name])
+
+
+class RoutingState:
+    """
+    Состояние маршрутизации одного HTTP-запроса.
+
+    `use_replica` — можно ли читать с реплик; `wrote` — была ли запись,
+    после которой чтение до конца запроса идёт в основную базу;
+    `replica` — реплика, с которой читали.
+    """
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+        self.replica = None
+
+
+@contextmanager
+def routing(state):
+    """Применяет состояние маршрутизации в текущем контексте."""
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def get_client_key(request):
+    """Ключ клиента: токен из Authorization или IP-адрес."""
+    ident = request.META.get('HTTP_AUTHORIZATION') or request.META.get(
+        'REMOTE_ADDR', ''
+    )
+    return STICKY_KEY.format(hashlib.md5(ident.encode()).hexdigest())
+
+
+def is_sticky(request):
+    """Писал ли клиент недавно, то есть должен ли читать из основной."""
+    return cache.get(get_client_key(request)) is not None
+
+
+def stick_to_primary(request):
+    """Направляет чтение клиента в основную базу на `STICKY_SECONDS`."""
+    cache.set(
+        get_client_key(request), True, get_routing_setting('STICKY_SECONDS')
+    )
+
+
+def get_replica_lag(alias):
+    """
+    Отставание реплики в секундах или None, если оно неизвестно.
+
+    Время последней синхронизации хранится в самой реплике (таблица
+    `replica_sync`) и перечитывается не чаще раза в `LAG_CHECK_INTERVAL`.
+    """
+    now = time.time()
+    checked_at, synced_at = _lag_checks.get(alias, (None, None))
+    if (
+        checked_at is None
+        or now - checked_at > get_routing_setting('LAG_CHECK_INTERVAL')
+    ):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(f'SELECT synced_at FROM {SYNC_TABLE}')
+                row = cursor.fetchone()
+        except DatabaseError:
+            row = None
+        synced_at = row[0] if row else None
+        _lag_checks[alias] = (now, synced_at)
+    return None if synced_at is None else max(0.0, now - synced_at)
+
+
+def get_fresh_replicas():
+    """Реплики, отставание которых не больше `MAX_LAG` секунд."""
+    replicas = get_routing_setting('REPLICAS')
+    max_lag = get_routing_setting('MAX_LAG')
+    if max_lag is None:
+        return list(replicas)
+    fresh = []
+    for alias in replicas:
+        lag = get_replica_lag(alias)
+        if lag is not None and lag <= max_lag:
+            fresh.append(alias)
+    return fresh
+
+
+def get_cache_scope():
+    """
+    Префикс ключей кеша для данных, прочитанных в текущем запросе.
+
+    Данные с реплики кешируются отдельно: иначе клиент, который только
+    что записал и читает из основной базы, получил бы из кеша
+    отстающие данные реплики.
+    """
+    state = _routing.get()
+    if state is not None and state.use_replica and not state.wrote:
+        return 'replica:'
+    return ''
+
+
+def get_cache_timeout(timeout):
+    """
+    Срок кеширования данных, прочитанных в текущем запросе.
+
+    Данные с реплики могут отставать на `MAX_LAG` секунд и попасть
+    в кеш под уже увеличенной версией модели, поэтому хранятся не
+    дольше допустимого отставания. С локальным кешем процесса срок
+    ограничен `get_versioned_timeout`.
+    """
+    timeout = get_versioned_timeout(timeout)
+    state = _routing.get()
+    max_lag = get_routing_setting('MAX_LAG')
+    if state is None or state.replica is None or max_lag is None:
+        return timeout
+    return min(timeout, max_lag)
+
+
+class PrimaryReplicaRouter:
+    """
+    Чтение с реплик, запись в основную базу.
+
+    С реплик читаются только безопасные (GET, HEAD, OPTIONS) запросы,
+    которые пропустил `ReplicaRoutingMiddleware`: клиент не писал
+    последние `STICKY_SECONDS` секунд и запрос ещё ничего не записал.
+    Команды, сигналы вне запросов и остальные запросы работают с
+    основной базой. Реплика выбирается случайно среди тех, что
+    отстают не больше `MAX_LAG` секунд; если таких нет, чтение идёт
+    в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        primary = get_routing_setting('PRIMARY')
+        state = _routing.get()
+        if state is None or not state.use_replica or state.wrote:
+            return primary
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if state.replica is None:
+            replicas = get_fresh_replicas()
+            if not replicas:
+                state.use_replica = False
+                return primary
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return get_routing_setting('PRIMARY')
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {get_routing_setting('PRIMARY')}
+        databases.update(get_routing_setting('REPLICAS'))
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Схема реплик копируется вместе с данными при синхронизации."""
+        if db in get_routing_setting('REPLICAS'):
+            return False
+        return None
+
+
+def sync_replica(alias):
+    """
+    Копирует основную базу SQLite в реплику `alias`.
+
+    Копия делается через backup API SQLite, поэтому основная база
+    остаётся доступной, а открытые соединения реплики видят новые
+    данные. Время начала копирования записывается в таблицу
+    `replica_sync` реплики и служит меткой её отставания.
+    """
+    primary = connections[get_routing_setting('PRIMARY')]
+    target = connections.databases[alias]
+    if primary.vendor != 'sqlite' or 'sqlite' not in target['ENGINE']:
+        raise ImproperlyConfigured(
+            'Синхронизация реплик поддерживается только для SQLite.'
+        )
+    started = time.time()
+    primary.ensure_connection()
+    destination = sqlite3.connect(str(target['NAME']))
+    try:
+        primary.connection.backup(destination)
+        destination.execute(
+            f'CREATE TABLE IF NOT EXISTS {SYNC_TABLE} '
+            '(synced_at REAL NOT NULL)'
+        )
+        destination.execute(f'DELETE FROM {SYNC_TABLE}')
+        destination.execute(
+            f'INSERT INTO {SYNC_TABLE} (synced_at) VALUES (?)', [started]
+        )
+        destination.commit()
+    finally:
+        destination.close()
+    return started
@@ -1,17 +1,13 @@
-from django_filters.rest_framework import FilterSet, CharFilter
+from django_filters.rest_framework import CharFilter, FilterSet
+from rest_framework.filters import BaseFilterBackend
 
+from reviews.fts import search_titles
 from reviews.models import Title
 
 
 class TitleFilter(FilterSet):
-    genre = CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
-    )
-    category = CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
-    )
+    genre = CharFilter(field_name='genre__slug')
+    category = CharFilter(field_name='category__slug')
     name = CharFilter(
         field_name='name',
         lookup_expr='icontains',
@@ -20,3 +16,15 @@ class TitleFilter(FilterSet):
     class Meta:
         model = Title
         fields = ('genre', 'category', 'year', 'name')
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск по названию и описанию с ранжированием."""
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return search_titles(queryset, text)
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.db_router import get_routing_setting, sync_replica
+
+
+class Command(BaseCommand):
+    help = "Скопировать основную базу SQLite в реплики"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            action='append',
+            dest='databases',
+            help='Реплика из DATABASES; по умолчанию все из DATABASE_ROUTING'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, синхронизируя раз в --interval'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Пауза между синхронизациями, секунды'
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['databases'] or get_routing_setting('REPLICAS')
+        for alias in aliases:
+            if alias not in connections.databases:
+                raise CommandError(f'Базы данных {alias} нет в DATABASES')
+        if not aliases:
+            raise CommandError('В DATABASE_ROUTING не заданы реплики')
+        while True:
+            for alias in aliases:
+                started = time.perf_counter()
+                sync_replica(alias)
+                if not options['loop']:
+                    self.stdout.write(
+                        f'Реплика {alias} синхронизирована за '
+                        f'{time.perf_counter() - started:.2f} с'
+                    )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,242 @@
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+from api.cache import get_cache_stats
+from users.outbox import get_pending_emails
+
+DEFAULT_METRICS = {
+    'DIR': None,
+    'FLUSH_INTERVAL': 1.0,
+    'BUCKETS': (
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    ),
+}
+
+REQUESTS_TOTAL = 'yamdb_http_requests_total'
+REQUEST_DURATION = 'yamdb_http_request_duration_seconds'
+DB_QUERIES_TOTAL = 'yamdb_db_queries_total'
+DB_QUERY_DURATION = 'yamdb_db_query_duration_seconds_total'
+
+COUNTERS = {
+    REQUESTS_TOTAL: 'Число обработанных HTTP-запросов.',
+    DB_QUERIES_TOTAL: 'Число SQL-запросов, выполненных при обработке.',
+    DB_QUERY_DURATION: 'Суммарное время SQL-запросов, секунды.',
+}
+HISTOGRAMS = {
+    REQUEST_DURATION: 'Время обработки HTTP-запроса, секунды.',
+}
+
+# Функции, возвращающие значения датчиков (gauge) на момент сбора:
+# имя -> (описание, функция, возвращающая список пар (метки, значение)).
+GAUGES = {}
+
+
+def get_metrics_setting(name):
+    """Возвращает параметр из `settings.METRICS`."""
+    options = getattr(settings, 'METRICS', {})
+    return options.get(name, DEFAULT_METRICS[name])
+
+
+def register_gauge(name, description, collect):
+    """Регистрирует датчик, значения которого вычисляются при сборе."""
+    GAUGES[name] = (description, collect)
+
+
+class MetricsStore:
+    """
+    Счётчики метрик, общие для всех рабочих процессов.
+
+    Каждый процесс копит значения в памяти и не чаще раза в
+    `FLUSH_INTERVAL` секунд атомарно записывает их в свой файл
+    `<pid>.json` в каталоге `METRICS['DIR']`. При сборе файлы всех
+    процессов суммируются. Все значения — монотонные счётчики
+    (включая корзины гистограмм), поэтому сложение корректно, а файлы
+    завершившихся процессов продолжают учитываться.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.pid = None
+        self.values = defaultdict(float)
+        self.last_flush = 0.0
+
+    def get_directory(self):
+        path = Path(
+            self.directory
+            or get_metrics_setting('DIR')
+            or settings.BASE_DIR / 'metrics'
+        )
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _check_pid(self):
+        # После fork дочерний процесс не должен дописывать
+        # унаследованные значения родителя в свой файл.
+        pid = os.getpid()
+        if pid != self.pid:
+            self.pid = pid
+            self.values = defaultdict(float)
+            self.last_flush = 0.0
+
+    def inc(self, name, labels, value=1.0):
+        with self.lock:
+            self._check_pid()
+            self.values[(name, tuple(sorted(labels.items())))] += value
+        self.maybe_flush()
+
+    def observe(self, name, labels, value, buckets=None):
+        """Добавляет наблюдение в гистограмму `name`."""
+        buckets = buckets or get_metrics_setting('BUCKETS')
+        labels = tuple(sorted(labels.items()))
+        with self.lock:
+            self._check_pid()
+            for bound in (*buckets, math.inf):
+                if value <= bound:
+                    key = labels + (('le', format_value(bound)),)
+                    self.values[(f'{name}_bucket', key)] += 1
+            self.values[(f'{name}_sum', labels)] += value
+            self.values[(f'{name}_count', labels)] += 1
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        if time.monotonic() - self.last_flush >= get_metrics_setting(
+            'FLUSH_INTERVAL'
+        ):
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            self._check_pid()
+            data = [
+                [name, list(map(list, labels)), value]
+                for (name, labels), value in self.values.items()
+            ]
+            self.last_flush = time.monotonic()
+        directory = self.get_directory()
+        path = directory / f'{self.pid}.json'
+        tmp_path = directory / f'{self.pid}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(data, file)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """Возвращает сумму значений всех процессов."""
+        self.flush()
+        totals = defaultdict(float)
+        for path in self.get_directory().glob('*.json'):
+            try:
+                with open(path) as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in data:
+                totals[(name, tuple(map(tuple, labels)))] += value
+        return totals
+
+
+store = MetricsStore()
+atexit.register(lambda: store.pid and store.flush())
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return f'{value:.1f}'
+    return repr(float(value))
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            key,
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n')
+        )
+        for key, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+def record_request(route, method, status, duration, sql_stats=None):
+    """Учитывает обработанный запрос и его SQL-запросы."""
+    labels = {'route': route, 'method': method, 'status': str(status)}
+    store.inc(REQUESTS_TOTAL, labels)
+    store.observe(REQUEST_DURATION, labels, duration)
+    if sql_stats is not None:
+        store.inc(DB_QUERIES_TOTAL, {'route': route}, sql_stats.count)
+        store.inc(DB_QUERY_DURATION, {'route': route}, sql_stats.duration)
+
+
+def collect_cache_stats():
+    samples = []
+    for name, stats in get_cache_stats().items():
+        if stats['hit_ratio'] is not None:
+            samples.append(((('cache', name),), stats['hit_ratio']))
+    return samples
+
+
+register_gauge(
+    'yamdb_cache_hit_ratio',
+    'Доля попаданий в кеш по именам кешей.',
+    collect_cache_stats
+)
+
+register_gauge(
+    'yamdb_email_queue_depth',
+    'Число писем, ожидающих отправки.',
+    lambda: [((), get_pending_emails().count())]
+)
+
+
+def sample_sort_key(item):
+    (name, labels), _ = item
+    bound = dict(labels).get('le')
+    return (
+        name,
+        tuple(label for label in labels if label[0] != 'le'),
+        math.inf if bound == '+Inf' else float(bound or 0),
+    )
+
+
+def render_metrics():
+    """Возвращает метрики в текстовом формате Prometheus 0.0.4."""
+    totals = store.collect()
+    families = defaultdict(list)
+    for (name, labels), value in sorted(
+        totals.items(), key=sample_sort_key
+    ):
+        family = name
+        for suffix in ('_bucket', '_sum', '_count'):
+            if name.endswith(suffix) and name[:-len(suffix)] in HISTOGRAMS:
+                family = name[:-len(suffix)]
+        families[family].append((name, labels, value))
+    lines = []
+    for kind, described in (('counter', COUNTERS),
+                            ('histogram', HISTOGRAMS)):
+        for family, description in described.items():
+            lines.append(f'# HELP {family} {description}')
+            lines.append(f'# TYPE {family} {kind}')
+            for name, labels, value in families.get(family, ()):
+                lines.append(
+                    f'{name}{format_labels(labels)} {format_value(value)}'
+                )
+    for family, (description, collect) in GAUGES.items():
+        lines.append(f'# HELP {family} {description}')
+        lines.append(f'# TYPE {family} gauge')
+        for labels, value in collect():
+            lines.append(
+                f'{family}{format_labels(labels)} {format_value(value)}'
+            )
+    return '\n'.join(lines) + '\n'
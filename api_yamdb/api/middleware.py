@@ -0,0 +1,364 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from api.async_views import add_thread_context
+from api.db_router import (RoutingState, get_routing_setting, is_sticky,
+                           routing, stick_to_primary)
+from api.metrics import record_request
+from api.profiling import PROFILE_MODES, profiled, save_profile_meta
+
+logger = logging.getLogger('api.sql')
+
+DEFAULT_SQL_INSTRUMENTATION = {
+    'SAMPLE_RATE': 1.0,
+    'DUPLICATE_THRESHOLD': 2,
+    'MAX_LOGGED_SQL': 200,
+}
+
+
+def get_sql_instrumentation_setting(name):
+    """Возвращает параметр из `settings.SQL_INSTRUMENTATION`."""
+    options = getattr(settings, 'SQL_INSTRUMENTATION', {})
+    return options.get(name, DEFAULT_SQL_INSTRUMENTATION[name])
+
+
+class HybridMiddleware:
+    """
+    Основа middleware, работающих и под WSGI, и под ASGI.
+
+    Если следующий обработчик асинхронный, вызов идёт через `acall`,
+    иначе через `call`, и Django не переключает цепочку в синхронный
+    режим ради этого middleware. Подклассы переопределяют оба метода;
+    по умолчанию запрос передаётся дальше без изменений.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.acall(request)
+        return self.call(request)
+
+    def call(self, request):
+        return self.get_response(request)
+
+    async def acall(self, request):
+        return await self.get_response(request)
+
+
+class QueryStats:
+    """
+    Счётчик SQL-запросов одного HTTP-запроса.
+
+    Подключается к соединениям через `connection.execute_wrapper`, поэтому
+    не зависит от DEBUG и не накапливает `connection.queries`. Запросы
+    с одинаковым текстом SQL (параметры передаются отдельно) считаются
+    дублями: это типичный признак N+1.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @contextmanager
+    def attach(self):
+        """Подключает счётчик ко всем соединениям текущего потока."""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def get_duplicates(self, threshold):
+        """Возвращает повторяющиеся запросы, начиная с самых частых."""
+        return [
+            (sql, count)
+            for sql, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+class QueryInstrumentationMiddleware(HybridMiddleware):
+    """
+    Считает SQL-запросы, их суммарное время и дубли для каждого запроса.
+
+    Итоги отдаются в заголовке `Server-Timing` и пишутся в лог `api.sql`
+    одной JSON-строкой. Доля инструментируемых запросов задаётся
+    `SQL_INSTRUMENTATION['SAMPLE_RATE']`; остальные запросы проходят
+    без обёртки и без накладных расходов. Статистика сохраняется
+    в `request.sql_stats` для других middleware. Под ASGI счётчик
+    подключается в потоке, где выполняется представление.
+    """
+
+    @staticmethod
+    def is_sampled():
+        sample_rate = get_sql_instrumentation_setting('SAMPLE_RATE')
+        return sample_rate > 0 and random.random() < sample_rate
+
+    def call(self, request):
+        if not self.is_sampled():
+            return self.get_response(request)
+        stats = request.sql_stats = QueryStats()
+        start = time.perf_counter()
+        with stats.attach():
+            response = self.get_response(request)
+        return self.finish(request, response, stats, start)
+
+    async def acall(self, request):
+        if not self.is_sampled():
+            return await self.get_response(request)
+        stats = request.sql_stats = QueryStats()
+        add_thread_context(request, stats.attach)
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        return self.finish(request, response, stats, start)
+
+    def finish(self, request, response, stats, start):
+        total = time.perf_counter() - start
+        duplicates = stats.get_duplicates(
+            get_sql_instrumentation_setting('DUPLICATE_THRESHOLD')
+        )
+        self.set_server_timing(response, stats, duplicates, total)
+        self.log(request, response, stats, duplicates, total)
+        return response
+
+    @staticmethod
+    def set_server_timing(response, stats, duplicates, total):
+        metrics = [
+            f'db;dur={stats.duration * 1000:.3f};desc="{stats.count} queries"',
+            f'total;dur={total * 1000:.3f}',
+        ]
+        if duplicates:
+            repeated = sum(count for _, count in duplicates)
+            metrics.append(f'dbdup;desc="{repeated} duplicated queries"')
+        existing = response.get('Server-Timing')
+        if existing:
+            metrics.insert(0, existing)
+        response['Server-Timing'] = ', '.join(metrics)
+
+    @staticmethod
+    def log(request, response, stats, duplicates, total):
+        max_sql = get_sql_instrumentation_setting('MAX_LOGGED_SQL')
+        match = getattr(request, 'resolver_match', None)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'route': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(stats.duration * 1000, 3),
+            'total_ms': round(total * 1000, 3),
+            'duplicates': [
+                {'sql': sql[:max_sql], 'count': count}
+                for sql, count in duplicates
+            ],
+        }
+        logger.log(
+            logging.WARNING if duplicates else logging.INFO,
+            json.dumps(record, ensure_ascii=False)
+        )
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """
+    Профилирование отдельного запроса по заголовку `X-Profile`.
+
+    Администратор передаёт `X-Profile: cprofile` (детерминированный
+    cProfile) или `X-Profile: sample` (статистический сэмплер стеков).
+    Запрос выполняется под профилировщиком, профиль сохраняется на диск,
+    а его идентификатор возвращается в заголовке `X-Profile-Id`; скачать
+    профиль можно через `/api/v1/profiles/<id>/`. Запросы без заголовка
+    проходят без каких-либо дополнительных действий. Под ASGI
+    профилируется поток, в котором выполняется представление.
+    """
+
+    header = 'HTTP_X_PROFILE'
+
+    def get_mode(self, request):
+        mode = request.META[self.header].strip().lower()
+        return mode if mode in PROFILE_MODES else None
+
+    def call(self, request):
+        if self.header not in request.META:
+            return self.get_response(request)
+        mode = self.get_mode(request)
+        if not mode or not self.is_admin(request):
+            return self.get_response(request)
+        with profiled(mode) as record:
+            response = self.get_response(request)
+        return self.finish(request, response, mode, record)
+
+    async def acall(self, request):
+        if self.header not in request.META:
+            return await self.get_response(request)
+        mode = self.get_mode(request)
+        if not mode or not await sync_to_async(self.is_admin)(request):
+            return await self.get_response(request)
+        record = {}
+
+        @contextmanager
+        def profile_view():
+            with profiled(mode) as result:
+                yield
+            record.update(result)
+
+        add_thread_context(request, profile_view)
+        response = await self.get_response(request)
+        return self.finish(request, response, mode, record)
+
+    @staticmethod
+    def finish(request, response, mode, record):
+        if 'id' not in record:
+            return response
+        save_profile_meta(
+            record['id'],
+            mode=mode,
+            method=request.method,
+            path=request.get_full_path(),
+            status=response.status_code,
+            duration_ms=round(record['duration'] * 1000, 3),
+            created=timezone.now().isoformat(),
+        )
+        response['X-Profile-Id'] = record['id']
+        return response
+
+    @staticmethod
+    def is_admin(request):
+        """
+        Аутентифицирует запрос так же, как DRF, и проверяет роль.
+
+        JWT проверяется здесь же, потому что middleware выполняется
+        раньше аутентификации DRF.
+        """
+        drf_request = Request(
+            request,
+            authenticators=[
+                auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+            ]
+        )
+        try:
+            user = drf_request.user
+        except APIException:
+            return False
+        return user.is_authenticated and user.is_admin
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """
+    Учитывает запросы в метриках Prometheus (`/metrics`).
+
+    Запросы помечаются именем маршрута (`titles-list`, `review-detail`),
+    а не путём, чтобы число рядов не зависело от идентификаторов в URL.
+    Стоит первым в MIDDLEWARE, чтобы видеть `request.sql_stats`.
+    """
+
+    def call(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        return self.finish(request, response, start)
+
+    async def acall(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        return self.finish(request, response, start)
+
+    @staticmethod
+    def finish(request, response, start):
+        match = getattr(request, 'resolver_match', None)
+        record_request(
+            match.view_name if match else 'unmatched',
+            request.method,
+            response.status_code,
+            time.perf_counter() - start,
+            getattr(request, 'sql_stats', None)
+        )
+        return response
+
+
+class AsyncRoutingMiddleware(HybridMiddleware):
+    """
+    Под ASGI направляет запросы в URLconf с асинхронными обработчиками.
+
+    Работает, только если вся цепочка middleware асинхронная; под WSGI
+    запросы идут в обычный `ROOT_URLCONF`. Отключается настройкой
+    `ASYNC_READ_VIEWS`.
+    """
+
+    def call(self, request):
+        return self.get_response(request)
+
+    async def acall(self, request):
+        if settings.ASYNC_READ_VIEWS:
+            request.urlconf = settings.ASYNC_ROOT_URLCONF
+        return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """
+    Разрешает чтение с реплик для безопасных запросов.
+
+    Запросы GET, HEAD и OPTIONS клиента, который не писал последние
+    `DATABASE_ROUTING['STICKY_SECONDS']` секунд, читают с реплик
+    (см. `PrimaryReplicaRouter`). Если запрос что-то записал, клиент
+    (по токену или IP-адресу) на это время закрепляется за основной
+    базой и видит свои изменения. Без реплик в настройках ничего
+    не делает.
+    """
+
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def get_state(self, request):
+        return RoutingState(
+            request.method in self.safe_methods and not is_sticky(request)
+        )
+
+    def call(self, request):
+        if not get_routing_setting('REPLICAS'):
+            return self.get_response(request)
+        with routing(self.get_state(request)) as state:
+            response = self.get_response(request)
+        return self.finish(request, response, state)
+
+    async def acall(self, request):
+        if not get_routing_setting('REPLICAS'):
+            return await self.get_response(request)
+        state = self.get_state(request)
+        add_thread_context(request, lambda: routing(state))
+        with routing(state):
+            response = await self.get_response(request)
+        return self.finish(request, response, state)
+
+    @staticmethod
+    def finish(request, response, state):
+        if state.wrote:
+            stick_to_primary(request)
+        return response
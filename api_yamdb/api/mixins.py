@@ -1,24 +1,352 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.db.models.constants import LOOKUP_SEP
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework import mixins, viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
 
+from api.authentication import get_user_instance
+from api.cache import (get_models_version, is_cache_shared,
+                       record_cache_event)
+from api.db_router import get_cache_scope, get_cache_timeout
+from api.pagination import NameSlugPagination, PubDatePagination
 from api.permissions import IsAdminOrReadOnly, IsAuthorOrReadOnly
 
 
-class BaseViewSet(viewsets.ModelViewSet):
-    pagination_class = LimitOffsetPagination
+class ConditionalGetMixin:
+    """
+    Поддержка условных GET-запросов (ETag, If-None-Match, Last-Modified).
+
+    ETag объекта строится по его версии и дате изменения, ETag списка —
+    по дешёвой выборке max(updated_at) и count() отфильтрованных строк.
+    В курсорном режиме пагинации выборка не выполняется: ETag строится
+    по строкам уже прочитанной страницы и ссылкам на соседние, чтобы
+    не возвращать COUNT(*), от которого этот режим избавляет.
+    С общим кешем выборка кешируется по версиям моделей, и повторный
+    запрос неизменного списка не обращается к базе данных; локальный
+    кеш процесса не видит записей других процессов, поэтому тогда
+    выборка каждый раз читается из базы. В ETag входят также
+    полный путь запроса, формат ответа и версии связанных моделей из
+    `etag_models`, чьи данные попадают в ответ. Если ресурс
+    не изменился, возвращается 304 без сериализации.
+    """
+
+    etag_models = ()
+    probe_cache_timeout = 300
+    probe_ignored_params = (
+        'limit', 'offset', 'page', 'cursor', 'pagination', 'fields', 'exclude'
+    )
+
+    def make_etag(self, *parts):
+        request = self.request
+        parts += (
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            get_models_version(self.etag_models),
+        )
+        return quote_etag(
+            hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+        )
+
+    def get_collection_probe(self, queryset):
+        """Возвращает max(updated_at) и count() для списка."""
+        if not is_cache_shared():
+            return self.read_collection_probe(queryset)
+        params = sorted(
+            (key, values)
+            for key, values in self.request.query_params.lists()
+            if key not in self.probe_ignored_params
+        )
+        signature = hashlib.md5(
+            f'{self.request.path}?{params}'.encode()
+        ).hexdigest()
+        version = get_models_version((queryset.model,) + self.etag_models)
+        key = f'probe:{get_cache_scope()}{version}:{signature}'
+        probe = cache.get(key)
+        if probe is None:
+            probe = self.read_collection_probe(queryset)
+            cache.set(key, probe, get_cache_timeout(self.probe_cache_timeout))
+        return probe
+
+    def read_collection_probe(self, queryset):
+        """
+        Читает выборку из базы.
+
+        Если у пагинатора задан `count_threshold`, строки считаются
+        не дальше порога: для длинного списка count() равен порогу + 1.
+        """
+        queryset = queryset.order_by()
+        threshold = getattr(self.paginator, 'count_threshold', None)
+        if threshold is None:
+            return queryset.aggregate(
+                last_modified=Max('updated_at'),
+                count=Count('pk')
+            )
+        probe = queryset.aggregate(last_modified=Max('updated_at'))
+        probe['count'] = queryset[:threshold + 1].count()
+        return probe
+
+    def get_conditional_response(self, etag, last_modified=None):
+        """Возвращает ответ 304, если у клиента актуальная версия."""
+        return get_conditional_response(
+            self.request._request,
+            etag=etag,
+            last_modified=(
+                int(last_modified.timestamp()) if last_modified else None
+            )
+        )
+
+    def set_validators(self, response, etag, last_modified=None):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def is_cursor_list(self):
+        is_cursor_mode = getattr(self.paginator, 'is_cursor_mode', None)
+        return is_cursor_mode is not None and is_cursor_mode(self.request)
+
+    def list_cursor_page(self, queryset):
+        """Список в курсорном режиме: ETag по строкам страницы."""
+        page = self.paginate_queryset(queryset)
+        etag = self.make_etag(
+            *((obj.pk, obj.version, obj.updated_at) for obj in page),
+            self.paginator.get_next_link(),
+            self.paginator.get_previous_link()
+        )
+        not_modified = self.get_conditional_response(etag)
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(page, many=True)
+        return self.set_validators(
+            self.get_paginated_response(serializer.data), etag
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.is_cursor_list():
+            return self.list_cursor_page(queryset)
+        probe = self.get_collection_probe(queryset)
+        # Last-Modified для списка не отправляется: удаление строки
+        # не меняет max(updated_at), а ETag учитывает и количество.
+        etag = self.make_etag(probe['last_modified'], probe['count'])
+        not_modified = self.get_conditional_response(etag)
+        if not_modified is not None:
+            return not_modified
+
+        if self.paginator is not None:
+            self.paginator.count_hint = probe['count']
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = self.get_serializer(queryset, many=True)
+            response = Response(serializer.data)
+        return self.set_validators(response, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = self.make_etag(
+            instance.pk, instance.version, instance.updated_at
+        )
+        not_modified = self.get_conditional_response(
+            etag, instance.updated_at
+        )
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(instance)
+        return self.set_validators(
+            Response(serializer.data), etag, instance.updated_at
+        )
+
+
+class SparseFieldsMixin:
+    """
+    Разреженные наборы полей при чтении: `?fields=id,name`, `?exclude=text`.
+
+    Сериализатор отдаёт только выбранные поля, а queryset читает только
+    их колонки (`only`) и не загружает связи, которых нет в ответе.
+    Колонки поля сериализатора задаются в `sparse_field_columns`
+    (по умолчанию — поле модели с тем же именем); `sparse_required_columns`
+    и поля курсора пагинации читаются всегда. Запись не затрагивается:
+    сохранению нужны все поля модели.
+    """
+
+    sparse_actions = ('list', 'retrieve')
+    sparse_field_columns = {}
+    sparse_required_columns = ()
+
+    def parse_sparse_param(self, name, available):
+        names = [
+            field.strip()
+            for field in self.request.query_params[name].split(',')
+            if field.strip()
+        ]
+        unknown = [field for field in names if field not in available]
+        if unknown:
+            raise ValidationError(
+                {name: [f'Неизвестные поля: {", ".join(unknown)}.']}
+            )
+        return names
+
+    def get_sparse_fields(self):
+        """Выбранные поля сериализатора или None, если нужны все."""
+        if self.action not in self.sparse_actions:
+            return None
+        if not hasattr(self, '_sparse_fields'):
+            params = self.request.query_params
+            self._sparse_fields = None
+            if 'fields' in params or 'exclude' in params:
+                available = self.get_serializer_class().Meta.fields
+                selected = available
+                excluded = ()
+                if 'fields' in params:
+                    selected = self.parse_sparse_param('fields', available)
+                if 'exclude' in params:
+                    excluded = self.parse_sparse_param('exclude', available)
+                self._sparse_fields = tuple(
+                    field for field in available
+                    if field in selected and field not in excluded
+                )
+        return self._sparse_fields
+
+    def get_sparse_queryset(self, queryset):
+        """Оставляет в queryset колонки и связи выбранных полей."""
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        columns = {
+            queryset.model._meta.pk.name,
+            *self.sparse_required_columns,
+            *(
+                field.lstrip('-') for field in
+                getattr(self.paginator, 'cursor_ordering', ())
+            ),
+        }
+        for field in fields:
+            columns.update(self.sparse_field_columns.get(field, (field,)))
+        relations = {column.split(LOOKUP_SEP)[0] for column in columns}
+        prefetched = [
+            lookup for lookup in queryset._prefetch_related_lookups
+            if lookup.split(LOOKUP_SEP)[0] in relations
+        ]
+        selected = queryset.query.select_related
+        if isinstance(selected, dict):
+            # select_related() без аргументов включил бы все связи.
+            queryset = queryset.select_related(None)
+            selected = [name for name in selected if name in relations]
+            if selected:
+                queryset = queryset.select_related(*selected)
+        return queryset.prefetch_related(None).prefetch_related(
+            *prefetched
+        ).only(*(
+            column for column in columns
+            if column.split(LOOKUP_SEP)[0] not in prefetched
+        ))
+
+    def filter_queryset(self, queryset):
+        return self.get_sparse_queryset(super().filter_queryset(queryset))
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(),
+                'sparse_fields': self.get_sparse_fields()}
+
+
+class BaseViewSet(SparseFieldsMixin, ConditionalGetMixin,
+                  viewsets.ModelViewSet):
+    pagination_class = PubDatePagination
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly,)
     http_method_names = ('get', 'post', 'delete', 'patch')
+    etag_models = ('users.user',)
+    sparse_field_columns = {'author': ('author__username',)}
+    # Версия и дата изменения нужны для ETag.
+    sparse_required_columns = ('version', 'updated_at')
+
+    def get_author(self):
+        """Автор создаваемого объекта без запроса к базе данных."""
+        return get_user_instance(self.request.user)
+
+
+class CachedListMixin:
+    """
+    Кеширует данные ответа на GET-запрос списка.
 
+    Ключ включает хост, путь, параметры запроса (search, limit, offset
+    и т.д.) и версии моделей из `get_list_cache_models`, которые
+    увеличиваются сигналами при создании, изменении и удалении объектов,
+    поэтому устаревший ответ не отдаётся.
+    """
 
-class CategoryGenreViewSet(mixins.CreateModelMixin,
+    list_cache_timeout = 60 * 60
+
+    def get_list_cache_models(self):
+        """Модели, от данных которых зависит ответ."""
+        return (self.get_queryset().model,)
+
+    def get_list_cache_key(self, request):
+        params = sorted(request.query_params.lists())
+        signature = hashlib.md5(
+            f'{request.get_host()}{request.path}?{params}'.encode()
+        ).hexdigest()
+        version = get_models_version(self.get_list_cache_models())
+        return (
+            f'list:{get_cache_scope()}{self.basename}:{version}:{signature}'
+        )
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_list_cache_key(request)
+        data = cache.get(key)
+        record_cache_event(f'{self.basename}-list', hit=data is not None)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+        response = super().list(request, *args, **kwargs)
+        cache.set(
+            key, response.data, get_cache_timeout(self.list_cache_timeout)
+        )
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class CategoryGenreViewSet(CachedListMixin,
+                           mixins.CreateModelMixin,
                            mixins.ListModelMixin,
                            mixins.DestroyModelMixin,
                            viewsets.GenericViewSet):
     """Общий класс для CategoryViewSet и GenreViewSet."""
     permission_classes = (IsAdminOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = NameSlugPagination
     filter_backends = (SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    stats_param = 'stats'
+    # Статистика раздела меняется при записи произведений, жанров и отзывов.
+    stats_models = ('reviews.title', 'reviews.genretitle', 'reviews.review')
+
+    def with_stats(self):
+        """Запрошена ли статистика раздела (`?stats=true`)."""
+        return self.request.query_params.get(
+            self.stats_param, ''
+        ).lower() in ('1', 'true')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.with_stats():
+            queryset = queryset.select_related('stats')
+        return queryset
+
+    def get_list_cache_models(self):
+        models = super().get_list_cache_models()
+        if self.with_stats():
+            models += self.stats_models
+        return models
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(),
+                'with_stats': self.with_stats()}
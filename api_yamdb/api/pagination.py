@@ -0,0 +1,230 @@
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Paginator as DjangoPaginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import (CursorPagination,
+                                       LimitOffsetPagination,
+                                       PageNumberPagination)
+
+from api.cache import get_models_version
+from api.db_router import get_cache_scope, get_cache_timeout
+
+
+class OptionalCursorPagination(LimitOffsetPagination):
+    """
+    Пагинация limit/offset с возможностью перейти на курсорный режим.
+
+    Клиент включает курсорный режим параметром `?pagination=cursor`
+    (или передаёт полученный ранее `cursor`). В этом режиме страницы
+    выбираются по ключу сортировки `cursor_ordering` без COUNT(*) и без
+    OFFSET, поэтому глубокие страницы стоят столько же, сколько первая.
+    Клиенты, не включившие режим, получают прежний ответ limit/offset.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('id',)
+
+    def is_cursor_mode(self, request):
+        """Проверяет, запросил ли клиент курсорную пагинацию."""
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or self.cursor_query_param in request.query_params
+        )
+
+    def get_cursor_paginator(self):
+        """Создаёт курсорный пагинатор с ключом сортировки представления."""
+        paginator = CursorPagination()
+        paginator.ordering = self.cursor_ordering
+        paginator.cursor_query_param = self.cursor_query_param
+        paginator.page_size = self.default_limit
+        paginator.page_size_query_param = self.limit_query_param
+        paginator.max_page_size = self.max_limit
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.is_cursor_mode(request):
+            self.cursor_paginator = self.get_cursor_paginator()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_next_link()
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_previous_link()
+        return super().get_previous_link()
+
+
+class CachedCountMixin:
+    """
+    Кеширует COUNT(*) списка по эндпоинту и набору фильтров.
+
+    Ключ кеша включает версии моделей из `count_models`, которые
+    увеличиваются сигналами при любом изменении строк, поэтому
+    закешированное значение не переживает изменение данных.
+    Если задан `count_threshold`, подсчёт ограничивается порогом:
+    для списков длиннее порога поле `count` в ответе равно None.
+    Уже известное представлению количество передаётся в `count_hint`;
+    подсказка больше порога считается оценкой и не используется.
+    С локальным кешем процесса срок хранения сокращается до
+    `LOCAL_CACHE_TIMEOUT` (см. `get_cache_timeout`).
+    """
+
+    count_hint = None
+    count_models = ()
+    count_cache_timeout = 300
+    count_threshold = None
+    count_window = 0
+    count_ignored_params = (
+        'limit', 'offset', 'page', 'cursor', 'pagination', 'fields', 'exclude'
+    )
+
+    def get_count_cache_key(self, request):
+        """Собирает ключ кеша из пути, фильтров и версий моделей."""
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key not in self.count_ignored_params
+            for value in values
+        )
+        signature = hashlib.md5(
+            f'{request.path}?{params}'.encode()
+        ).hexdigest()
+        version = get_models_version(self.count_models)
+        return f'count:{get_cache_scope()}{version}:{signature}'
+
+    def get_count_window(self, request):
+        """
+        Номер последней строки, нужной для текущей страницы.
+
+        По умолчанию берётся из `count_window`; пагинаторы, знающие
+        номер страницы, вычисляют его по запросу.
+        """
+        return self.count_window
+
+    def get_cached_count(self, queryset, request):
+        self.count_is_exact = True
+        if self.count_hint is not None and (
+            self.count_threshold is None
+            or self.count_hint <= self.count_threshold
+        ):
+            return self.count_hint
+        key = self.get_count_cache_key(request)
+        count = cache.get(key)
+        if count is not None:
+            return count
+        queryset = queryset.order_by()
+        if self.count_threshold is None:
+            count = queryset.count()
+        else:
+            cap = max(self.count_threshold, self.get_count_window(request))
+            count = queryset[:cap + 1].count()
+            if count > cap:
+                self.count_is_exact = False
+                return count
+        cache.set(key, count, get_cache_timeout(self.count_cache_timeout))
+        return count
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if not getattr(self, 'count_is_exact', True):
+            response.data['count'] = None
+        return response
+
+
+class CachedCountLimitOffsetMixin(CachedCountMixin):
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_request = request
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        return self.get_cached_count(queryset, self.count_request)
+
+    def get_count_window(self, request):
+        return self.get_offset(request) + self.get_limit(request)
+
+
+class CountPaginator(DjangoPaginator):
+    """Пагинатор Django, получающий количество объектов извне."""
+
+    def __init__(self, object_list, per_page, count_getter, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_getter = count_getter
+
+    @cached_property
+    def count(self):
+        return self.count_getter(self.object_list)
+
+
+class CachedCountPageNumberPagination(CachedCountMixin, PageNumberPagination):
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_request = request
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page):
+        return CountPaginator(
+            object_list,
+            per_page,
+            lambda queryset: self.get_cached_count(
+                queryset, self.count_request
+            )
+        )
+
+    def get_count_window(self, request):
+        try:
+            page = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            page = 1
+        return max(page, 1) * self.get_page_size(request)
+
+
+class TitlePagination(OptionalCursorPagination):
+    cursor_ordering = ('name', 'id')
+
+
+class NameSlugPagination(OptionalCursorPagination):
+    cursor_ordering = ('name', 'slug')
+
+
+class PubDatePagination(OptionalCursorPagination):
+    cursor_ordering = ('-pub_date', 'id')
+
+
+class CachedCountTitlePagination(CachedCountLimitOffsetMixin,
+                                 TitlePagination):
+    count_models = (
+        'reviews.title', 'reviews.genretitle', 'reviews.genre',
+        'reviews.category'
+    )
+
+
+class CachedCountReviewPagination(CachedCountLimitOffsetMixin,
+                                  PubDatePagination):
+    count_models = ('reviews.review',)
+    count_threshold = 1000
+
+
+class CachedCountCommentPagination(CachedCountLimitOffsetMixin,
+                                   PubDatePagination):
+    count_models = ('reviews.comment',)
+
+
+class CachedCountUserPagination(CachedCountPageNumberPagination):
+    count_models = ('users.user',)
@@ -54,6 +54,6 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
         return (
             request.method in permissions.SAFE_METHODS
             or request.user.is_authenticated
-            and (request.user == obj.author or request.user.is_moderator
+            and (obj.author_id == request.user.pk or request.user.is_moderator
                  or request.user.is_admin)
         )
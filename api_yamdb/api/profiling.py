@@ -0,0 +1,139 @@
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+PROFILE_MODES = ('cprofile', 'sample')
+PROFILE_EXTENSIONS = {'cprofile': '.prof', 'sample': '.folded'}
+
+DEFAULT_PROFILING = {
+    'DIR': None,
+    'MAX_PROFILES': 50,
+    'SAMPLE_INTERVAL': 0.001,
+}
+
+
+def get_profiling_setting(name):
+    """Возвращает параметр из `settings.PROFILING`."""
+    options = getattr(settings, 'PROFILING', {})
+    return options.get(name, DEFAULT_PROFILING[name])
+
+
+def get_profiles_dir():
+    """Возвращает каталог профилей, создавая его при необходимости."""
+    path = Path(
+        get_profiling_setting('DIR') or settings.BASE_DIR / 'profiles'
+    )
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class StackSampler:
+    """
+    Статистический профилировщик одного потока.
+
+    Фоновый поток раз в `interval` секунд снимает стек профилируемого
+    потока через `sys._current_frames()` и считает одинаковые стеки.
+    Результат — строки в формате collapsed stacks (`a;b;c 42`), которые
+    понимают flamegraph.pl и speedscope.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f'{os.path.basename(code.co_filename)}:{code.co_name}'
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def enable(self):
+        self._thread.start()
+
+    def disable(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump_stats(self, path):
+        with open(path, 'w') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f'{stack} {count}\n')
+
+
+@contextmanager
+def profiled(mode):
+    """
+    Профилирует блок кода в текущем потоке и сохраняет профиль.
+
+    Отдаёт словарь, в который после выхода из блока записываются
+    идентификатор профиля (`id`) и длительность (`duration`).
+    """
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+    else:
+        profiler = StackSampler(get_profiling_setting('SAMPLE_INTERVAL'))
+    record = {}
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield record
+    finally:
+        profiler.disable()
+        record['duration'] = time.perf_counter() - start
+        record['id'] = uuid.uuid4().hex
+        directory = get_profiles_dir()
+        profiler.dump_stats(
+            directory / f"{record['id']}{PROFILE_EXTENSIONS[mode]}"
+        )
+
+
+def save_profile_meta(profile_id, **meta):
+    """Сохраняет описание профиля и удаляет самые старые профили."""
+    directory = get_profiles_dir()
+    with open(directory / f'{profile_id}.json', 'w') as file:
+        json.dump({'id': profile_id, **meta}, file, ensure_ascii=False)
+    metas = sorted(directory.glob('*.json'), key=os.path.getmtime)
+    for path in metas[:-get_profiling_setting('MAX_PROFILES')]:
+        for stale in directory.glob(f'{path.stem}.*'):
+            stale.unlink(missing_ok=True)
+
+
+def list_profiles():
+    """Возвращает описания сохранённых профилей, начиная с новых."""
+    profiles = []
+    for path in get_profiles_dir().glob('*.json'):
+        try:
+            with open(path) as file:
+                profiles.append(json.load(file))
+        except (OSError, ValueError):
+            continue
+    return sorted(profiles, key=lambda meta: meta['created'], reverse=True)
+
+
+def get_profile_path(profile_id):
+    """Возвращает путь к файлу профиля или None, если его нет."""
+    directory = get_profiles_dir()
+    for extension in PROFILE_EXTENSIONS.values():
+        path = directory / f'{profile_id}{extension}'
+        if path.exists():
+            return path
+    return None
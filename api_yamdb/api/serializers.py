@@ -1,10 +1,15 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError
 from django.shortcuts import get_object_or_404
+from django.utils.encoding import smart_str
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.relations import MANY_RELATION_KWARGS
+from rest_framework.settings import api_settings
 
+from api.authentication import get_access_token
 from api.utils import send_confirmation_email
+from reviews.leaderboards import get_leaderboard_setting
 from reviews.models import Category, Comment, Genre, Review, Title
 from users.constants import EMAIL_LENGTH, USERNAME_LENGTH
 from users.validators import validate_username
@@ -12,14 +17,48 @@ from users.validators import validate_username
 User = get_user_model()
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CatalogStatsSerializer(serializers.Serializer):
+    """Статистика категории или жанра."""
+    title_count = serializers.IntegerField(read_only=True)
+    review_count = serializers.IntegerField(read_only=True)
+    mean_score = serializers.FloatField(read_only=True)
+    histogram = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True
+    )
+
+
+class CatalogStatsMixin:
+    """Добавляет поле `stats`, если представление запросило статистику."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('with_stats'):
+            fields['stats'] = CatalogStatsSerializer(read_only=True)
+        return fields
+
+
+class SparseFieldsSerializerMixin:
+    """Оставляет поля `sparse_fields` из контекста, если они заданы."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = self.context.get('sparse_fields')
+        if selected is None:
+            return fields
+        return {
+            name: field for name, field in fields.items() if name in selected
+        }
+
+
+class CategorySerializer(CatalogStatsMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Category
         fields = ('name', 'slug')
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsSerializerMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -31,14 +70,15 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'pub_date')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(CatalogStatsMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Genre
         fields = ('name', 'slug')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsSerializerMixin,
+                       serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -49,42 +89,142 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
 
-    def validate(self, data):
-        if self.context['request'].method != 'POST':
-            return data
-        title = self.context['view'].kwargs.get('title_id')
-        author = self.context['request'].user
-        if Review.objects.filter(
-                author=author,
-                title=title
-        ).exists():
-            raise serializers.ValidationError(
-                'Вы уже написали отзыв к этому произведению.'
-            )
-        return data
-
-
-class TitleReadSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        """
+        Создание отзыва.
+
+        Повторный отзыв отсекает ограничение `unique_combination-r`,
+        поэтому отдельный запрос на проверку нужен только после ошибки:
+        остальные нарушения целостности пробрасываются дальше.
+        """
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                title=validated_data['title'],
+                author=validated_data['author']
+            ).exists():
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже написали отзыв к этому произведению.'
+                ]
+            })
+
+
+class TitleReadSerializer(SparseFieldsSerializerMixin,
+                          serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
     rating = serializers.IntegerField(read_only=True, default=None)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
+        )
+
+
+class TopTitleSerializer(TitleReadSerializer):
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(TitleReadSerializer.Meta):
+        fields = TitleReadSerializer.Meta.fields + ('score',)
+
+
+class TrendingTitleSerializer(TitleReadSerializer):
+    trend = serializers.FloatField(read_only=True)
+
+    class Meta(TitleReadSerializer.Meta):
+        fields = TitleReadSerializer.Meta.fields + ('trend',)
+
+
+class LeaderboardQuerySerializer(serializers.Serializer):
+    """Параметры запроса таблиц лидеров: разрез и размер выдачи."""
+
+    category = serializers.SlugField(required=False)
+    genre = serializers.SlugField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1)
+
+    def validate_limit(self, value):
+        max_limit = get_leaderboard_setting('MAX_LIMIT')
+        if value > max_limit:
+            raise serializers.ValidationError(
+                f'Не больше {max_limit} произведений.'
+            )
+        return value
+
+
+class SlugManyRelatedField(serializers.ManyRelatedField):
+    """Список slug, объекты которого ищутся одним запросом."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return self.child_relation.to_internal_values(data)
+
+
+class BatchSlugRelatedField(serializers.SlugRelatedField):
+    """
+    Поле slug, которое находит объекты пачкой.
+
+    Список slug ищется одним запросом, а не запросом на каждый slug.
+    Если в контексте сериализатора под ключом `objects_key` лежит
+    словарь {slug: объект}, запросов нет совсем.
+    """
+
+    def __init__(self, objects_key=None, **kwargs):
+        self.objects_key = objects_key
+        super().__init__(**kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return SlugManyRelatedField(**list_kwargs)
+
+    def get_objects(self, slugs):
+        """Словарь {slug: объект} из контекста или из базы."""
+        objects = self.context.get(self.objects_key)
+        if objects is None:
+            objects = self.get_queryset().in_bulk(
+                set(slugs), field_name=self.slug_field
+            )
+        return objects
+
+    def to_internal_value(self, data):
+        return self.to_internal_values([data])[0]
+
+    def to_internal_values(self, data):
+        if not all(isinstance(slug, (str, int)) for slug in data):
+            self.fail('invalid')
+        slugs = [smart_str(slug) for slug in data]
+        objects = self.get_objects(slugs)
+        for slug in slugs:
+            if slug not in objects:
+                self.fail(
+                    'does_not_exist', slug_name=self.slug_field, value=slug
+                )
+        return [objects[slug] for slug in slugs]
 
 
 class TitleCreateSerializer(serializers.ModelSerializer):
-    category = serializers.SlugRelatedField(
+    category = BatchSlugRelatedField(
         slug_field='slug',
-        queryset=Category.objects.all()
+        queryset=Category.objects.all(),
+        objects_key='categories'
     )
-    genre = serializers.SlugRelatedField(
+    genre = BatchSlugRelatedField(
         many=True,
         slug_field='slug',
         allow_null=False,
         allow_empty=False,
-        queryset=Genre.objects.all()
+        queryset=Genre.objects.all(),
+        objects_key='genres'
     )
 
     class Meta:
@@ -92,10 +232,11 @@ class TitleCreateSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def to_representation(self, instance):
-        return TitleReadSerializer(instance).data
+        return TitleReadSerializer(instance, context=self.context).data
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsSerializerMixin,
+                     serializers.ModelSerializer):
 
     class Meta:
         model = User
@@ -193,5 +334,5 @@ class CreateTokenSerializer(serializers.Serializer):
         """Метод для валидации данных."""
 
         user = validated_data['user']
-        token = AccessToken.for_user(user)
+        token = get_access_token(user)
         return {'access': str(token)}
@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from api.authentication import set_token_version
+from api.cache import bump_model_version
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+
+User = get_user_model()
+
+VERSIONED_MODELS = (Category, Comment, Genre, GenreTitle, Review, Title, User)
+
+
+def bump_on_commit(*models):
+    """
+    Увеличивает версии моделей после фиксации транзакции.
+
+    Если увеличить версию раньше, параллельный запрос успеет закешировать
+    под новой версией ещё не зафиксированные (старые) данные.
+    """
+    def bump():
+        for model in models:
+            bump_model_version(model)
+    transaction.on_commit(bump)
+
+
+def model_changed(sender, **kwargs):
+    """Сбрасывает закешированные данные изменённой модели."""
+    bump_on_commit(sender)
+
+
+def genre_title_changed(sender, action, **kwargs):
+    """Сбрасывает закешированные данные при изменении жанров произведения."""
+    if action.startswith('post_'):
+        bump_on_commit(GenreTitle, Title)
+
+
+def user_saved(sender, instance, **kwargs):
+    """Обновляет версию токенов пользователя в кеше."""
+    set_token_version(
+        instance.pk, instance.token_version if instance.is_active else 0
+    )
+
+
+def user_deleted(sender, instance, **kwargs):
+    """Отзывает токены удалённого пользователя."""
+    set_token_version(instance.pk, 0)
+
+
+def connect_signals():
+    for model in VERSIONED_MODELS:
+        for signal in (post_save, post_delete):
+            signal.connect(
+                model_changed,
+                sender=model,
+                dispatch_uid=f'version_{model._meta.label_lower}'
+            )
+    m2m_changed.connect(
+        genre_title_changed,
+        sender=Title.genre.through,
+        dispatch_uid='version_genre_title'
+    )
+    post_save.connect(
+        user_saved, sender=User, dispatch_uid='token_version_saved'
+    )
+    post_delete.connect(
+        user_deleted, sender=User, dispatch_uid='token_version_deleted'
+    )
@@ -0,0 +1,117 @@
+import hashlib
+import time
+from collections.abc import Mapping
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Ограничение частоты запросов по алгоритму token bucket.
+
+    Частота `N/период` из `DEFAULT_THROTTLE_RATES` означает корзину
+    на N жетонов, которая пополняется со скоростью N за период: можно
+    сразу сделать N запросов, а дальше — не чаще, чем жетоны
+    восстанавливаются. Состояние корзины (жетоны и время) хранится в
+    кеше Django, общем для всех рабочих процессов при Redis/Memcached.
+
+    Чтение и запись корзины выполняются под блокировкой `cache.add`,
+    поэтому параллельные запросы с одним ключом не проходят мимо лимита.
+    Если блокировку не удалось получить за `lock_attempts` попыток,
+    запрос отклоняется.
+
+    Имя частоты строится из `throttle_scope` представления и `suffix`
+    класса, например `signup_ip`. Проверка выполняется в `initial()`
+    до вызова обработчика, то есть до обращений к базе данных.
+    По умолчанию корзина заводится на IP-адрес клиента.
+    """
+
+    cache_format = 'throttle_%(scope)s_%(ident)s'
+    suffix = None
+    lock_timeout = 1
+    lock_attempts = 5
+    lock_delay = 0.01
+
+    def __init__(self):
+        # Частота зависит от представления и берётся в allow_request.
+        pass
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_value(request)
+        if not ident:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return True
+        self.scope = f'{scope}_{self.suffix}'
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        refill = self.num_requests / self.duration
+        lock = f'{self.key}_lock'
+        for _ in range(self.lock_attempts):
+            if self.cache.add(lock, 1, self.lock_timeout):
+                break
+            time.sleep(self.lock_delay)
+        else:
+            self.wait_time = 1 / refill
+            return False
+        try:
+            self.now = self.timer()
+            tokens, updated_at = self.cache.get(
+                self.key, (self.num_requests, self.now)
+            )
+            tokens = min(
+                self.num_requests, tokens + (self.now - updated_at) * refill
+            )
+            if tokens < 1:
+                self.wait_time = (1 - tokens) / refill
+                return False
+            self.cache.set(self.key, (tokens - 1, self.now), self.duration)
+            return True
+        finally:
+            self.cache.delete(lock)
+
+    def wait(self):
+        return self.wait_time
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Корзина на IP-адрес клиента (с учётом NUM_PROXIES)."""
+
+    suffix = 'ip'
+
+
+class UsernameTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Корзина на имя пользователя из тела запроса.
+
+    Имя хешируется, чтобы ключ кеша был допустим для любого бэкенда.
+    Тело, не являющееся объектом (например, JSON-массив), не
+    ограничивается: его отклонит валидация сериализатора.
+    """
+
+    suffix = 'username'
+
+    def get_ident_value(self, request):
+        if not isinstance(request.data, Mapping):
+            return None
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username.strip():
+            return None
+        return hashlib.md5(username.strip().lower().encode()).hexdigest()
@@ -1,10 +1,11 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.authtoken import views
 from rest_framework.routers import DefaultRouter
 
-from api.views import (CategoryViewSet, CommentViewSet, CreateTokenView,
-                       GenreViewSet, ReviewViewSet, SignupView, TitleViewSet,
-                       UserViewSet)
+from api.views import (CacheStatsView, CategoryViewSet, CommentViewSet,
+                       CreateTokenView, GenreViewSet, ProfileDownloadView,
+                       ProfileListView, ReviewViewSet, SignupView,
+                       TitleViewSet, UserViewSet)
 
 router_v1 = DefaultRouter()
 router_v1.register('categories', CategoryViewSet, basename='categories')
@@ -31,6 +32,13 @@ urls_v1 = [
     path('', include(router_v1.urls)),
     path("auth/", include(auth_urls)),
     path("api-token-auth/", views.obtain_auth_token),
+    path("cache/stats/", CacheStatsView.as_view(), name="cache-stats"),
+    path("profiles/", ProfileListView.as_view(), name="profile-list"),
+    re_path(
+        r"^profiles/(?P<profile_id>[0-9a-f]{32})/$",
+        ProfileDownloadView.as_view(),
+        name="profile-download"
+    ),
 ]
 
 urlpatterns = [
@@ -1,12 +1,14 @@
-from django.conf import settings
-from django.core.mail import send_mail
+from users.outbox import enqueue_email
 
 
 def send_confirmation_email(email, confirmation_code):
-    """Функция для отправки электронного письма с кодом подтверждения."""
+    """
+    Функция для отправки электронного письма с кодом подтверждения.
+
+    Письмо ставится в очередь и отправляется командой `send_emails`,
+    поэтому медленный SMTP-сервер не задерживает регистрацию.
+    """
 
     subject = 'Ваш код подтверждения'
     message = f'Ваш код подтверждения: {confirmation_code}'
-    email_from = settings.EMAIL_FROM
-    recipient_list = [email]
-    send_mail(subject, message, email_from, recipient_list)
+    enqueue_email(subject, message, email)
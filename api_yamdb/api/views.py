@@ -1,70 +1,100 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Avg
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.generics import CreateAPIView
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-
-from api.filters import TitleFilter
-from api.mixins import BaseViewSet, CategoryGenreViewSet
+from rest_framework.serializers import as_serializer_error
+from rest_framework.views import APIView
+
+from api.cache import get_cache_stats
+from api.filters import TitleFilter, TitleSearchFilter
+from api.metrics import render_metrics
+from api.mixins import (BaseViewSet, CategoryGenreViewSet,
+                        ConditionalGetMixin, SparseFieldsMixin)
+from api.pagination import (CachedCountCommentPagination,
+                            CachedCountReviewPagination,
+                            CachedCountTitlePagination,
+                            CachedCountUserPagination)
 from api.permissions import IsAdmin, IsAdminOrReadOnly
+from api.profiling import get_profile_path, list_profiles
 from api.serializers import (CategorySerializer, CommentSerializer,
                              CreateTokenSerializer, GenreSerializer,
-                             ReviewSerializer, SignupSerializer,
-                             TitleCreateSerializer, TitleReadSerializer,
-                             UserSerializer)
-from reviews.models import Category, Genre, Review, Title
+                             LeaderboardQuerySerializer, ReviewSerializer,
+                             SignupSerializer, TitleCreateSerializer,
+                             TitleReadSerializer, TopTitleSerializer,
+                             TrendingTitleSerializer, UserSerializer)
+from api.throttling import IPTokenBucketThrottle, UsernameTokenBucketThrottle
+from reviews import leaderboards
+from reviews.bulk import bulk_create_titles
+from reviews.models import Category, Comment, Genre, Review, Title
 
 User = get_user_model()
 
 
 class ReviewViewSet(BaseViewSet):
     serializer_class = ReviewSerializer
+    pagination_class = CachedCountReviewPagination
 
     def get_title(self):
-        """Получение произведения."""
-        return get_object_or_404(
-            Title,
-            pk=self.kwargs['title_id']
-        )
+        """Получение произведения, один раз за запрос."""
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title,
+                pk=self.kwargs['title_id']
+            )
+        return self._title
 
     def get_queryset(self):
-        """Получение отзывов на произведение."""
-        title = self.get_title()
-        return title.reviews.all()
+        """
+        Получение отзывов на произведение.
+
+        Отзывы фильтруются по title_id без загрузки произведения; для
+        списка произведение проверяется, чтобы вернуть 404.
+        """
+        if self.action == 'list':
+            self.get_title()
+        return Review.objects.filter(
+            title_id=self.kwargs['title_id']
+        ).select_related('author')
 
     def perform_create(self, serializer):
         """Создание отзыва."""
-        title = self.get_title()
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.get_author(), title=self.get_title())
 
 
 class CommentViewSet(BaseViewSet):
     serializer_class = CommentSerializer
+    pagination_class = CachedCountCommentPagination
 
     def get_review(self):
-        """Получение отзыва."""
-        return get_object_or_404(
-            Review,
-            pk=self.kwargs['review_id'],
-            title=self.kwargs['title_id']
-        )
+        """Получение отзыва, один раз за запрос."""
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.only('id', 'title_id'),
+                pk=self.kwargs['review_id'],
+                title=self.kwargs['title_id']
+            )
+        return self._review
 
     def get_queryset(self):
         """Получение комментариев по отзыву."""
-        review = self.get_review()
-        return review.comments.all()
+        if self.action == 'list':
+            self.get_review()
+        return Comment.objects.filter(
+            review_id=self.kwargs['review_id'],
+            review__title_id=self.kwargs['title_id']
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        """Создание отзыва."""
-        review = self.get_review()
-        serializer.save(author=self.request.user, review=review)
+        """Создание комментария."""
+        serializer.save(author=self.get_author(), review=self.get_review())
 
 
 class CategoryViewSet(CategoryGenreViewSet):
@@ -77,26 +107,168 @@ class GenreViewSet(CategoryGenreViewSet):
     serializer_class = GenreSerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('name')
+class TitleViewSet(SparseFieldsMixin, ConditionalGetMixin,
+                   viewsets.ModelViewSet):
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre').order_by('name')
     permission_classes = (IsAdminOrReadOnly,)
-    pagination_class = LimitOffsetPagination
-    filter_backends = (DjangoFilterBackend,)
+    pagination_class = CachedCountTitlePagination
+    filter_backends = (DjangoFilterBackend, TitleSearchFilter)
     filterset_class = TitleFilter
     http_method_names = ('get', 'post', 'delete', 'patch')
+    etag_models = (
+        'reviews.category', 'reviews.genre', 'reviews.genretitle',
+        'reviews.review'
+    )
+    bulk_max_titles = 5000
+    sparse_actions = ('list', 'retrieve', 'top', 'trending')
+    sparse_field_columns = {
+        'rating': Title.RATING_FIELDS,
+        'category': ('category__name', 'category__slug'),
+        # Оценка и популярность берутся из таблиц лидеров.
+        'score': (),
+        'trend': (),
+    }
+    # Версия и дата изменения нужны для ETag.
+    sparse_required_columns = ('version', 'updated_at')
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleReadSerializer
+        if self.action == 'top':
+            return TopTitleSerializer
+        if self.action == 'trending':
+            return TrendingTitleSerializer
         return TitleCreateSerializer
 
+    def get_leaders(self, order):
+        """
+        Произведения разреза из таблицы лидеров в порядке мест.
+
+        Число запросов не зависит от размера каталога: поиск категории
+        и жанра по slug, первые строки индекса таблицы лидеров,
+        произведения по первичным ключам и их жанры.
+        """
+        query = LeaderboardQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        scope = {}
+        for name, model in (('category', Category), ('genre', Genre)):
+            slug = query.validated_data.get(name)
+            if slug is None:
+                continue
+            scope[name] = model.objects.filter(slug=slug).values_list(
+                'pk', flat=True
+            ).first()
+            if scope[name] is None:
+                return []
+        leaders = leaderboards.get_leaders(
+            order, limit=query.validated_data.get('limit'), **scope
+        )
+        titles = self.get_sparse_queryset(self.get_queryset()).in_bulk(
+            [title_id for title_id, _ in leaders]
+        )
+        return [
+            (titles[title_id], value) for title_id, value in leaders
+            if title_id in titles
+        ]
+
+    @action(detail=False)
+    def top(self, request):
+        """Лучшие произведения по байесовской оценке."""
+        titles = []
+        for title, score in self.get_leaders('top_score'):
+            title.score = round(score, 2)
+            titles.append(title)
+        return Response(self.get_serializer(titles, many=True).data)
+
+    @action(detail=False)
+    def trending(self, request):
+        """Популярные сейчас произведения по затухающему числу отзывов."""
+        titles = []
+        for title, trending_key in self.get_leaders('trending_key'):
+            title.trend = round(leaderboards.get_trend(trending_key), 3)
+            titles.append(title)
+        return Response(self.get_serializer(titles, many=True).data)
+
+    def get_bulk_objects(self, items):
+        """Категории и жанры всех произведений пачки, по запросу на модель."""
+        slugs = {'category': set(), 'genre': set()}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            slugs['category'].add(item.get('category'))
+            genres = item.get('genre')
+            if isinstance(genres, list):
+                slugs['genre'].update(genres)
+        return {
+            key: model.objects.in_bulk(
+                [slug for slug in slugs[name] if isinstance(slug, str)],
+                field_name='slug'
+            )
+            for key, name, model in (
+                ('categories', 'category', Category),
+                ('genres', 'genre', Genre),
+            )
+        }
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Пакетное создание произведений.
 
-class UserViewSet(viewsets.ModelViewSet):
+        Принимает список произведений в формате POST /titles/. Ошибки
+        возвращаются по индексу в списке и не мешают создать остальные.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError(
+                {'non_field_errors': ['Ожидается непустой список.']}
+            )
+        if len(items) > self.bulk_max_titles:
+            raise ValidationError({'non_field_errors': [
+                f'Не больше {self.bulk_max_titles} произведений за запрос.'
+            ]})
+        context = {
+            **self.get_serializer_context(), **self.get_bulk_objects(items)
+        }
+        # Как в ListSerializer: поля сериализатора создаются один раз.
+        serializer = TitleCreateSerializer(context=context)
+        titles, genre_ids, indexes, errors = [], [], [], []
+        for index, item in enumerate(items):
+            try:
+                validated_data = serializer.run_validation(item)
+            except ValidationError as error:
+                errors.append(
+                    {'index': index, 'errors': as_serializer_error(error)}
+                )
+                continue
+            genres = validated_data.pop('genre')
+            titles.append(Title(**validated_data))
+            genre_ids.append(list(dict.fromkeys(genre.pk for genre in genres)))
+            indexes.append(index)
+        bulk_create_titles(titles, genre_ids)
+        return Response(
+            {
+                'created': [
+                    {'index': index, 'id': title.pk}
+                    for index, title in zip(indexes, titles)
+                ],
+                'errors': errors,
+            },
+            status=(
+                status.HTTP_201_CREATED if titles
+                else status.HTTP_400_BAD_REQUEST
+            )
+        )
+
+
+class UserViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     http_method_names = ('get', 'post', 'patch', 'delete', 'head', 'options')
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticated, IsAdmin,)
+    pagination_class = CachedCountUserPagination
     lookup_field = 'username'
     filter_backends = (SearchFilter,)
     search_fields = ('username',)
@@ -110,15 +282,18 @@ class UserViewSet(viewsets.ModelViewSet):
         GET запрос возвращает данные текущего пользователя.
         PATCH запрос обновляет данные текущего пользователя.
         """
+        user = request.user
+        if not isinstance(user, User):
+            user = get_object_or_404(User, pk=user.pk)
         if request.method == 'GET':
-            serializer = self.get_serializer(request.user)
+            serializer = self.get_serializer(user)
             return Response(serializer.data)
 
-        serializer = self.get_serializer(request.user,
+        serializer = self.get_serializer(user,
                                          data=request.data,
                                          partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save(role=request.user.role)
+        serializer.save(role=user.role)
         return Response(serializer.data)
 
 
@@ -128,6 +303,8 @@ class SignupView(CreateAPIView):
     serializer_class = SignupSerializer
     permission_classes = [AllowAny]
     renderer_classes = [JSONRenderer]
+    throttle_classes = [IPTokenBucketThrottle, UsernameTokenBucketThrottle]
+    throttle_scope = 'signup'
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -142,9 +319,54 @@ class CreateTokenView(CreateAPIView):
     serializer_class = CreateTokenSerializer
     permission_classes = [AllowAny]
     renderer_classes = [JSONRenderer]
+    throttle_classes = [IPTokenBucketThrottle, UsernameTokenBucketThrottle]
+    throttle_scope = 'token'
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         token = serializer.save()
         return Response({"token": token["access"]}, status=status.HTTP_200_OK)
+
+
+class CacheStatsView(APIView):
+    """Счётчики попаданий и промахов кешей для мониторинга."""
+
+    permission_classes = (IsAuthenticated, IsAdmin,)
+
+    def get(self, request):
+        return Response(get_cache_stats())
+
+
+class ProfileListView(APIView):
+    """Список профилей, снятых по заголовку `X-Profile`."""
+
+    permission_classes = (IsAuthenticated, IsAdmin,)
+
+    def get(self, request):
+        return Response(list_profiles())
+
+
+class ProfileDownloadView(APIView):
+    """Скачивание сохранённого профиля запроса."""
+
+    permission_classes = (IsAuthenticated, IsAdmin,)
+
+    def get(self, request, profile_id):
+        path = get_profile_path(profile_id)
+        if path is None:
+            raise Http404
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=path.name,
+            content_type='application/octet-stream'
+        )
+
+
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus для сборщика."""
+    return HttpResponse(
+        render_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -29,11 +29,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.AsyncRoutingMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
+    'api.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -59,16 +64,58 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+# Под ASGI запросы идут в URLconf с асинхронными обработчиками; запросы
+# чтения горячих маршрутов выполняются в пуле из ASYNC_READ_THREADS потоков.
+ASYNC_READ_VIEWS = True
+ASYNC_ROOT_URLCONF = 'api_yamdb.urls_async'
+ASYNC_READ_THREADS = 16
+
 
 # Database
 
+# SQLite с WAL, mmap и ожиданием блокировок (см. api_yamdb/sqlite/base.py).
+# Соединения живут CONN_MAX_AGE секунд и переиспользуются между запросами.
+# OPTIONS: `pragmas` дополняют и переопределяют PRAGMA по умолчанию,
+# `transaction_mode` — режим BEGIN для atomic(), `lock_retries`,
+# `lock_backoff` и `lock_max_backoff` (секунды) — повторы запросов вне
+# транзакции при «database is locked».
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'api_yamdb.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'pragmas': {
+                'busy_timeout': 5000,
+                'journal_mode': 'wal',
+                'synchronous': 'normal',
+                'mmap_size': 256 * 1024 * 1024,
+                'cache_size': -64 * 1024,
+            },
+            'transaction_mode': 'IMMEDIATE',
+            'lock_retries': 5,
+            'lock_backoff': 0.01,
+            'lock_max_backoff': 0.5,
+        },
     }
 }
 
+# Чтение с реплик: безопасные запросы читают с реплик из REPLICAS, запись
+# идёт в PRIMARY. После записи клиент STICKY_SECONDS секунд читает из
+# основной базы. Реплики, отстающие больше MAX_LAG секунд, не используются
+# (None — не проверять отставание); отставание перечитывается раз
+# в LAG_CHECK_INTERVAL секунд. Реплику SQLite добавляют в DATABASES:
+#     'replica': {**DATABASES['default'], 'NAME': BASE_DIR / 'replica.sqlite3'}
+# и синхронизируют командой `python manage.py sync_replicas --loop`.
+DATABASE_ROUTERS = ['api.db_router.PrimaryReplicaRouter']
+DATABASE_ROUTING = {
+    'PRIMARY': 'default',
+    'REPLICAS': [],
+    'STICKY_SECONDS': 5,
+    'MAX_LAG': 30,
+    'LAG_CHECK_INTERVAL': 1.0,
+}
+
 
 # Password validation
 
@@ -111,7 +158,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
 
@@ -122,6 +169,14 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
+    # Корзины token bucket для /auth/signup/ и /auth/token/:
+    # `N/период` — ёмкость N запросов и пополнение N за период.
+    'DEFAULT_THROTTLE_RATES': {
+        'signup_ip': '20/hour',
+        'signup_username': '5/hour',
+        'token_ip': '30/hour',
+        'token_username': '10/hour',
+    },
 }
 
 
@@ -129,8 +184,102 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1)
 }
 
+# Кеш списков, счётчиков, версий моделей, лимитов запросов и закрепления
+# клиентов за основной базой. Версию модели увеличивает сигнал в процессе,
+# который записал данные, поэтому при нескольких рабочих процессах кеш
+# должен быть общим (Redis, Memcached), например:
+#     'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+#     'LOCATION': '127.0.0.1:11211',
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+# Число рабочих процессов сервера (`--workers` uvicorn или gunicorn).
+# Больше одного — только с общим кешем, иначе `manage.py check` сообщает
+# об ошибке api.E001.
+SERVER_WORKERS = 1
+# С локальным кешем процесса записи других процессов (второго сервера,
+# команд manage.py) не меняют его версии моделей, поэтому закешированные
+# списки, счётчики и выборки ETag живут не дольше этого числа секунд.
+LOCAL_CACHE_TIMEOUT = 5
+
+# Сколько секунд версия токенов пользователя хранится в кеше. С общим
+# кешем (Redis, Memcached) отзыв токенов при смене роли мгновенный;
+# с локальным кешем процесса — не позже чем через это время.
+TOKEN_VERSION_CACHE_TIMEOUT = 60
+
 AUTH_USER_MODEL = 'users.User'
 
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 EMAIL_FROM = 'yamdb@example.com'
+
+# Очередь писем: размер пачки на одно SMTP-соединение, число попыток
+# и экспоненциальная задержка между ними (начальная и предельная, секунды).
+# CLAIM_TIMEOUT — на сколько секунд пачка закрепляется за одним процессом
+# `send_emails`; если он упал, письма вернутся в очередь по истечении срока.
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF': 30,
+    'MAX_BACKOFF': 60 * 60,
+    'CLAIM_TIMEOUT': 10 * 60,
+}
+
+
+# Инструментирование SQL: доля запросов, для которых считаются SQL-запросы
+# (заголовок Server-Timing и лог `api.sql`), и порог числа повторов
+# одного запроса, после которого он считается дублем. Логгер `api.sql`
+# пишет запросы с дублями (WARNING); уровень INFO включает все запросы.
+SQL_INSTRUMENTATION = {
+    'SAMPLE_RATE': 1.0,
+    'DUPLICATE_THRESHOLD': 2,
+}
+
+# Профилирование запросов по заголовку `X-Profile`: каталог профилей,
+# сколько последних профилей хранить и период сэмплера стеков в секундах.
+PROFILING = {
+    'DIR': BASE_DIR / 'profiles',
+    'MAX_PROFILES': 50,
+    'SAMPLE_INTERVAL': 0.001,
+}
+
+# Метрики Prometheus: каталог файлов счётчиков рабочих процессов
+# (его следует очищать при перезапуске сервиса), период записи файлов
+# в секундах и корзины гистограмм времени ответа.
+METRICS = {
+    'DIR': BASE_DIR / 'metrics',
+    'FLUSH_INTERVAL': 1.0,
+}
+
+# Таблицы лидеров /titles/top/ и /titles/trending/: априорная средняя
+# оценка и её вес в отзывах для байесовской оценки, период полураспада
+# вклада отзыва в популярность (секунды), минимальный вес отзывов
+# популярного произведения и размер выдачи (?limit=). После изменения
+# PRIOR_* или TRENDING_HALF_LIFE таблицы пересчитывают командой
+# `python manage.py rebuild_leaderboards`.
+LEADERBOARDS = {
+    'PRIOR_MEAN': 5.5,
+    'PRIOR_WEIGHT': 10,
+    'TRENDING_HALF_LIFE': 3 * 24 * 60 * 60,
+    'TRENDING_MIN_WEIGHT': 0.01,
+    'DEFAULT_LIMIT': 10,
+    'MAX_LIMIT': 100,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.sql': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
@@ -0,0 +1,113 @@
+import itertools
+import random
+import time
+
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    # Сначала время ожидания блокировки: переключение в WAL тоже
+    # может ждать, пока другие соединения освободят файл.
+    'busy_timeout': 5000,
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    'cache_size': -64 * 1024,
+}
+
+DEFAULT_OPTIONS = {
+    'pragmas': {},
+    'transaction_mode': 'IMMEDIATE',
+    'lock_retries': 5,
+    'lock_backoff': 0.01,
+    'lock_max_backoff': 0.5,
+}
+
+LOCK_ERRORS = ('database is locked', 'database table is locked')
+
+
+def is_lock_error(error):
+    """Ошибка SQLITE_BUSY или SQLITE_LOCKED."""
+    return any(message in str(error) for message in LOCK_ERRORS)
+
+
+class SQLiteCursorWrapper(base.SQLiteCursorWrapper):
+    """
+    Курсор, повторяющий запрос при блокировке базы данных.
+
+    Повторяются только запросы вне транзакции (в том числе сам BEGIN):
+    их неудача ничего не изменила. Внутри транзакции ошибка
+    пробрасывается, и `atomic()` откатывает транзакцию целиком.
+    """
+
+    lock_retries = 0
+    lock_backoff = 0
+    lock_max_backoff = 0
+
+    def execute(self, query, params=None):
+        return self._retry(super().execute, query, params)
+
+    def executemany(self, query, param_list):
+        return self._retry(super().executemany, query, param_list)
+
+    def _retry(self, method, *args):
+        for attempt in itertools.count():
+            try:
+                return method(*args)
+            except base.Database.OperationalError as error:
+                if (
+                    attempt >= self.lock_retries
+                    or self.connection.in_transaction
+                    or not is_lock_error(error)
+                ):
+                    raise
+            delay = min(
+                self.lock_backoff * 2 ** attempt, self.lock_max_backoff
+            )
+            time.sleep(delay * random.uniform(0.5, 1))
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite с настройками для конкурентной нагрузки.
+
+    При подключении выполняются PRAGMA из `DEFAULT_PRAGMAS` (их можно
+    переопределить в `OPTIONS['pragmas']`): WAL позволяет читать во
+    время записи, `busy_timeout` ждёт блокировку вместо мгновенной
+    ошибки «database is locked».
+
+    Транзакции `atomic()` начинаются с `BEGIN IMMEDIATE`
+    (`OPTIONS['transaction_mode']`): блокировка записи берётся сразу,
+    и её ожидание покрывает `busy_timeout`. С обычным `BEGIN` транзакция,
+    которая сначала читает, а потом пишет (например, каскадное удаление),
+    получает SQLITE_BUSY без ожидания, если запись уже начал другой
+    процесс. Запросы вне транзакции при блокировке повторяются
+    `lock_retries` раз с экспоненциальной задержкой от `lock_backoff`
+    до `lock_max_backoff` секунд.
+    """
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        options = {
+            name: kwargs.pop(name, default)
+            for name, default in DEFAULT_OPTIONS.items()
+        }
+        self.pragmas = {**DEFAULT_PRAGMAS, **options.pop('pragmas')}
+        self.transaction_mode = options.pop('transaction_mode')
+        self.lock_retry = options
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=SQLiteCursorWrapper)
+        for option, value in self.lock_retry.items():
+            setattr(cursor, option, value)
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}'.strip())
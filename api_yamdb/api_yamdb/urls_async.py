@@ -0,0 +1,10 @@
+"""
+URLconf для ASGI: те же маршруты с асинхронными обработчиками.
+
+Подключается `api.middleware.AsyncRoutingMiddleware` для запросов,
+которые обрабатываются асинхронной цепочкой middleware.
+"""
+from api.async_views import make_async_patterns
+from api_yamdb.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = make_async_patterns(sync_urlpatterns)
@@ -0,0 +1,117 @@
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import Max
+
+from api.cache import bump_model_version
+from reviews import fts, leaderboards, stats
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title)
+from reviews.utils import rebuild_title_ratings
+
+BULK_MODELS = (Category, Genre, Title, GenreTitle, Review, Comment)
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """
+    Сохраняет переданные значения полей с auto_now_add при вставке.
+
+    Нужен при загрузке данных, где дата публикации уже известна.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def bulk_insert(model, objects, batch_size):
+    """Вставляет объекты пачками, пропуская уже существующие."""
+    with keep_auto_now_add(model):
+        model.objects.bulk_create(
+            objects, batch_size=batch_size, ignore_conflicts=True
+        )
+
+
+def bulk_insert_rows(model, fields, rows, batch_size):
+    """
+    Вставляет готовые кортежи значений в таблицу модели, минуя ORM.
+
+    Значения должны быть уже приведены к виду для базы данных: так
+    большие таблицы заполняются на порядок быстрее, чем через
+    bulk_create, который готовит каждое значение каждого поля.
+    Существующие строки пропускаются.
+    """
+    ops = connection.ops
+    columns = ', '.join(
+        ops.quote_name(model._meta.get_field(name).column) for name in fields
+    )
+    placeholders = ', '.join(['%s'] * len(fields))
+    sql = (
+        f'{ops.insert_statement(ignore_conflicts=True)} '
+        f'{ops.quote_name(model._meta.db_table)} ({columns}) '
+        f'VALUES ({placeholders}) {ops.ignore_conflicts_suffix_sql(True)}'
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[start:start + batch_size])
+
+
+def bulk_create_titles(titles, genre_ids, batch_size=500):
+    """
+    Создаёт произведения и их жанры пачками в одной транзакции.
+
+    `genre_ids` — списки жанров произведений в том же порядке. bulk_create
+    не отправляет сигналы, поэтому поисковый индекс, таблицы лидеров,
+    статистика разделов и версии кеша обновляются здесь, пачками.
+    """
+    if not titles:
+        return titles
+    with transaction.atomic():
+        last_id = Title.objects.aggregate(last=Max('pk'))['last'] or 0
+        Title.objects.bulk_create(titles, batch_size=batch_size)
+        if titles and titles[0].pk is None:
+            # SQLite не возвращает id из bulk_create. Транзакция держит
+            # блокировку записи, поэтому все строки с id больше прежнего
+            # максимума — новые, в порядке вставки.
+            for title, pk in zip(titles, Title.objects.filter(
+                pk__gt=last_id
+            ).order_by('pk').values_list('pk', flat=True)):
+                title.pk = pk
+        GenreTitle.objects.bulk_create(
+            [
+                GenreTitle(title_id=title.pk, genre_id=genre_id)
+                for title, genres in zip(titles, genre_ids)
+                for genre_id in genres
+            ],
+            batch_size=batch_size
+        )
+        fts.index_titles(titles)
+        leaderboards.add_titles(titles, genre_ids)
+        stats.add_titles(titles, genre_ids)
+    for model in (Title, GenreTitle):
+        bump_model_version(model)
+    return titles
+
+
+def finish_bulk_load(user_model=None):
+    """
+    Восстанавливает данные, которые при bulk_create не обновили сигналы.
+
+    Пересчитывает рейтинги, поисковый индекс, таблицы лидеров и
+    статистику категорий и жанров, сбрасывает кеши моделей.
+    """
+    with transaction.atomic():
+        rebuild_title_ratings(Title, Review)
+        fts.rebuild_index()
+        leaderboards.rebuild_leaderboards()
+        stats.rebuild_catalog_stats()
+    for model in BULK_MODELS + ((user_model,) if user_model else ()):
+        bump_model_version(model)
@@ -0,0 +1,106 @@
+import re
+
+from django.db import connection
+
+FTS_TABLE = 'reviews_title_fts'
+FTS_TOKEN = re.compile(r'\w+')
+
+CREATE_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "name, description, tokenize='unicode61 remove_diacritics 2')"
+)
+DROP_SQL = f'DROP TABLE IF EXISTS {FTS_TABLE}'
+RANK_SQL = f'bm25({FTS_TABLE}, 10.0, 1.0)'
+
+
+def is_enabled(using=connection):
+    """Полнотекстовый индекс поддерживается только для SQLite."""
+    return using.vendor == 'sqlite'
+
+
+def create_index(using=connection):
+    if is_enabled(using):
+        with using.cursor() as cursor:
+            cursor.execute(CREATE_SQL)
+
+
+def drop_index(using=connection):
+    if is_enabled(using):
+        with using.cursor() as cursor:
+            cursor.execute(DROP_SQL)
+
+
+def index_title(title):
+    """Добавляет или обновляет произведение в поисковом индексе."""
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [title.pk, title.name, title.description]
+        )
+
+
+def index_titles(titles):
+    """Добавляет в поисковый индекс новые произведения одним запросом."""
+    if not is_enabled() or not titles:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [(title.pk, title.name, title.description) for title in titles]
+        )
+
+
+def unindex_title(title_id):
+    """Удаляет произведение из поискового индекса."""
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title_id])
+
+
+def rebuild_index(using=connection):
+    """Заполняет поисковый индекс заново по таблице произведений."""
+    if not is_enabled(using):
+        return 0
+    with using.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'SELECT id, name, description FROM reviews_title'
+        )
+        return cursor.rowcount
+
+
+def build_match_query(text):
+    """
+    Превращает пользовательскую строку в безопасный запрос FTS5.
+
+    Каждое слово ищется по префиксу, все слова должны встретиться.
+    Кавычки и операторы FTS5 из ввода отбрасываются.
+    """
+    return ' '.join(f'"{token}"*' for token in FTS_TOKEN.findall(text))
+
+
+def search_titles(queryset, text):
+    """Фильтрует произведения по поисковой строке с ранжированием."""
+    query = build_match_query(text)
+    if not query:
+        return queryset.none()
+    if not is_enabled():
+        return queryset.filter(name__icontains=text)
+    # Индекс присоединяется к таблице произведений, а не вызывается
+    # коррелированным подзапросом: иначе MATCH выполнялся бы заново
+    # для каждой найденной строки.
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE}.rowid = reviews_title.id',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[query],
+        select={'search_rank': RANK_SQL},
+    ).order_by('search_rank', 'name')
@@ -0,0 +1,344 @@
+"""
+Таблицы лидеров: лучшие и популярные сейчас произведения.
+
+Лучшие упорядочены по байесовской оценке
+    (PRIOR_WEIGHT * PRIOR_MEAN + сумма оценок) / (PRIOR_WEIGHT + отзывов):
+у произведения с парой отзывов оценка близка к PRIOR_MEAN, и оно не
+обгоняет произведения с сотнями высоких оценок.
+
+Популярность — число отзывов с экспоненциальным затуханием: вклад отзыва
+уменьшается вдвое каждые TRENDING_HALF_LIFE секунд. Чтобы не пересчитывать
+все строки с течением времени, хранится ключ log Σ exp(t_i / τ), где t_i —
+время отзыва, τ = TRENDING_HALF_LIFE / ln 2. Порядок ключей не меняется
+со временем, а текущая популярность равна exp(ключ - now / τ).
+"""
+import math
+import time
+from itertools import chain, groupby
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import connection
+from django.db.models import (Case, ExpressionWrapper, F, FloatField, Value,
+                              When)
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+
+from reviews.models import GenreTitle, LeaderboardEntry, Review
+
+DEFAULT_LEADERBOARDS = {
+    'PRIOR_MEAN': 5.5,
+    'PRIOR_WEIGHT': 10,
+    'TRENDING_HALF_LIFE': 3 * 24 * 60 * 60,
+    'TRENDING_MIN_WEIGHT': 0.01,
+    'DEFAULT_LIMIT': 10,
+    'MAX_LIMIT': 100,
+}
+# Доля ключа, которая остаётся после удаления отзыва; если она меньше,
+# разность теряет половину значащих цифр и ключ считается заново.
+MIN_REMAINDER = 1e-6
+
+
+def get_leaderboard_setting(name):
+    """Возвращает параметр из `settings.LEADERBOARDS`."""
+    options = getattr(settings, 'LEADERBOARDS', {})
+    return options.get(name, DEFAULT_LEADERBOARDS[name])
+
+
+def get_decay_time(moment=None):
+    """Время `moment` (по умолчанию текущее) в единицах τ."""
+    timestamp = time.time() if moment is None else moment.timestamp()
+    return timestamp * math.log(2) / get_leaderboard_setting(
+        'TRENDING_HALF_LIFE'
+    )
+
+
+def get_prior():
+    """Сумма оценок и число отзывов априорного распределения."""
+    weight = get_leaderboard_setting('PRIOR_WEIGHT')
+    return float(weight * get_leaderboard_setting('PRIOR_MEAN')), weight
+
+
+def bayesian_score(score_sum, review_count):
+    """Взвешенная оценка или None для произведения без отзывов."""
+    if not review_count:
+        return None
+    prior_sum, prior_count = get_prior()
+    return (prior_sum + score_sum) / (prior_count + review_count)
+
+
+def log_sum_exp(values):
+    """Ключ популярности по временам отзывов в единицах τ."""
+    values = list(values)
+    if not values:
+        return None
+    top = max(values)
+    return top + math.log(sum(math.exp(value - top) for value in values))
+
+
+def top_score_expression(score_delta, count_delta):
+    """Взвешенная оценка после сдвига агрегатов строки в UPDATE."""
+    prior_sum, prior_count = get_prior()
+    return Case(
+        When(review_count__lte=-count_delta, then=Value(None)),
+        default=ExpressionWrapper(
+            (F('score_sum') + score_delta + prior_sum)
+            / (F('review_count') + count_delta + prior_count),
+            output_field=FloatField()
+        ),
+        output_field=FloatField()
+    )
+
+
+def add_review_expression(moment):
+    """Ключ популярности после добавления отзыва: log(e^key + e^x)."""
+    point = Value(get_decay_time(moment))
+    key = F('trending_key')
+    return Case(
+        When(trending_key__isnull=True, then=point),
+        default=Greatest(key, point) + Ln(
+            Value(1.0) + Exp(-Abs(key - point))
+        ),
+        output_field=FloatField()
+    )
+
+
+def get_review_times(title_id):
+    """Времена отзывов произведения в единицах τ."""
+    return [
+        get_decay_time(pub_date)
+        for pub_date in Review.objects.filter(
+            title_id=title_id
+        ).values_list('pub_date', flat=True)
+    ]
+
+
+def get_base_entry(title_id):
+    """Агрегаты произведения из его строки без фильтра."""
+    return LeaderboardEntry.objects.filter(
+        title_id=title_id, category=None, genre=None
+    ).values('score_sum', 'review_count', 'top_score', 'trending_key').first()
+
+
+def get_key_without(title_id, moment):
+    """
+    Ключ популярности после удаления отзыва: log(e^key - e^x).
+
+    Если удалённый отзыв давал почти весь ключ, разность теряет точность,
+    и ключ считается заново по оставшимся отзывам. Удаление идёт в
+    транзакции, которая в SQLite начинается с блокировки записи, поэтому
+    ключ не меняется между чтением и записью.
+    """
+    entry = get_base_entry(title_id)
+    point = get_decay_time(moment)
+    if entry is not None and entry['trending_key'] is not None:
+        remainder = -math.expm1(point - entry['trending_key'])
+        if remainder > MIN_REMAINDER:
+            return entry['trending_key'] + math.log(remainder)
+    return log_sum_exp(get_review_times(title_id))
+
+
+def update_title(title_id, score_delta, count_delta=0, added=None,
+                 removed=None):
+    """
+    Сдвигает строки произведения во всех разрезах одним UPDATE.
+
+    `added` и `removed` — дата публикации добавленного или удалённого
+    отзыва (удалённого уже нет в базе); изменение оценки не меняет
+    популярность.
+    """
+    changes = {
+        'score_sum': F('score_sum') + score_delta,
+        'review_count': F('review_count') + count_delta,
+        'top_score': top_score_expression(score_delta, count_delta),
+    }
+    if added is not None:
+        changes['trending_key'] = add_review_expression(added)
+    elif removed is not None:
+        changes['trending_key'] = Value(
+            get_key_without(title_id, removed), output_field=FloatField()
+        )
+    LeaderboardEntry.objects.filter(title_id=title_id).update(**changes)
+
+
+def get_scopes(category_id, genre_ids):
+    """Разрезы (категория, жанр), в которых участвует произведение."""
+    categories = (None,) if category_id is None else (None, category_id)
+    return [
+        (category, genre)
+        for category in categories
+        for genre in (None, *genre_ids)
+    ]
+
+
+def make_entries(entry_model, title, genre_ids, trending_key):
+    """Строки произведения во всех его разрезах."""
+    top_score = bayesian_score(title['score_sum'], title['review_count'])
+    return [
+        entry_model(
+            title_id=title['id'],
+            category_id=category_id,
+            genre_id=genre_id,
+            score_sum=title['score_sum'],
+            review_count=title['review_count'],
+            top_score=top_score,
+            trending_key=trending_key
+        )
+        for category_id, genre_id in get_scopes(
+            title['category_id'], genre_ids
+        )
+    ]
+
+
+def add_scopes(title_id, scopes):
+    """
+    Добавляет строки разрезов с агрегатами из строки без фильтра.
+
+    Агрегаты копируются одним INSERT ... SELECT, без чтения в Python и
+    без отдельной транзакции, которую открыл бы bulk_create.
+    """
+    if not scopes:
+        return
+    table = connection.ops.quote_name(LeaderboardEntry._meta.db_table)
+    values = ' UNION ALL '.join(
+        ['SELECT %s AS category_id, %s AS genre_id'] * len(scopes)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (title_id, category_id, genre_id, '
+            'score_sum, review_count, top_score, trending_key) '
+            'SELECT base.title_id, scope.category_id, scope.genre_id, '
+            'base.score_sum, base.review_count, base.top_score, '
+            f'base.trending_key FROM {table} AS base, ({values}) AS scope '
+            'WHERE base.title_id = %s AND base.category_id IS NULL '
+            'AND base.genre_id IS NULL',
+            [*chain.from_iterable(scopes), title_id]
+        )
+
+
+def add_title(title):
+    """Добавляет новое произведение без отзывов в таблицы лидеров."""
+    LeaderboardEntry.objects.create(title_id=title.pk)
+    if title.category_id is not None:
+        add_scopes(title.pk, [(title.category_id, None)])
+
+
+def add_titles(titles, genre_ids, batch_size=1000):
+    """
+    Добавляет новые произведения без отзывов во все их разрезы.
+
+    `genre_ids` — списки жанров произведений в том же порядке.
+    """
+    LeaderboardEntry.objects.bulk_create(
+        chain.from_iterable(
+            make_entries(LeaderboardEntry, {
+                'id': title.pk, 'category_id': title.category_id,
+                'score_sum': 0, 'review_count': 0,
+            }, genres, None)
+            for title, genres in zip(titles, genre_ids)
+        ),
+        batch_size=batch_size
+    )
+
+
+def move_title(title_id, old_category_id, category_id):
+    """Переносит произведение в разрезы новой категории."""
+    if old_category_id is not None:
+        LeaderboardEntry.objects.filter(
+            title_id=title_id, category_id=old_category_id
+        ).delete()
+    if category_id is not None:
+        genre_ids = GenreTitle.objects.filter(
+            title_id=title_id, genre__isnull=False
+        ).values_list('genre_id', flat=True)
+        add_scopes(title_id, [
+            (category_id, genre_id) for genre_id in (None, *genre_ids)
+        ])
+
+
+def add_genres(title_id, category_id, genre_ids):
+    """Добавляет произведение в разрезы новых жанров."""
+    categories = (None,) if category_id is None else (None, category_id)
+    add_scopes(title_id, [
+        (category, genre_id)
+        for category in categories
+        for genre_id in genre_ids
+    ])
+
+
+def remove_genre(title_id, genre_id):
+    """Удаляет строки произведения в разрезах жанра."""
+    LeaderboardEntry.objects.filter(
+        title_id=title_id, genre_id=genre_id
+    ).delete()
+
+
+def rebuild_leaderboards(apps=global_apps, batch_size=1000):
+    """
+    Заполняет таблицы лидеров заново по произведениям и отзывам.
+
+    Нужна после загрузки данных без сигналов и после изменения
+    PRIOR_MEAN, PRIOR_WEIGHT или TRENDING_HALF_LIFE.
+    """
+    entry_model = apps.get_model('reviews', 'LeaderboardEntry')
+    title_model = apps.get_model('reviews', 'Title')
+    genre_title_model = apps.get_model('reviews', 'GenreTitle')
+    review_model = apps.get_model('reviews', 'Review')
+
+    genres = {}
+    for title_id, genre_id in genre_title_model.objects.filter(
+        genre__isnull=False
+    ).values_list('title_id', 'genre_id').iterator():
+        genres.setdefault(title_id, []).append(genre_id)
+    keys = {
+        title_id: log_sum_exp(get_decay_time(row[1]) for row in rows)
+        for title_id, rows in groupby(
+            review_model.objects.order_by('title_id').values_list(
+                'title_id', 'pub_date'
+            ).iterator(),
+            key=lambda row: row[0]
+        )
+    }
+
+    entry_model.objects.all().delete()
+    created = 0
+    batch = []
+    for title in title_model.objects.values(
+        'id', 'category_id', 'score_sum', 'review_count'
+    ).iterator():
+        batch.extend(make_entries(
+            entry_model, title, genres.get(title['id'], ()),
+            keys.get(title['id'])
+        ))
+        if len(batch) >= batch_size:
+            entry_model.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    entry_model.objects.bulk_create(batch)
+    return created + len(batch)
+
+
+def get_leaders(order, category=None, genre=None, limit=None):
+    """
+    Первые `limit` строк разреза по полю `order`.
+
+    Читаются первые строки индекса разреза, поэтому время не зависит от
+    размера каталога. Для популярных отбрасываются произведения, у
+    которых затухший вес отзывов меньше TRENDING_MIN_WEIGHT.
+    """
+    entries = LeaderboardEntry.objects.filter(
+        category=category, genre=genre
+    )
+    if order == 'trending_key':
+        entries = entries.filter(trending_key__gt=get_decay_time() + math.log(
+            get_leaderboard_setting('TRENDING_MIN_WEIGHT')
+        ))
+    else:
+        entries = entries.filter(**{f'{order}__isnull': False})
+    return list(entries.order_by(f'-{order}', 'title_id').values_list(
+        'title_id', order
+    )[:limit or get_leaderboard_setting('DEFAULT_LIMIT')])
+
+
+def get_trend(trending_key):
+    """Текущая популярность: число отзывов с учётом затухания."""
+    return math.exp(trending_key - get_decay_time())
@@ -0,0 +1,244 @@
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from reviews.bulk import bulk_insert, bulk_insert_rows, finish_bulk_load
+from reviews.constants import MAX_SCORE, MIN_SCORE
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from users.roles import Roles
+
+User = get_user_model()
+
+WORDS = (
+    'фильм', 'книга', 'сюжет', 'герой', 'автор', 'финал', 'сцена', 'глава',
+    'музыка', 'актёр', 'режиссёр', 'история', 'персонаж', 'диалог', 'ритм',
+    'отлично', 'скучно', 'неожиданно', 'слабо', 'сильно', 'красиво', 'долго',
+    'очень', 'совсем', 'местами', 'снова', 'впервые', 'наконец', 'явно',
+    'понравился', 'разочаровал', 'удивил', 'затянут', 'снят', 'написан',
+    'и', 'но', 'а', 'что', 'как', 'это', 'был', 'не', 'всё', 'так', 'ещё',
+)
+TEXT_POOL_SIZE = 1000
+PUB_DATE_SPAN = timedelta(days=3 * 365)
+
+
+def next_id(model):
+    """Первый свободный первичный ключ модели."""
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def make_texts(rnd, median_words, max_words):
+    """
+    Набор заранее сгенерированных текстов разной длины.
+
+    Длина распределена логнормально: большинство текстов короткие,
+    но встречаются и очень длинные, до `max_words` слов.
+    """
+    return [
+        ' '.join(rnd.choices(WORDS, k=min(
+            max_words, max(1, int(rnd.lognormvariate(0, 0.8) * median_words))
+        )))
+        for _ in range(TEXT_POOL_SIZE)
+    ]
+
+
+def zipf_counts(rnd, total, size, cap, exponent, rounds=20):
+    """
+    Распределяет `total` объектов по `size` владельцам по закону Ципфа.
+
+    Самым популярным владельцам достаётся больше всего объектов,
+    но не больше `cap`; излишек переходит к остальным. Ранги
+    перемешаны, чтобы популярность не зависела от порядка создания.
+    """
+    weights = [1 / rank ** exponent for rank in range(1, size + 1)]
+    counts = [0] * size
+    remaining = total
+    for _ in range(rounds):
+        available = [index for index in range(size) if counts[index] < cap]
+        if remaining <= 0 or not available:
+            break
+        scale = remaining / sum(weights[index] for index in available)
+        for index in available:
+            expected = weights[index] * scale
+            extra = int(expected) + (rnd.random() < expected % 1)
+            counts[index] = min(cap, counts[index] + extra)
+        remaining = total - sum(counts)
+    rnd.shuffle(counts)
+    return counts
+
+
+def random_pub_date(rnd, now):
+    """
+    Дата публикации в виде значения для базы данных.
+
+    `now` — значение, уже приведённое к виду для базы данных, чтобы
+    не адаптировать каждую из миллионов дат через ORM.
+    """
+    # Квадрат равномерной величины сгущает даты к настоящему времени.
+    return str(now - PUB_DATE_SPAN * rnd.random() ** 2)
+
+
+class Command(BaseCommand):
+    help = "Сгенерировать большую синтетическую базу для нагрузочных тестов"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=50)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.0,
+            help='Показатель Ципфа для числа отзывов на произведение'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def insert(self, model, objects, batch_size, fields=None):
+        """
+        Вставляет поток объектов пачками в одной транзакции.
+
+        Если переданы `fields`, поток состоит из кортежей значений
+        и вставляется без создания экземпляров моделей.
+        """
+        started = time.perf_counter()
+        inserted = 0
+        with transaction.atomic():
+            while True:
+                batch = list(itertools.islice(objects, batch_size))
+                if not batch:
+                    break
+                if fields:
+                    bulk_insert_rows(model, fields, batch, batch_size)
+                else:
+                    bulk_insert(model, batch, batch_size)
+                inserted += len(batch)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{model._meta.verbose_name_plural}: {inserted} строк за "
+            f"{elapsed:.2f} с ({inserted / max(elapsed, 1e-9):.0f} строк/с)"
+        )
+        return inserted
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        now = timezone.now()
+        db_now = datetime.fromisoformat(
+            str(connection.ops.adapt_datetimefield_value(now))
+        )
+        started = time.perf_counter()
+
+        first_user = next_id(User)
+        users = range(first_user, first_user + options['users'])
+        roles = (Roles.USER.value,) * 18 + (Roles.MODERATOR.value,) * 2
+        self.insert(User, (
+            User(
+                id=pk,
+                username=f'user{pk}',
+                email=f'user{pk}@yamdb.fake',
+                password='!',
+                role=rnd.choice(roles),
+                date_joined=now,
+            )
+            for pk in users
+        ), batch_size)
+
+        first_category = next_id(Category)
+        categories = range(
+            first_category, first_category + options['categories']
+        )
+        self.insert(Category, (
+            Category(id=pk, name=f'Категория {pk}', slug=f'category-{pk}')
+            for pk in categories
+        ), batch_size)
+
+        first_genre = next_id(Genre)
+        genres = range(first_genre, first_genre + options['genres'])
+        self.insert(Genre, (
+            Genre(id=pk, name=f'Жанр {pk}', slug=f'genre-{pk}')
+            for pk in genres
+        ), batch_size)
+
+        descriptions = make_texts(rnd, 30, 200)
+        first_title = next_id(Title)
+        titles = range(first_title, first_title + options['titles'])
+        self.insert(Title, (
+            Title(
+                id=pk,
+                name=' '.join(rnd.choices(WORDS, k=rnd.randint(1, 4))),
+                year=rnd.randint(1900, now.year),
+                description=rnd.choice(descriptions),
+                category_id=rnd.choice(categories),
+            )
+            for pk in titles
+        ), batch_size)
+
+        self.insert(GenreTitle, (
+            (title, genre)
+            for title in titles
+            for genre in rnd.sample(
+                genres, min(len(genres), rnd.randint(1, 3))
+            )
+        ), batch_size, ('title', 'genre'))
+
+        review_texts = make_texts(rnd, 60, 1000)
+        review_counts = zipf_counts(
+            rnd, options['reviews'], len(titles), len(users), options['skew']
+        )
+        first_review = next_id(Review)
+        review_ids = itertools.count(first_review)
+        # Авторы отзывов на одно произведение не повторяются, что
+        # соблюдает ограничение unique_combination-r.
+        reviews = self.insert(Review, (
+            (
+                next(review_ids),
+                title,
+                author,
+                rnd.choice(review_texts),
+                min(MAX_SCORE, max(MIN_SCORE, round(rnd.gauss(mu, 2)))),
+                random_pub_date(rnd, db_now),
+                str(db_now),
+                1,
+            )
+            for title, count, mu in zip(
+                titles,
+                review_counts,
+                (rnd.uniform(MIN_SCORE + 1, MAX_SCORE) for _ in titles)
+            )
+            for author in rnd.sample(users, count)
+        ), batch_size, (
+            'id', 'title', 'author', 'text', 'score', 'pub_date',
+            'updated_at', 'version'
+        ))
+
+        if reviews:
+            comment_texts = make_texts(rnd, 15, 200)
+            self.insert(Comment, (
+                (
+                    first_review + int(reviews * rnd.random() ** 2),
+                    rnd.choice(users),
+                    rnd.choice(comment_texts),
+                    random_pub_date(rnd, db_now),
+                    str(db_now),
+                    1,
+                )
+                for _ in range(options['comments'])
+            ), batch_size, (
+                'review', 'author', 'text', 'pub_date', 'updated_at',
+                'version'
+            ))
+
+        finish_bulk_load(User)
+        self.stdout.write(
+            f"База сгенерирована за {time.perf_counter() - started:.2f} с"
+        )
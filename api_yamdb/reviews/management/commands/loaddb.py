@@ -1,42 +1,50 @@
 import csv
 import os
+import time
+from itertools import islice
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
+from reviews.bulk import bulk_insert, finish_bulk_load
 from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from users.roles import Roles
 
 User = get_user_model()
 
 
-def category_create(row):
-    Category.objects.get_or_create(
+def category_create(row, ids):
+    return Category(
         id=row[0],
         name=row[1],
         slug=row[2],
     )
 
 
-def genre_create(row):
-    Genre.objects.get_or_create(
+def genre_create(row, ids):
+    return Genre(
         id=row[0],
         name=row[1],
         slug=row[2],
     )
 
 
-def titles_create(row):
-    Title.objects.get_or_create(
+def titles_create(row, ids):
+    if row[3] and int(row[3]) not in ids[Category]:
+        return None
+    return Title(
         id=row[0],
         name=row[1],
         year=row[2],
-        category_id=row[3],
+        category_id=row[3] or None,
     )
 
 
-def users_create(row):
-    User.objects.get_or_create(
+def users_create(row, ids):
+    is_admin = row[3] == Roles.ADMIN.value
+    return User(
         id=row[0],
         username=row[1],
         email=row[2],
@@ -44,14 +52,17 @@ def users_create(row):
         bio=row[4],
         first_name=row[5],
         last_name=row[6],
+        is_staff=is_admin,
+        is_superuser=is_admin,
     )
 
 
-def review_create(row):
-    title, _ = Title.objects.get_or_create(id=row[1])
-    Review.objects.get_or_create(
+def review_create(row, ids):
+    if int(row[1]) not in ids[Title] or int(row[3]) not in ids[User]:
+        return None
+    return Review(
         id=row[0],
-        title=title,
+        title_id=row[1],
         text=row[2],
         author_id=row[3],
         score=row[4],
@@ -59,47 +70,101 @@ def review_create(row):
     )
 
 
-def comment_create(row):
-    review, _ = Review.objects.get_or_create(id=row[1])
-    Comment.objects.get_or_create(
+def comment_create(row, ids):
+    if int(row[1]) not in ids[Review] or int(row[3]) not in ids[User]:
+        return None
+    return Comment(
         id=row[0],
-        review=review,
+        review_id=row[1],
         text=row[2],
         author_id=row[3],
         pub_date=row[4],
     )
 
 
-def genre_title_create(row):
-    title, _ = Title.objects.get_or_create(id=row[1])
-    genre, _ = Genre.objects.get_or_create(id=row[2])
-    GenreTitle.objects.get_or_create(
+def genre_title_create(row, ids):
+    if int(row[1]) not in ids[Title] or int(row[2]) not in ids[Genre]:
+        return None
+    return GenreTitle(
         id=row[0],
-        title=title,
-        genre=genre,
+        title_id=row[1],
+        genre_id=row[2],
     )
 
 
+# Файл: (модель, функция создания объекта, родительские модели).
 action = {
-    'category.csv': category_create,
-    'genre.csv': genre_create,
-    'titles.csv': titles_create,
-    'users.csv': users_create,
-    'review.csv': review_create,
-    'comments.csv': comment_create,
-    'genre_title.csv': genre_title_create
+    'category.csv': (Category, category_create, ()),
+    'genre.csv': (Genre, genre_create, ()),
+    'titles.csv': (Title, titles_create, (Category,)),
+    'users.csv': (User, users_create, ()),
+    'review.csv': (Review, review_create, (Title, User)),
+    'comments.csv': (Comment, comment_create, (Review, User)),
+    'genre_title.csv': (GenreTitle, genre_title_create, (Title, Genre)),
 }
 
 
 class Command(BaseCommand):
     help = "Загрузить тестовую базу данных из директории (../static/data/)"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одной пачке bulk_create'
+        )
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'static/data/'),
+            help='Директория с CSV-файлами'
+        )
+
+    def load_file(self, path, model, create, parents, batch_size):
+        """Загружает CSV-файл пачками в одной транзакции."""
+        ids = {
+            parent: set(parent.objects.values_list('pk', flat=True))
+            for parent in parents
+        }
+        loaded = skipped = 0
+        with open(path, 'r', encoding='utf-8') as file, \
+                transaction.atomic():
+            reader = csv.reader(file)
+            next(reader)
+            while True:
+                rows = list(islice(reader, batch_size))
+                if not rows:
+                    break
+                objects = [create(row, ids) for row in rows]
+                batch = [obj for obj in objects if obj is not None]
+                bulk_insert(model, batch, batch_size)
+                loaded += len(batch)
+                skipped += len(objects) - len(batch)
+        return loaded, skipped
+
     def handle(self, *args, **options):
-        for filename, row in action.items():
-            path = os.path.join(settings.BASE_DIR, "static/data/") + filename
-            with open(path, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                next(reader)
-                for row in reader:
-                    action[filename](row)
+        total = 0
+        started = time.perf_counter()
+        for filename, (model, create, parents) in action.items():
+            file_started = time.perf_counter()
+            loaded, skipped = self.load_file(
+                os.path.join(options['path'], filename),
+                model,
+                create,
+                parents,
+                options['batch_size']
+            )
+            elapsed = time.perf_counter() - file_started
+            total += loaded
+            self.stdout.write(
+                f"{filename}: {loaded} строк за {elapsed:.2f} с "
+                f"({loaded / elapsed:.0f} строк/с)"
+                + (f", пропущено {skipped}" if skipped else "")
+            )
+        finish_bulk_load(User)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Всего {total} строк за {elapsed:.2f} с "
+            f"({total / elapsed:.0f} строк/с)"
+        )
         self.stdout.write("!!!База данных загружена успешно!!!")
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.stats import find_stale_stats, rebuild_catalog_stats
+
+
+class Command(BaseCommand):
+    help = "Пересчитать статистику категорий и жанров"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сравнить сохранённую статистику с пересчитанной'
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            stale = find_stale_stats()
+            for model, pk, field, stored, expected in stale:
+                self.stdout.write(
+                    f"{model._meta.verbose_name} {pk}: {field} = {stored}, "
+                    f"должно быть {expected}"
+                )
+            if stale:
+                raise CommandError(f"Расхождений в статистике: {len(stale)}")
+            self.stdout.write("Статистика совпадает с пересчитанной")
+            return
+        with transaction.atomic():
+            created = rebuild_catalog_stats()
+        self.stdout.write(f"Статистика пересчитана для {created} разделов")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.leaderboards import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = "Пересчитать таблицы лидеров произведений"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            created = rebuild_leaderboards()
+        self.stdout.write(f"В таблицы лидеров записано {created} строк")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import Review, Title
+from reviews.utils import rebuild_title_ratings
+
+
+class Command(BaseCommand):
+    help = "Пересчитать рейтинги произведений по всем отзывам"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = rebuild_title_ratings(Title, Review)
+        self.stdout.write(f"Рейтинги пересчитаны для {updated} произведений")
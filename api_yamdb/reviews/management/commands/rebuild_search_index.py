@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews import fts
+
+
+class Command(BaseCommand):
+    help = "Перестроить полнотекстовый индекс произведений"
+
+    def handle(self, *args, **options):
+        if not fts.is_enabled():
+            self.stdout.write("Полнотекстовый индекс доступен только в SQLite")
+            return
+        with transaction.atomic():
+            fts.create_index()
+            indexed = fts.rebuild_index()
+        self.stdout.write(f"В индекс добавлено {indexed} произведений")
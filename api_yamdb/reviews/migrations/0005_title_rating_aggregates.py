@@ -0,0 +1,35 @@
+# Generated by Django 3.2 on 2026-10-18 19:09
+
+from django.db import migrations, models
+
+from reviews.utils import rebuild_title_ratings
+
+
+def fill_title_ratings(apps, schema_editor):
+    rebuild_title_ratings(
+        apps.get_model('reviews', 'Title'),
+        apps.get_model('reviews', 'Review')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_auto_20241025_2258'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(
+            fill_title_ratings, migrations.RunPython.noop
+        ),
+    ]
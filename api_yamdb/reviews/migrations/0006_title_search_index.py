@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from reviews import fts
+
+
+def create_search_index(apps, schema_editor):
+    fts.create_index(schema_editor.connection)
+    fts.rebuild_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    fts.drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2 on 2026-10-18 20:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from reviews.leaderboards import rebuild_leaderboards
+
+
+def fill_leaderboards(apps, schema_editor):
+    rebuild_leaderboards(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score_sum', models.PositiveIntegerField(default=0, verbose_name='Сумма оценок')),
+                ('review_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('top_score', models.FloatField(blank=True, null=True, verbose_name='Взвешенная оценка')),
+                ('trending_key', models.FloatField(blank=True, null=True, verbose_name='Ключ популярности')),
+                ('category', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.category', verbose_name='Категория')),
+                ('genre', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.genre', verbose_name='Жанр')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'строка таблицы лидеров',
+                'verbose_name_plural': 'Таблицы лидеров',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['category', 'genre', '-top_score', 'title'], name='leaderboard_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['category', 'genre', '-trending_key', 'title'], name='leaderboard_trending_idx'),
+        ),
+        migrations.RunPython(
+            fill_leaderboards, migrations.RunPython.noop
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, router, transaction
 from django.utils import timezone
 
 from reviews.constants import (MAX_LENGTH, MAX_LENGTH_SLUG, MAX_SCORE,
@@ -37,11 +37,41 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
         ordering = ('name',)
+        # Сортировка списков и курсор (name, slug).
+        indexes = (
+            models.Index(
+                fields=('name', 'slug'),
+                name='%(class)s_name_slug_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name[:MAX_TEXT_LENGTH]
 
 
+class VersionedModel(models.Model):
+    """Базовая модель с отметкой и счётчиком изменений для ETag."""
+
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True
+    )
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        verbose_name='Версия'
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+        super().save(*args, **kwargs)
+
+
 class Category(BaseModel):
     """Модель категории."""
 
@@ -58,9 +88,11 @@ class Genre(BaseModel):
         verbose_name_plural = 'Жанры'
 
 
-class Title(models.Model):
+class Title(VersionedModel):
     """Модель произведения."""
 
+    RATING_FIELDS = ('score_sum', 'review_count')
+
     name = models.CharField(max_length=MAX_LENGTH, verbose_name='Название')
     year = models.SmallIntegerField(
         validators=[validate_year],
@@ -80,18 +112,80 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         blank=True,
         null=True,
+        # Заменён составным индексом title_category_name_idx.
+        db_index=False,
         verbose_name='Категория'
     )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов'
+    )
 
     class Meta():
         verbose_name = 'произведение'
         verbose_name_plural = 'Произведения'
         default_related_name = 'titles'
         ordering = ('name',)
+        # Список сортируется по имени (курсор — name, id) и фильтруется
+        # по году и категории с той же сортировкой.
+        indexes = (
+            models.Index(fields=('name',), name='title_name_idx'),
+            models.Index(fields=('year', 'name'), name='title_year_name_idx'),
+            models.Index(
+                fields=('category', 'name'),
+                name='title_category_name_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name[:MAX_TEXT_LENGTH]
 
+    def save(self, *args, **kwargs):
+        """
+        Не перезаписывает агрегаты рейтинга при обновлении произведения.
+
+        Агрегаты меняются только атомарными UPDATE из сигналов отзывов,
+        иначе сохранение устаревшего экземпляра затёрло бы свежие значения.
+        Явно переданные `update_fields` не меняются, а отложенные поля
+        и INSERT отсутствующей строки Django обрабатывает как обычно.
+        """
+        self._skip_rating_fields = (
+            not self._state.adding and kwargs.get('update_fields') is None
+        )
+        super().save(*args, **kwargs)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        if getattr(self, '_skip_rating_fields', False):
+            values = [
+                value for value in values
+                if value[0].name not in self.RATING_FIELDS
+            ]
+        return super()._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженную категорию для таблиц лидеров."""
+        instance = super().from_db(db, field_names, values)
+        if 'category_id' in instance.__dict__:
+            instance._loaded_category_id = instance.category_id
+        return instance
+
+    @property
+    def rating(self):
+        """Средняя оценка по сохранённым агрегатам отзывов."""
+        if not self.review_count:
+            return None
+        return self.score_sum // self.review_count
+
 
 class GenreTitle(models.Model):
     """Модель связывает жанры и произведения."""
@@ -110,6 +204,8 @@ class GenreTitle(models.Model):
         null=True,
         on_delete=models.SET_NULL,
         related_name='genres',
+        # Заменён покрывающим индексом genretitle_genre_title_idx.
+        db_index=False,
         verbose_name='Жанр'
     )
 
@@ -122,18 +218,35 @@ class GenreTitle(models.Model):
                 name='unique_combination_gt'
             )
         ]
+        # Фильтр ?genre= находит произведения жанра без чтения таблицы.
+        indexes = (
+            models.Index(
+                fields=('genre', 'title'),
+                name='genretitle_genre_title_idx'
+            ),
+        )
 
     def __str__(self):
         return f'{self.title} - {self.genre}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженный жанр для статистики жанров."""
+        instance = super().from_db(db, field_names, values)
+        if 'genre_id' in instance.__dict__:
+            instance._loaded_genre_id = instance.genre_id
+        return instance
+
 
-class Review(models.Model):
+class Review(VersionedModel):
     """Модель отзыва, содержащая также оценку отзыва."""
 
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
         related_name='reviews',
+        # Заменён составным индексом review_title_pub_date_idx.
+        db_index=False,
         verbose_name='произведение'
     )
     text = models.TextField(
@@ -164,18 +277,54 @@ class Review(models.Model):
                 name='unique_combination-r'
             )
         ]
+        # Отзывы произведения по -pub_date (курсор — -pub_date, id);
+        # updated_at делает индекс покрывающим для выборки ETag списка.
+        indexes = (
+            models.Index(
+                fields=('title', '-pub_date', 'id', 'updated_at'),
+                name='review_title_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:MAX_TEXT_LENGTH]
 
-
-class Comment(models.Model):
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженную оценку для пересчёта рейтинга."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв и обновляет рейтинг в одной транзакции."""
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'score' not in update_fields:
+                self._loaded_score = None
+            elif not self._state.adding and self.pk is not None:
+                # Прежняя оценка читается под блокировкой строки, чтобы
+                # параллельные изменения отзыва не исказили score_sum.
+                self._loaded_score = (
+                    type(self)._base_manager.using(using)
+                    .select_for_update().filter(pk=self.pk)
+                    .values_list('score', flat=True).first()
+                )
+            super().save(*args, **kwargs)
+
+
+class Comment(VersionedModel):
     """Модель комментария."""
 
     review = models.ForeignKey(
         Review,
         on_delete=models.CASCADE,
         related_name='comments',
+        # Заменён составным индексом comment_review_pub_date_idx.
+        db_index=False,
         verbose_name='Отзыв'
     )
     text = models.TextField(
@@ -196,6 +345,176 @@ class Comment(models.Model):
         ordering = ('-pub_date',)
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('review', '-pub_date', 'id', 'updated_at'),
+                name='comment_review_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return (self.text)[:MAX_TEXT_LENGTH]
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Строка таблицы лидеров в одном разрезе каталога.
+
+    У каждого произведения есть строка без фильтра, строка его
+    категории, строки его жанров и пар «категория — жанр» (пустые
+    category и genre означают «любые»). Строки обновляются сигналами
+    отзывов, поэтому лидеры любого разреза читаются по индексу без
+    агрегации отзывов.
+    """
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+        verbose_name='Произведение'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='leaderboard_entries',
+        # Заменён составными индексами, которые начинаются с category.
+        db_index=False,
+        verbose_name='Категория'
+    )
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='leaderboard_entries',
+        verbose_name='Жанр'
+    )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок'
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов'
+    )
+    top_score = models.FloatField(
+        blank=True,
+        null=True,
+        verbose_name='Взвешенная оценка'
+    )
+    trending_key = models.FloatField(
+        blank=True,
+        null=True,
+        verbose_name='Ключ популярности'
+    )
+
+    class Meta:
+        verbose_name = 'строка таблицы лидеров'
+        verbose_name_plural = 'Таблицы лидеров'
+        # Лидеры разреза — первые строки индекса после (category, genre).
+        indexes = (
+            models.Index(
+                fields=('category', 'genre', '-top_score', 'title'),
+                name='leaderboard_top_idx'
+            ),
+            models.Index(
+                fields=('category', 'genre', '-trending_key', 'title'),
+                name='leaderboard_trending_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.title} ({self.category} / {self.genre})'
+
+
+class CatalogStats(models.Model):
+    """
+    Базовая модель статистики раздела каталога.
+
+    Хранит число произведений и отзывов, сумму оценок и гистограмму
+    оценок (поля `score_1` … `score_10`). Значения сдвигаются атомарными
+    UPDATE из сигналов произведений, жанров и отзывов.
+    """
+
+    HISTOGRAM_FIELD = 'score_{}'
+
+    title_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество произведений'
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов'
+    )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок'
+    )
+
+    class Meta:
+        abstract = True
+
+    @property
+    def mean_score(self):
+        """Средняя оценка отзывов раздела."""
+        if not self.review_count:
+            return None
+        return round(self.score_sum / self.review_count, 2)
+
+    @property
+    def histogram(self):
+        """Количество отзывов с каждой оценкой."""
+        return {
+            str(score): getattr(self, self.HISTOGRAM_FIELD.format(score))
+            for score in range(MIN_SCORE, MAX_SCORE + 1)
+        }
+
+
+for score in range(MIN_SCORE, MAX_SCORE + 1):
+    CatalogStats.add_to_class(
+        CatalogStats.HISTOGRAM_FIELD.format(score),
+        models.PositiveIntegerField(
+            default=0,
+            verbose_name=f'Оценок {score}'
+        )
+    )
+
+
+class CategoryStats(CatalogStats):
+    """Статистика категории."""
+
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Категория'
+    )
+
+    class Meta:
+        verbose_name = 'статистика категории'
+        verbose_name_plural = 'Статистика категорий'
+
+    def __str__(self):
+        return str(self.category)
+
+
+class GenreStats(CatalogStats):
+    """Статистика жанра."""
+
+    genre = models.OneToOneField(
+        Genre,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Жанр'
+    )
+
+    class Meta:
+        verbose_name = 'статистика жанра'
+        verbose_name_plural = 'Статистика жанров'
+
+    def __str__(self):
+        return str(self.genre)
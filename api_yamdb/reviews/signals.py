@@ -0,0 +1,183 @@
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from reviews import fts, leaderboards, stats
+from reviews.models import (Category, CategoryStats, Genre, GenreStats,
+                            GenreTitle, Review, Title)
+
+
+def update_title_rating(title_id, score_delta, count_delta=0):
+    """Атомарно сдвигает агрегаты рейтинга и версию произведения."""
+    Title.objects.filter(pk=title_id).update(
+        score_sum=F('score_sum') + score_delta,
+        review_count=F('review_count') + count_delta,
+        version=F('version') + 1,
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    """Учитывает новый отзыв или изменение оценки в рейтинге."""
+    if raw:
+        return
+    if created:
+        update_title_rating(instance.title_id, instance.score, 1)
+        leaderboards.update_title(
+            instance.title_id, instance.score, 1, added=instance.pub_date
+        )
+        stats.add_review(instance.title_id, instance.score)
+    else:
+        loaded_score = getattr(instance, '_loaded_score', None)
+        if loaded_score is not None and loaded_score != instance.score:
+            update_title_rating(
+                instance.title_id, instance.score - loaded_score
+            )
+            leaderboards.update_title(
+                instance.title_id, instance.score - loaded_score
+            )
+            stats.change_score(
+                instance.title_id, loaded_score, instance.score
+            )
+    instance._loaded_score = instance.score
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Исключает удалённый отзыв из рейтинга, в том числе при каскаде."""
+    update_title_rating(instance.title_id, -instance.score, -1)
+    leaderboards.update_title(
+        instance.title_id, -instance.score, -1, removed=instance.pub_date
+    )
+    stats.add_review(instance.title_id, instance.score, -1)
+
+
+@receiver(pre_save, sender=Title)
+def title_saving(sender, instance, raw=False, **kwargs):
+    """Запоминает прежнюю категорию, если произведение не из базы."""
+    if raw or hasattr(instance, '_loaded_category_id'):
+        return
+    instance._loaded_category_id = None if instance.pk is None else (
+        Title.objects.filter(pk=instance.pk).values_list(
+            'category_id', flat=True
+        ).first()
+    )
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Обновляет произведение в поисковом индексе, таблицах лидеров и
+    статистике категорий.
+    """
+    if raw:
+        return
+    fts.index_title(instance)
+    if created:
+        leaderboards.add_title(instance)
+        stats.move_title(instance.pk, None, instance.category_id)
+    elif instance._loaded_category_id != instance.category_id:
+        leaderboards.move_title(
+            instance.pk, instance._loaded_category_id, instance.category_id
+        )
+        stats.move_title(
+            instance.pk, instance._loaded_category_id, instance.category_id
+        )
+    instance._loaded_category_id = instance.category_id
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    """Удаляет произведение из поискового индекса и статистики."""
+    fts.unindex_title(instance.pk)
+    stats.move_title(instance.pk, instance.category_id, None)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_added(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Добавляет произведения в таблицы лидеров и статистику новых жанров.
+
+    Связи добавляются через bulk_create без post_save, а удаляются
+    с post_delete для каждой связи, поэтому здесь обрабатывается только
+    добавление.
+    """
+    if action != 'post_add' or not pk_set:
+        return
+    if not reverse:
+        leaderboards.add_genres(instance.pk, instance.category_id, pk_set)
+        stats.add_genres(instance.pk, pk_set)
+        return
+    for title_id, category_id in Title.objects.filter(
+        pk__in=pk_set
+    ).values_list('pk', 'category_id'):
+        leaderboards.add_genres(title_id, category_id, (instance.pk,))
+        stats.add_genres(title_id, (instance.pk,))
+
+
+def add_title_genre(title_id, genre_id):
+    """Добавляет произведение в таблицы лидеров и статистику жанра."""
+    leaderboards.add_genres(
+        title_id,
+        Title.objects.filter(pk=title_id).values_list(
+            'category_id', flat=True
+        ).first(),
+        (genre_id,)
+    )
+    stats.add_genres(title_id, (genre_id,))
+
+
+def remove_title_genre(title_id, genre_id):
+    """Убирает произведение из таблиц лидеров и статистики жанра."""
+    leaderboards.remove_genre(title_id, genre_id)
+    stats.add_genres(title_id, (genre_id,), -1)
+
+
+@receiver(pre_save, sender=GenreTitle)
+def genre_title_saving(sender, instance, raw=False, **kwargs):
+    """Запоминает прежний жанр, если связь не из базы."""
+    if raw or hasattr(instance, '_loaded_genre_id'):
+        return
+    instance._loaded_genre_id = None if instance.pk is None else (
+        GenreTitle.objects.filter(pk=instance.pk).values_list(
+            'genre_id', flat=True
+        ).first()
+    )
+
+
+@receiver(post_save, sender=GenreTitle)
+def genre_title_saved(sender, instance, created, raw=False, **kwargs):
+    """Учитывает связь жанра, сохранённую напрямую, например в админке."""
+    if raw or instance.title_id is None:
+        return
+    loaded_genre_id = None if created else instance._loaded_genre_id
+    if loaded_genre_id != instance.genre_id:
+        if loaded_genre_id is not None:
+            remove_title_genre(instance.title_id, loaded_genre_id)
+        if instance.genre_id is not None:
+            add_title_genre(instance.title_id, instance.genre_id)
+    instance._loaded_genre_id = instance.genre_id
+
+
+@receiver(post_delete, sender=GenreTitle)
+def genre_title_deleted(sender, instance, **kwargs):
+    """Убирает произведение из таблиц лидеров и статистики жанра."""
+    if instance.genre_id is not None:
+        remove_title_genre(instance.title_id, instance.genre_id)
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, raw=False, **kwargs):
+    """Создаёт пустую статистику новой категории."""
+    if created and not raw:
+        CategoryStats.objects.create(category=instance)
+
+
+@receiver(post_save, sender=Genre)
+def genre_saved(sender, instance, created, raw=False, **kwargs):
+    """Создаёт пустую статистику нового жанра."""
+    if created and not raw:
+        GenreStats.objects.create(genre=instance)
@@ -0,0 +1,224 @@
+"""
+Статистика категорий и жанров: произведения, отзывы, средняя оценка и
+гистограмма оценок.
+
+Строки статистики сдвигаются одним UPDATE на каждое изменение: вклад
+отзыва известен из сигнала, а вклад произведения (его отзывы) считается
+подзапросами в том же UPDATE, поэтому между чтением и записью ничего
+не теряется. `rebuild_catalog_stats` пересчитывает всё с нуля.
+"""
+from collections import Counter
+from itertools import chain
+
+from django.apps import apps as global_apps
+from django.db.models import (Case, Count, F, IntegerField, Subquery, Sum,
+                              Value, When)
+from django.db.models.functions import Coalesce
+
+from reviews.constants import MAX_SCORE, MIN_SCORE
+from reviews.models import (CatalogStats, CategoryStats, GenreStats,
+                            GenreTitle, Review, Title)
+
+SCORES = range(MIN_SCORE, MAX_SCORE + 1)
+STATS_FIELDS = (
+    'title_count', 'review_count', 'score_sum',
+    *(CatalogStats.HISTOGRAM_FIELD.format(score) for score in SCORES)
+)
+
+
+def get_histogram_field(score):
+    """Поле гистограммы для оценки `score`."""
+    return CatalogStats.HISTOGRAM_FIELD.format(score)
+
+
+def get_title_stats(title_id):
+    """Строки статистики категории и жанров произведения."""
+    return {
+        'category': CategoryStats.objects.filter(
+            category_id=Subquery(
+                Title.objects.filter(pk=title_id).values('category_id')
+            )
+        ),
+        'genre': GenreStats.objects.filter(
+            genre_id__in=GenreTitle.objects.filter(
+                title_id=title_id
+            ).values('genre_id')
+        ),
+    }
+
+
+def update_review(title_id, changes):
+    """Применяет изменения отзыва к категории и жанрам произведения."""
+    for stats in get_title_stats(title_id).values():
+        stats.update(**changes)
+
+
+def add_review(title_id, score, sign=1):
+    """Добавляет (sign=1) или убирает (sign=-1) отзыв с оценкой `score`."""
+    field = get_histogram_field(score)
+    update_review(title_id, {
+        'review_count': F('review_count') + sign,
+        'score_sum': F('score_sum') + sign * score,
+        field: F(field) + sign,
+    })
+
+
+def change_score(title_id, old_score, score):
+    """Переносит отзыв в гистограмме при изменении оценки."""
+    old_field = get_histogram_field(old_score)
+    field = get_histogram_field(score)
+    update_review(title_id, {
+        'score_sum': F('score_sum') + score - old_score,
+        old_field: F(old_field) - 1,
+        field: F(field) + 1,
+    })
+
+
+def get_title_changes(title_id, sign):
+    """
+    Изменения статистики раздела при добавлении или удалении произведения.
+
+    Вклад отзывов считается подзапросами по текущим отзывам произведения.
+    """
+    reviews = Review.objects.filter(
+        title_id=title_id
+    ).order_by().values('title_id')
+
+    def total(queryset, aggregate):
+        return sign * Coalesce(
+            Subquery(queryset.annotate(total=aggregate).values('total')),
+            0,
+            output_field=IntegerField()
+        )
+
+    changes = {
+        'title_count': F('title_count') + sign,
+        'review_count': F('review_count') + total(reviews, Count('pk')),
+        'score_sum': F('score_sum') + total(reviews, Sum('score')),
+    }
+    for score in SCORES:
+        field = get_histogram_field(score)
+        changes[field] = F(field) + total(
+            reviews.filter(score=score), Count('pk')
+        )
+    return changes
+
+
+def move_title(title_id, old_category_id, category_id):
+    """Переносит вклад произведения между категориями."""
+    if old_category_id is not None:
+        CategoryStats.objects.filter(category_id=old_category_id).update(
+            **get_title_changes(title_id, -1)
+        )
+    if category_id is not None:
+        CategoryStats.objects.filter(category_id=category_id).update(
+            **get_title_changes(title_id, 1)
+        )
+
+
+def add_genres(title_id, genre_ids, sign=1):
+    """Добавляет (sign=1) или убирает (sign=-1) произведение из жанров."""
+    GenreStats.objects.filter(genre_id__in=genre_ids).update(
+        **get_title_changes(title_id, sign)
+    )
+
+
+def add_titles(titles, genre_ids):
+    """
+    Учитывает новые произведения без отзывов в статистике разделов.
+
+    Число произведений каждого раздела сдвигается одним UPDATE на модель.
+    """
+    for stats_model, counts in (
+        (CategoryStats, Counter(
+            title.category_id for title in titles
+            if title.category_id is not None
+        )),
+        (GenreStats, Counter(chain.from_iterable(genre_ids))),
+    ):
+        if not counts:
+            continue
+        stats_model.objects.filter(pk__in=counts).update(
+            title_count=F('title_count') + Case(
+                *(When(pk=pk, then=Value(count))
+                  for pk, count in counts.items()),
+                output_field=IntegerField()
+            )
+        )
+
+
+def count_stats(title_counts, histogram, key):
+    """Строки статистики по числу произведений и гистограмме разделов."""
+    rows = {}
+    for row in title_counts:
+        rows[row[key]] = dict.fromkeys(STATS_FIELDS, 0)
+        rows[row[key]]['title_count'] = row['total']
+    for row in histogram:
+        stats = rows[row[key]]
+        stats[get_histogram_field(row['score'])] += row['total']
+        stats['review_count'] += row['total']
+        stats['score_sum'] += row['score'] * row['total']
+    return rows
+
+
+def compute_catalog_stats(apps=global_apps):
+    """
+    Статистика категорий и жанров, посчитанная по произведениям и отзывам.
+
+    Возвращает словари {модель статистики: {pk раздела: поля}}; разделы
+    без произведений не входят.
+    """
+    title_model = apps.get_model('reviews', 'Title')
+    review_model = apps.get_model('reviews', 'Review')
+    result = {}
+    for stats_name, key in (('CategoryStats', 'category'),
+                            ('GenreStats', 'genre')):
+        result[apps.get_model('reviews', stats_name)] = count_stats(
+            title_model.objects.filter(
+                **{f'{key}__isnull': False}
+            ).order_by().values(key).annotate(total=Count('pk')),
+            review_model.objects.filter(
+                **{f'title__{key}__isnull': False}
+            ).order_by().values(
+                'score', **{key: F(f'title__{key}')}
+            ).annotate(total=Count('pk')),
+            key
+        )
+    return result
+
+
+def find_stale_stats(apps=global_apps):
+    """
+    Расхождения сохранённой статистики с пересчитанной.
+
+    Возвращает кортежи (модель, pk раздела, поле, сохранено, должно быть).
+    """
+    stale = []
+    for stats_model, rows in compute_catalog_stats(apps).items():
+        key = stats_model._meta.pk.attname
+        empty = dict.fromkeys(STATS_FIELDS, 0)
+        for stored in stats_model.objects.values(key, *STATS_FIELDS):
+            pk = stored.pop(key)
+            expected = rows.get(pk, empty)
+            stale.extend(
+                (stats_model, pk, field, stored[field], expected[field])
+                for field in STATS_FIELDS
+                if stored[field] != expected[field]
+            )
+    return stale
+
+
+def rebuild_catalog_stats(apps=global_apps):
+    """Заполняет статистику всех категорий и жанров заново."""
+    created = 0
+    for stats_model, rows in compute_catalog_stats(apps).items():
+        owner = stats_model._meta.pk.remote_field.model
+        key = stats_model._meta.pk.attname
+        stats = [
+            stats_model(**{key: pk}, **rows.get(pk, {}))
+            for pk in owner._default_manager.values_list('pk', flat=True)
+        ]
+        stats_model.objects.all().delete()
+        stats_model.objects.bulk_create(stats)
+        created += len(stats)
+    return created
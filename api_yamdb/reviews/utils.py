@@ -0,0 +1,21 @@
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def rebuild_title_ratings(title_model, review_model):
+    """Пересчитывает агрегаты рейтинга всех произведений с нуля."""
+    reviews = review_model.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    return title_model.objects.update(
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0,
+            output_field=IntegerField()
+        ),
+        review_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total')),
+            0,
+            output_field=IntegerField()
+        )
+    )
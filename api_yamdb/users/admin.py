@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Group
 
+from users.models import OutboxEmail
+
 User = get_user_model()
 
 
@@ -65,4 +67,22 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'recipient',
+        'subject',
+        'created_at',
+        'attempts',
+        'next_attempt_at',
+        'sent_at'
+    )
+    list_filter = (
+        'sent_at',
+    )
+    search_fields = (
+        'recipient',
+    )
+
+
 admin.site.unregister(Group)
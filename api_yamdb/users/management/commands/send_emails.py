@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import get_pending_emails, logger, send_batch
+
+
+class Command(BaseCommand):
+    help = "Отправить письма из очереди"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Сколько писем отправлять через одно соединение'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, проверяя очередь раз в --interval'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза между проверками пустой очереди, секунды'
+        )
+
+    def drain(self, batch_size):
+        """Отправляет пачки, пока в очереди есть готовые письма."""
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_batch(batch_size=batch_size)
+            total_sent += sent
+            total_failed += failed
+            if not sent:
+                return total_sent, total_failed
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent, failed = self.drain(options['batch_size'])
+            except Exception:
+                # В режиме --loop сбой одного прохода (например, занятая
+                # база) не должен останавливать отправку.
+                if not options['loop']:
+                    raise
+                logger.exception('Ошибка при отправке очереди писем')
+                time.sleep(options['interval'])
+                continue
+            if sent or failed or not options['loop']:
+                self.stdout.write(
+                    f"Отправлено писем: {sent}, ошибок: {failed}, "
+                    f"в очереди: {get_pending_emails().count()}"
+                )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
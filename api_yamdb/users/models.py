@@ -2,6 +2,7 @@ from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
+from django.utils import timezone
 
 from users.constants import EMAIL_LENGTH, USERNAME_LENGTH
 from users.roles import Roles
@@ -46,6 +47,15 @@ class User(AbstractUser):
         choices=Roles.choices,
         default=Roles.USER.value
     )
+    token_version = models.PositiveIntegerField(
+        'Версия токенов',
+        default=1,
+        editable=False
+    )
+
+    AUTH_FIELDS = (
+        'username', 'role', 'is_staff', 'is_superuser', 'is_active'
+    )
 
     class Meta:
         verbose_name = 'пользователь'
@@ -55,6 +65,18 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_auth = instance.get_auth_state()
+        return instance
+
+    def get_auth_state(self):
+        """Значения полей, которые попадают в токен доступа."""
+        return tuple(
+            self.__dict__.get(field) for field in self.AUTH_FIELDS
+        )
+
     def save(self, *args, **kwargs):
         """
         Переопределенный метод сохранения для модели User.
@@ -66,12 +88,22 @@ class User(AbstractUser):
         пользователь является суперпользователем, то устанавливает флаги
         is_staff и is_superuser в True.
         - Для всех остальных ролей эти флаги устанавливаются в False.
+
+        Если изменились имя, роль, флаги или активность, увеличивается
+        token_version, и выданные ранее токены перестают действовать.
         """
 
         if self.role == Roles.ADMIN.value or self.is_superuser:
             self.is_staff = True
             self.is_superuser = True
+        loaded_auth = getattr(self, '_loaded_auth', None)
+        if loaded_auth and loaded_auth != self.get_auth_state():
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
         super().save(*args, **kwargs)
+        self._loaded_auth = self.get_auth_state()
 
     @property
     def is_admin(self):
@@ -104,3 +136,38 @@ class User(AbstractUser):
         Проверяет токен подтверждения для пользователя.
         """
         return default_token_generator.check_token(self, token)
+
+
+class OutboxEmail(models.Model):
+    """
+    Письмо в очереди на отправку.
+
+    Запросы только добавляют письма в очередь; отправляет их команда
+    `send_emails` пачками через одно SMTP-соединение.
+    """
+
+    recipient = models.EmailField('Получатель', max_length=EMAIL_LENGTH)
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель', max_length=EMAIL_LENGTH)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'письмо'
+        verbose_name_plural = 'Очередь писем'
+        ordering = ('next_attempt_at',)
+        indexes = (
+            models.Index(
+                fields=('sent_at', 'next_attempt_at'),
+                name='outbox_pending_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
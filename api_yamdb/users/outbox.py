@@ -0,0 +1,149 @@
+import logging
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from users.models import OutboxEmail
+
+logger = logging.getLogger('users.outbox')
+
+DEFAULT_EMAIL_OUTBOX = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF': 30,
+    'MAX_BACKOFF': 60 * 60,
+    'CLAIM_TIMEOUT': 10 * 60,
+}
+
+
+def get_outbox_setting(name):
+    """Возвращает параметр из `settings.EMAIL_OUTBOX`."""
+    options = getattr(settings, 'EMAIL_OUTBOX', {})
+    return options.get(name, DEFAULT_EMAIL_OUTBOX[name])
+
+
+def enqueue_email(subject, body, recipient, from_email=None):
+    """Ставит письмо в очередь на отправку."""
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        recipient=recipient,
+        from_email=from_email or settings.EMAIL_FROM
+    )
+
+
+def get_pending_emails():
+    """Письма, которые ещё можно отправить."""
+    return OutboxEmail.objects.filter(
+        sent_at__isnull=True,
+        attempts__lt=get_outbox_setting('MAX_ATTEMPTS')
+    )
+
+
+def get_retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой, секунды."""
+    return min(
+        get_outbox_setting('BACKOFF') * 2 ** (attempts - 1),
+        get_outbox_setting('MAX_BACKOFF')
+    )
+
+
+def claim_emails(now, batch_size):
+    """
+    Забирает пачку писем, срок попытки которых наступил.
+
+    Выбранные письма откладываются на `CLAIM_TIMEOUT` в той же
+    транзакции, поэтому другие процессы `send_emails` их не видят.
+    Строки блокируются через SELECT ... FOR UPDATE SKIP LOCKED, а в SQLite
+    транзакция и так начинается с блокировки записи (BEGIN IMMEDIATE).
+    Если процесс упал посреди пачки, письма вернутся в очередь
+    по истечении `CLAIM_TIMEOUT`.
+    """
+    with transaction.atomic():
+        emails = list(
+            get_pending_emails().filter(
+                next_attempt_at__lte=now
+            ).select_for_update(skip_locked=True)[:batch_size]
+        )
+        OutboxEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(next_attempt_at=now + timedelta(
+            seconds=get_outbox_setting('CLAIM_TIMEOUT')
+        ))
+    return emails
+
+
+def defer_email(email, error, now):
+    """Записывает неудачную попытку и откладывает письмо."""
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    email.next_attempt_at = now + timedelta(
+        seconds=get_retry_delay(email.attempts)
+    )
+    logger.warning(
+        'Не удалось отправить письмо %s: %s', email.pk, email.last_error
+    )
+
+
+def send_batch(connection=None, batch_size=None):
+    """
+    Отправляет одну пачку писем, срок попытки которых наступил.
+
+    Все письма пачки отправляются через одно соединение. Если
+    сервер разорвал соединение, оно открывается заново для следующего
+    письма. Неудачная попытка откладывает письмо с экспоненциальной
+    задержкой; если соединение не удалось открыть, откладываются все
+    оставшиеся письма пачки. Отправленное письмо отмечается сразу,
+    чтобы сбой посреди пачки не привёл к повторной отправке.
+    Возвращает число отправленных и неотправленных писем.
+    """
+    now = timezone.now()
+    emails = claim_emails(
+        now, batch_size or get_outbox_setting('BATCH_SIZE')
+    )
+    if not emails:
+        return 0, 0
+    connection = connection or get_connection()
+    sent, failed = 0, []
+    pending = iter(emails)
+    try:
+        connection.open()
+        for email in pending:
+            message = EmailMessage(
+                email.subject,
+                email.body,
+                email.from_email,
+                [email.recipient],
+                connection=connection
+            )
+            try:
+                message.send()
+            except (smtplib.SMTPException, OSError) as error:
+                defer_email(email, error, now)
+                failed.append(email)
+                if isinstance(error, smtplib.SMTPServerDisconnected):
+                    connection.close()
+                    connection.open()
+            else:
+                OutboxEmail.objects.filter(pk=email.pk).update(
+                    sent_at=timezone.now(), attempts=F('attempts') + 1
+                )
+                sent += 1
+    except (smtplib.SMTPException, OSError) as error:
+        # Сервер недоступен: попытка засчитывается всем письмам пачки,
+        # которые ещё не отправлялись.
+        for email in pending:
+            defer_email(email, error, now)
+            failed.append(email)
+    finally:
+        if failed:
+            OutboxEmail.objects.bulk_update(
+                failed, ('attempts', 'last_error', 'next_attempt_at')
+            )
+        connection.close()
+    return sent, len(failed)
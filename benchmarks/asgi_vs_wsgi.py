@@ -0,0 +1,248 @@
+"""
+Сравнение пропускной способности WSGI и ASGI на горячих маршрутах чтения.
+
+Приложения вызываются в процессе, без сетевого сервера, чтобы сравнивать
+только обработку запросов Django:
+
+- wsgi — `WSGIHandler` в пуле из --threads потоков (как gunicorn --threads);
+- asgi-sync — `ASGIHandler` с синхронными представлениями: Django 3.2
+  выполняет их по одному в общем потоке `thread_sensitive`;
+- asgi-async — `ASGIHandler` с асинхронными обработчиками
+  (`ASYNC_READ_VIEWS`), запросы чтения идут в пул из --threads потоков.
+
+Во всех режимах одновременно выполняется --concurrency запросов.
+Параметр --db-latency-ms добавляет задержку к каждому SQL-запросу,
+имитируя сетевую СУБД вместо локального файла SQLite.
+
+    python benchmarks/asgi_vs_wsgi.py --size small --concurrency 64
+    python benchmarks/asgi_vs_wsgi.py --db-latency-ms 2
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from endpoints import SIZES, percentile, setup_django
+
+MODES = ('wsgi', 'asgi-sync', 'asgi-async')
+
+
+def prepare_database(size):
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+    call_command(
+        'generatedb', seed=1, batch_size=10000, stdout=open(os.devnull, 'w'),
+        **SIZES[size]
+    )
+
+
+def build_paths():
+    """Горячие маршруты чтения: списки и самое популярное произведение."""
+    from reviews.models import Review, Title
+
+    title = Title.objects.order_by('-review_count', 'pk').first()
+    review = Review.objects.filter(title=title).order_by('pk').first()
+    return (
+        '/api/v1/titles/',
+        f'/api/v1/titles/{title.pk}/',
+        f'/api/v1/titles/{title.pk}/reviews/',
+        f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/',
+        '/api/v1/categories/',
+        '/api/v1/genres/',
+    )
+
+
+def add_db_latency(seconds):
+    """Добавляет задержку к каждому SQL-запросу во всех потоках."""
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+
+    connection_created.connect(install, weak=False)
+    for connection in connections.all():
+        connection.execute_wrappers.append(delay)
+
+
+def wsgi_call(application, path):
+    path, _, query = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'wsgi.version': (1, 0),
+    }
+    status = []
+    body = application(
+        environ, lambda code, headers, exc_info=None: status.append(code)
+    )
+    try:
+        b''.join(body)
+    finally:
+        body.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_call(application, path):
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    status = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+def run_wsgi(paths, requests, concurrency, threads):
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    timings = []
+
+    def worker(index):
+        started = time.perf_counter()
+        status = wsgi_call(application, paths[index % len(paths)])
+        timings.append(time.perf_counter() - started)
+        return status
+
+    with ThreadPoolExecutor(min(threads, concurrency)) as pool:
+        started = time.perf_counter()
+        statuses = list(pool.map(worker, range(requests)))
+        elapsed = time.perf_counter() - started
+    return statuses, timings, elapsed
+
+
+def run_asgi(paths, requests, concurrency, async_views):
+    from django.conf import settings
+    from django.core.asgi import get_asgi_application
+
+    settings.ASYNC_READ_VIEWS = async_views
+    application = get_asgi_application()
+    timings = []
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def worker(index):
+            async with semaphore:
+                started = time.perf_counter()
+                status = await asgi_call(
+                    application, paths[index % len(paths)]
+                )
+                timings.append(time.perf_counter() - started)
+                return status
+
+        started = time.perf_counter()
+        statuses = await asyncio.gather(
+            *(worker(index) for index in range(requests))
+        )
+        return statuses, time.perf_counter() - started
+
+    statuses, elapsed = asyncio.run(main())
+    return statuses, timings, elapsed
+
+
+def run_mode(mode, paths, requests, concurrency, threads):
+    if mode == 'wsgi':
+        return run_wsgi(paths, requests, concurrency, threads)
+    return run_asgi(paths, requests, concurrency, mode == 'asgi-async')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', choices=SIZES, default='small')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=16,
+        help='Потоков WSGI и размер пула ASYNC_READ_THREADS'
+    )
+    parser.add_argument(
+        '--db-latency-ms',
+        type=float,
+        default=0.0,
+        help='Задержка каждого SQL-запроса, мс'
+    )
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(directory)
+        from django.conf import settings
+
+        settings.ASYNC_READ_THREADS = args.threads
+        settings.SQL_INSTRUMENTATION = {'SAMPLE_RATE': 0}
+        prepare_database(args.size)
+        paths = build_paths()
+        if args.db_latency_ms:
+            add_db_latency(args.db_latency_ms / 1000)
+
+        print(
+            f'{args.size}: {args.requests} запросов, одновременно '
+            f'{args.concurrency}, потоков {args.threads}, задержка SQL '
+            f'{args.db_latency_ms} мс'
+        )
+        print(
+            f'{"режим":<12}{"запр/с":>10}{"p50, мс":>10}{"p95, мс":>10}'
+            f'{"p99, мс":>10}{"ошибок":>8}'
+        )
+        for mode in args.modes:
+            run_mode(mode, paths, len(paths) * 2, args.concurrency,
+                     args.threads)
+            statuses, timings, elapsed = run_mode(
+                mode, paths, args.requests, args.concurrency, args.threads
+            )
+            timings = [value * 1000 for value in timings]
+            errors = sum(status != 200 for status in statuses)
+            print(
+                f'{mode:<12}{args.requests / elapsed:>10.1f}'
+                f'{percentile(timings, 50):>10.2f}'
+                f'{percentile(timings, 95):>10.2f}'
+                f'{percentile(timings, 99):>10.2f}{errors:>8}'
+            )
+            sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,470 @@
+"""
+Бенчмарк эндпоинтов API с бюджетами задержки, SQL-запросов и памяти.
+
+Скрипт создаёт временную базу SQLite, заполняет её командой
+`generatedb` для каждого размера из --sizes и прогоняет все маршруты
+`api/urls.py` через тестовый клиент Django. Для каждого маршрута
+измеряются p50/p95/p99 задержки, число SQL-запросов и пик выделенной
+памяти (tracemalloc). Результаты сравниваются с базовыми файлами
+`benchmarks/baselines/endpoints_<размер>.json`; при превышении бюджета
+скрипт завершается с кодом 1.
+
+    python benchmarks/endpoints.py --sizes small medium
+    python benchmarks/endpoints.py --sizes small --update-baselines
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_DIR = os.path.join(BENCH_DIR, 'baselines')
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+SIZES = {
+    'small': {
+        'users': 200, 'categories': 5, 'genres': 20, 'titles': 500,
+        'reviews': 5000, 'comments': 2000,
+    },
+    'medium': {
+        'users': 2000, 'categories': 10, 'genres': 50, 'titles': 10000,
+        'reviews': 200000, 'comments': 50000,
+    },
+    'large': {
+        'users': 20000, 'categories': 10, 'genres': 100, 'titles': 100000,
+        'reviews': 2000000, 'comments': 500000,
+    },
+}
+PERCENTILES = (50, 95, 99)
+# При меньшем числе повторов p95 совпадает с худшим замером, поэтому
+# задержка сравнивается по медиане.
+MIN_P95_SAMPLES = 20
+# Пик памяти берётся минимальным из нескольких прогонов: в отдельный
+# прогон могут попасть сборка мусора или ленивая инициализация.
+PEAK_SAMPLES = 3
+
+
+def setup_django(directory):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = os.path.join(
+        directory, 'bench.sqlite3'
+    )
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    settings.PROFILING = {**settings.PROFILING, 'DIR': directory}
+    settings.DEBUG = False
+    django.setup()
+
+
+class Route(namedtuple(
+        'Route', 'name method path data auth prepare cleanup',
+        defaults=(None, None))):
+    """
+    Маршрут бенчмарка.
+
+    У записывающих маршрутов `prepare` перед каждым вызовом возвращает
+    путь и данные (например, создаёт удаляемый объект), а `cleanup`
+    по ответу возвращает базу в прежнее состояние. Оба шага не входят
+    в замер, поэтому повторы измеряют один и тот же набор данных.
+    """
+
+
+def delete_created(model):
+    """Очистка: удаляет объект, созданный POST-запросом."""
+    def cleanup(response):
+        model.objects.filter(pk=response.json()['id']).delete()
+    return cleanup
+
+
+def delete_bulk_created(model):
+    """Очистка: удаляет объекты, созданные пакетным POST-запросом."""
+    def cleanup(response):
+        model.objects.filter(pk__in=[
+            item['id'] for item in response.json()['created']
+        ]).delete()
+    return cleanup
+
+
+def delete_matching(model, **lookup):
+    """Очистка: удаляет объекты, созданные запросом, по полям."""
+    def cleanup(response):
+        model.objects.filter(**lookup).delete()
+    return cleanup
+
+
+def recreate(url, factory):
+    """
+    Подготовка DELETE-запроса: создаёт удаляемый объект.
+
+    `url` подставляет созданный объект как `{obj}`.
+    """
+    def prepare():
+        return url.format(obj=factory()), None
+    return prepare
+
+
+def build_routes(admin_client):
+    """
+    Маршруты `api/urls.py` с подставленными идентификаторами.
+
+    Возвращает маршруты чтения и записи (`Route`). Берётся произведение
+    с наибольшим числом отзывов и самый комментируемый отзыв — самые
+    тяжёлые страницы вложенных маршрутов. Запись выполняет администратор
+    бенчмарка: PATCH передаёт текущие значения полей, созданные объекты
+    удаляются, а удаляемые создаются заново перед каждым вызовом.
+    """
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+
+    from reviews.models import Category, Comment, Genre, Review, Title
+
+    User = get_user_model()
+    admin = User.objects.get(username='bench-admin')
+    user = User.objects.exclude(pk=admin.pk).order_by('pk').first()
+    title = Title.objects.order_by('-review_count', 'pk').first()
+    deep_offset = max(0, Title.objects.count() - 10)
+    review = Review.objects.annotate(
+        comments_total=Count('comments')
+    ).order_by('-comments_total', 'pk').first()
+    comment = review.comments.order_by('pk').first()
+    genre = Genre.objects.order_by('pk').first()
+    category = Category.objects.order_by('pk').first()
+    titles_url = '/api/v1/titles/'
+    title_url = f'{titles_url}{title.pk}/'
+    reviews_url = f'{title_url}reviews/'
+    review_url = f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/'
+    comments_url = f'{review_url}comments/'
+    comment_url = f'{comments_url}{comment.pk}/'
+    users_url = '/api/v1/users/'
+    profile_id = admin_client.get(
+        '/api/v1/categories/', HTTP_X_PROFILE='cprofile'
+    )['X-Profile-Id']
+    new_title = {
+        'name': 'Бенчмарк', 'year': 2000, 'category': category.slug,
+        'genre': [genre.slug],
+    }
+    new_slug = {'name': 'Бенчмарк', 'slug': 'bench'}
+    new_user = {'username': 'bench-new', 'email': 'bench-new@yamdb.fake'}
+
+    def create_title():
+        created = Title.objects.create(
+            name='Бенчмарк', year=2000, category=category
+        )
+        created.genre.set([genre])
+        return created
+
+    return (
+        Route('categories-list', 'get', '/api/v1/categories/', None, False),
+        Route('categories-create', 'post', '/api/v1/categories/', new_slug,
+              True, cleanup=delete_matching(Category, slug='bench')),
+        Route('categories-delete', 'delete', None, None, True,
+              prepare=recreate(
+                  '/api/v1/categories/{obj.slug}/',
+                  lambda: Category.objects.create(**new_slug)
+              )),
+        Route('genres-list', 'get', '/api/v1/genres/', None, False),
+        Route('genres-create', 'post', '/api/v1/genres/', new_slug, True,
+              cleanup=delete_matching(Genre, slug='bench')),
+        Route('genres-delete', 'delete', None, None, True,
+              prepare=recreate(
+                  '/api/v1/genres/{obj.slug}/',
+                  lambda: Genre.objects.create(**new_slug)
+              )),
+        Route('titles-list', 'get', titles_url, None, False),
+        Route('titles-list-deep', 'get', f'{titles_url}?offset={deep_offset}',
+              None, False),
+        Route('titles-list-filtered', 'get',
+              f'{titles_url}?genre={genre.slug}&category={category.slug}',
+              None, False),
+        Route('titles-search', 'get', f'{titles_url}?search=фильм', None,
+              False),
+        Route('titles-detail', 'get', title_url, None, False),
+        Route('titles-top', 'get', f'{titles_url}top/', None, False),
+        Route('titles-trending', 'get',
+              f'{titles_url}trending/?genre={genre.slug}'
+              f'&category={category.slug}', None, False),
+        Route('titles-create', 'post', titles_url, new_title, True,
+              cleanup=delete_created(Title)),
+        Route('titles-update', 'patch', title_url,
+              {'description': title.description}, True),
+        Route('titles-delete', 'delete', None, None, True,
+              prepare=recreate(f'{titles_url}{{obj.pk}}/', create_title)),
+        Route('titles-bulk', 'post', f'{titles_url}bulk/',
+              [new_title] * 10, True, cleanup=delete_bulk_created(Title)),
+        Route('review-list', 'get', reviews_url, None, False),
+        Route('review-list-cursor', 'get', f'{reviews_url}?pagination=cursor',
+              None, False),
+        Route('review-detail', 'get', review_url, None, False),
+        Route('review-create', 'post', reviews_url,
+              {'text': 'Бенчмарк', 'score': 5}, True,
+              cleanup=delete_created(Review)),
+        Route('review-update', 'patch', review_url, {'score': review.score},
+              True),
+        Route('review-delete', 'delete', None, None, True,
+              prepare=recreate(
+                  f'{reviews_url}{{obj.pk}}/',
+                  lambda: Review.objects.create(
+                      title=title, author=admin, text='Бенчмарк', score=5
+                  )
+              )),
+        Route('comment-list', 'get', comments_url, None, False),
+        Route('comment-detail', 'get', comment_url, None, False),
+        Route('comment-create', 'post', comments_url, {'text': 'Бенчмарк'},
+              True, cleanup=delete_created(Comment)),
+        Route('comment-update', 'patch', comment_url, {'text': comment.text},
+              True),
+        Route('comment-delete', 'delete', None, None, True,
+              prepare=recreate(
+                  f'{comments_url}{{obj.pk}}/',
+                  lambda: Comment.objects.create(
+                      review=review, author=admin, text='Бенчмарк'
+                  )
+              )),
+        Route('user-list', 'get', users_url, None, True),
+        Route('user-detail', 'get', f'{users_url}{user.username}/', None,
+              True),
+        Route('user-create', 'post', users_url, new_user, True,
+              cleanup=delete_matching(User, username='bench-new')),
+        Route('user-update', 'patch', f'{users_url}{user.username}/',
+              {'bio': user.bio}, True),
+        Route('user-delete', 'delete', None, None, True,
+              prepare=recreate(
+                  f'{users_url}{{obj.username}}/',
+                  lambda: User.objects.create(**new_user)
+              )),
+        Route('user-me', 'get', f'{users_url}me/', None, True),
+        Route('user-me-update', 'patch', f'{users_url}me/',
+              {'bio': admin.bio}, True),
+        Route('cache-stats', 'get', '/api/v1/cache/stats/', None, True),
+        Route('profile-list', 'get', '/api/v1/profiles/', None, True),
+        Route('profile-download', 'get', f'/api/v1/profiles/{profile_id}/',
+              None, True),
+        Route('user-signup', 'post', '/api/v1/auth/signup/',
+              {'username': user.username, 'email': user.email}, False),
+        Route('token-generation', 'post', '/api/v1/auth/token/',
+              {'username': user.username, 'confirmation_code': 'invalid'},
+              False),
+        Route('api-token-auth', 'post', '/api/v1/api-token-auth/',
+              {'username': user.username, 'password': 'invalid'}, False),
+    )
+
+
+def make_clients():
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    admin, _ = get_user_model().objects.get_or_create(
+        username='bench-admin',
+        defaults={'email': 'bench-admin@yamdb.fake', 'role': 'admin'}
+    )
+    admin_client = APIClient()
+    admin_client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+    )
+    return APIClient(), admin_client
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+@contextmanager
+def elapsed_ms(timings):
+    started = time.perf_counter()
+    yield
+    timings.append((time.perf_counter() - started) * 1000)
+
+
+@contextmanager
+def traced_peak(peaks):
+    tracemalloc.start()
+    try:
+        yield
+        peaks.append(tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+
+
+def measure_route(client, route, repeat, warm):
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    def call(measure):
+        path, data = route.path, route.data
+        if route.prepare is not None:
+            path, data = route.prepare()
+        extra = {} if route.method == 'get' else {'format': 'json'}
+        with measure:
+            response = getattr(client, route.method)(
+                path, data=data, **extra
+            )
+        if route.cleanup is not None and response.status_code < 300:
+            route.cleanup(response)
+        return response
+
+    cache.clear()
+    context = CaptureQueriesContext(connection)
+    response = call(context)
+    queries = len(context.captured_queries)
+
+    peaks = []
+    for _ in range(PEAK_SAMPLES):
+        cache.clear()
+        call(traced_peak(peaks))
+
+    timings = []
+    for _ in range(repeat):
+        if not warm:
+            cache.clear()
+        call(elapsed_ms(timings))
+    result = {
+        f'p{value}_ms': round(percentile(timings, value), 3)
+        for value in PERCENTILES
+    }
+    result.update(
+        status=response.status_code,
+        queries=queries,
+        peak_kib=round(min(peaks) / 1024, 1),
+        mean_ms=round(statistics.mean(timings), 3),
+    )
+    return result
+
+
+def run_size(size, repeat, warm):
+    from django.core.management import call_command
+
+    call_command('flush', interactive=False, verbosity=0)
+    call_command(
+        'generatedb', seed=1, batch_size=10000, stdout=open(os.devnull, 'w'),
+        **SIZES[size]
+    )
+    anonymous, admin = make_clients()
+    results = {}
+    for route in build_routes(admin):
+        results[route.name] = measure_route(
+            admin if route.auth else anonymous, route, repeat, warm
+        )
+    return results
+
+
+def compare(results, baseline, tolerance, slack_ms, latency_key='p95_ms'):
+    """
+    Сравнивает результаты с базовыми и возвращает список нарушений.
+
+    Число запросов не должно расти совсем, задержка (`latency_key`,
+    по умолчанию p95) и пик памяти — больше чем в `tolerance` раз.
+    К бюджету задержки добавляется `slack_ms`, чтобы шум не ронял
+    проверку быстрых маршрутов.
+    """
+    failures = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result['status'] != expected['status']:
+            failures.append(
+                f"{name}: статус {result['status']} "
+                f"вместо {expected['status']}"
+            )
+        if result['queries'] > expected['queries']:
+            failures.append(
+                f"{name}: {result['queries']} SQL-запросов, "
+                f"бюджет {expected['queries']}"
+            )
+        for key, slack in ((latency_key, slack_ms), ('peak_kib', 0)):
+            budget = expected[key] * tolerance + slack
+            if result[key] > budget:
+                failures.append(
+                    f'{name}: {key} = {result[key]}, бюджет {budget:.1f}'
+                )
+    return failures
+
+
+def print_results(size, results):
+    print(f'\n== {size} ==')
+    print(f'{"маршрут":<22}{"код":>5}{"p50":>9}{"p95":>9}{"p99":>9}'
+          f'{"SQL":>5}{"KiB":>9}')
+    for name, result in results.items():
+        print(f'{name:<22}{result["status"]:>5}{result["p50_ms"]:>9.2f}'
+              f'{result["p95_ms"]:>9.2f}{result["p99_ms"]:>9.2f}'
+              f'{result["queries"]:>5}{result["peak_kib"]:>9.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--sizes', nargs='+', choices=SIZES, default=['small']
+    )
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=2.0,
+        help='Допустимый рост p95 и памяти относительно базовых значений'
+    )
+    parser.add_argument(
+        '--slack-ms',
+        type=float,
+        default=5.0,
+        help='Абсолютный запас к бюджету задержки, мс'
+    )
+    parser.add_argument(
+        '--warm',
+        action='store_true',
+        help='Не очищать кеш между повторами (по умолчанию — холодный кеш)'
+    )
+    parser.add_argument('--update-baselines', action='store_true')
+    args = parser.parse_args()
+    if args.update_baselines and args.repeat < MIN_P95_SAMPLES:
+        parser.error(
+            f'для --update-baselines нужно --repeat {MIN_P95_SAMPLES} '
+            'или больше'
+        )
+    latency_key = 'p95_ms' if args.repeat >= MIN_P95_SAMPLES else 'p50_ms'
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(directory)
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+        for size in args.sizes:
+            results = run_size(size, args.repeat, args.warm)
+            print_results(size, results)
+            path = os.path.join(BASELINE_DIR, f'endpoints_{size}.json')
+            if args.update_baselines:
+                os.makedirs(BASELINE_DIR, exist_ok=True)
+                with open(path, 'w', encoding='utf-8') as file:
+                    json.dump(results, file, indent=2, ensure_ascii=False)
+                    file.write('\n')
+                continue
+            if not os.path.exists(path):
+                print(f'Нет базового файла {path}, сравнение пропущено')
+                continue
+            with open(path, encoding='utf-8') as file:
+                failures += [
+                    f'[{size}] {failure}'
+                    for failure in compare(
+                        results, json.load(file), args.tolerance,
+                        args.slack_ms, latency_key
+                    )
+                ]
+    if failures:
+        print('\nБюджеты превышены:')
+        print('\n'.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Конкурентная нагрузка на SQLite: настройки по умолчанию и `api_yamdb.sqlite`.
+
+Скрипт заполняет временную базу командой `generatedb` и в каждом режиме
+запускает --workers потоков, которые через тестовый клиент Django
+(полный цикл запроса, как в потоках gunicorn) повторяют сценарий:
+чтение отзывов произведения, создание отзыва и комментария к нему,
+удаление отзыва. Запись отзыва и удаление — транзакции, которые
+обновляют и рейтинг произведения.
+
+- default — `django.db.backends.sqlite3`: журнал DELETE, новое
+  соединение на каждый запрос, `BEGIN` без блокировки записи;
+- tuned — бэкенд и параметры из `settings.DATABASES` (WAL,
+  synchronous=NORMAL, mmap, busy_timeout, BEGIN IMMEDIATE, повторы
+  при блокировке, CONN_MAX_AGE).
+
+Ошибки — ответы 5xx, в основном «database is locked»: с настройками по
+умолчанию их даёт ожидание блокировки дольше 5 секунд при 64 потоках.
+
+    python benchmarks/sqlite_concurrency.py --workers 16 --iterations 50
+    python benchmarks/sqlite_concurrency.py --workers 64 --iterations 10
+"""
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from endpoints import SIZES, percentile, setup_django
+
+MODES = ('default', 'tuned')
+DEFAULT_DATABASE = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'CONN_MAX_AGE': 0,
+    'OPTIONS': {},
+}
+
+
+def prepare_database(size, workers):
+    """Заполняет базу и создаёт по пользователю на поток."""
+    import os
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from api.authentication import get_access_token
+    from reviews.models import Title
+
+    call_command('migrate', verbosity=0)
+    call_command(
+        'generatedb', seed=1, batch_size=10000, stdout=open(os.devnull, 'w'),
+        **SIZES[size]
+    )
+    users = get_user_model().objects.bulk_create(
+        get_user_model()(username=f'bench{index}',
+                         email=f'bench{index}@yamdb.fake')
+        for index in range(workers)
+    )
+    users = get_user_model().objects.filter(
+        username__in=[user.username for user in users]
+    ).order_by('pk')
+    tokens = [str(get_access_token(user)) for user in users]
+    title_ids = list(Title.objects.values_list('pk', flat=True))
+    return tokens, title_ids
+
+
+def use_database(mode, name, tuned):
+    """Переключает соединения новых потоков на режим `mode`."""
+    from django.db import connections
+
+    connections.close_all()
+    if hasattr(connections._connections, 'default'):
+        del connections['default']
+    database = connections.databases['default']
+    database.update(DEFAULT_DATABASE if mode == 'default' else tuned)
+    database['NAME'] = name
+
+
+def worker(token, title_ids, iterations, seed, timings, statuses):
+    from rest_framework.test import APIClient
+
+    client = APIClient(raise_request_exception=False)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    rnd = random.Random(seed)
+
+    def call(method, path, data=None):
+        started = time.perf_counter()
+        response = getattr(client, method)(path, data, format='json')
+        timings.append(time.perf_counter() - started)
+        statuses.append(response.status_code)
+        return response
+
+    for _ in range(iterations):
+        reviews = f'/api/v1/titles/{rnd.choice(title_ids)}/reviews/'
+        call('get', reviews)
+        response = call('post', reviews, {'text': 'Отзыв', 'score': 7})
+        if response.status_code != 201:
+            continue
+        review = f"{reviews}{response.json()['id']}/"
+        call('post', f'{review}comments/', {'text': 'Комментарий'})
+        call('delete', review)
+
+
+def run_mode(tokens, title_ids, iterations):
+    timings, statuses = [], []
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(token, title_ids, iterations, seed, timings, statuses)
+        )
+        for seed, token in enumerate(tokens)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings, statuses, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', choices=SIZES, default='small')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(directory)
+        from django.conf import settings
+        from django.db import connections
+
+        settings.SQL_INSTRUMENTATION = {'SAMPLE_RATE': 0}
+        database = settings.DATABASES['default']
+        tuned = {
+            name: database[name]
+            for name in ('ENGINE', 'CONN_MAX_AGE', 'OPTIONS')
+        }
+        template = Path(directory) / 'template.sqlite3'
+        use_database('default', template, tuned)
+        tokens, title_ids = prepare_database(args.size, args.workers)
+        connections.close_all()
+
+        print(
+            f'{args.size}: потоков {args.workers}, '
+            f'{args.iterations} сценариев на поток'
+        )
+        print(
+            f'{"режим":<10}{"запр/с":>10}{"p50, мс":>10}{"p95, мс":>10}'
+            f'{"p99, мс":>10}{"ошибок":>8}'
+        )
+        for mode in args.modes:
+            name = Path(directory) / f'{mode}.sqlite3'
+            shutil.copy(template, name)
+            use_database(mode, name, tuned)
+            timings, statuses, elapsed = run_mode(
+                tokens, title_ids, args.iterations
+            )
+            timings = [value * 1000 for value in timings]
+            errors = sum(status >= 500 for status in statuses)
+            print(
+                f'{mode:<10}{len(statuses) / elapsed:>10.1f}'
+                f'{percentile(timings, 50):>10.2f}'
+                f'{percentile(timings, 95):>10.2f}'
+                f'{percentile(timings, 99):>10.2f}{errors:>8}'
+            )
+            sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
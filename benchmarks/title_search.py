@@ -0,0 +1,98 @@
+"""
+Сравнение поиска `TitleSearchFilter` с `SearchFilter` DRF.
+
+Скрипт создаёт временную базу SQLite, заполняет её командой
+`generatedb` и замеряет, сколько стоит поиск произведений тем же путём,
+что и в `TitleViewSet`: к набору `TitleViewSet.queryset` применяется
+фильтр из `api/filters.py` (FTS5 с ранжированием) или прежний
+`SearchFilter` по тем же полям `name` и `description` (icontains).
+Для каждого запроса измеряется первая страница списка с жанрами
+и категорией и COUNT(*) для пагинации.
+
+    python benchmarks/title_search.py --titles 100000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from endpoints import setup_django
+
+LIMIT = 10
+# Частое слово, префикс, два слова сразу и отсутствующее в каталоге.
+QUERIES = ('фильм', 'режисс', 'сюжет финал', 'отсутствует')
+
+
+class BaselineView:
+    """Настройки представления для `SearchFilter` до полнотекстового поиска."""
+
+    search_fields = ('name', 'description')
+
+
+def measure(call, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def measure_filter(backend, view, text, repeat):
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from api.views import TitleViewSet
+
+    request = Request(APIRequestFactory().get('/', {'search': text}))
+
+    def search():
+        return backend.filter_queryset(
+            request, TitleViewSet.queryset.all(), view
+        )
+
+    page, _ = measure(lambda: list(search()[:LIMIT]), repeat)
+    count_time, count = measure(lambda: search().count(), repeat)
+    return page, count_time, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(directory)
+        from django.core.management import call_command
+        from rest_framework.filters import SearchFilter
+
+        from api.filters import TitleSearchFilter
+
+        call_command('migrate', verbosity=0)
+        start = time.perf_counter()
+        call_command(
+            'generatedb', seed=args.seed, users=100, titles=args.titles,
+            reviews=args.titles, comments=0, stdout=open(os.devnull, 'w')
+        )
+        print(f'Каталог из {args.titles} произведений создан за '
+              f'{time.perf_counter() - start:.1f} с')
+        print(f'{"запрос":<14}{"совпадений":>12}'
+              f'{"SearchFilter: страница / count, мс":>38}'
+              f'{"TitleSearchFilter: страница / count, мс":>42}')
+        for text in QUERIES:
+            like_page, like_count, _ = measure_filter(
+                SearchFilter(), BaselineView(), text, args.repeat
+            )
+            match_page, match_count, count = measure_filter(
+                TitleSearchFilter(), None, text, args.repeat
+            )
+            print(f'{text:<14}{count:>12}'
+                  f'{like_page:>24.2f} / {like_count:<11.2f}'
+                  f'{match_page:>28.2f} / {match_count:<11.2f}')
+
+
+if __name__ == '__main__':
+    main()
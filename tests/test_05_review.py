@@ -111,6 +111,10 @@ class Test05ReviewAPI:
             'одно и то же произведение POST-запрос к '
             f'`{self.REVIEWS_URL_TEMPLATE}` вернёт ответ со статусом 400.'
         )
+        assert list(response.json()) == ['non_field_errors'], (
+            'Проверьте, что ошибка повторного отзыва возвращается в поле '
+            '`non_field_errors`.'
+        )
 
         try:
             from reviews.models import Review, Title
@@ -137,6 +141,13 @@ class Test05ReviewAPI:
             'которого уже существует.'
         )
 
+        from api.serializers import ReviewSerializer
+        with pytest.raises(IntegrityError):
+            ReviewSerializer().create({
+                'text': 'Без оценки', 'score': None, 'author': admin,
+                'title': Title.objects.get(pk=titles[1]['id'])
+            })
+
         response = admin_client.put(first_title_reviews_url, data=data)
         assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED, (
             'Проверьте, что PUT-запрос авторизованного пользователя к '
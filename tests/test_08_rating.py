@@ -0,0 +1,142 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_rating(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_review_changes(self, client, admin_client,
+                                              admin, user_client, user,
+                                              moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        assert self.get_rating(client, title_id) == 5, (
+            'Проверьте, что рейтинг произведения обновляется при создании '
+            'отзыва.'
+        )
+
+        response = admin_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[0]['id']
+            ),
+            data={'score': 8}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(client, title_id) == 6, (
+            'Проверьте, что рейтинг произведения обновляется при изменении '
+            'оценки отзыва.'
+        )
+
+        response = admin_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[0]['id']
+            )
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(client, title_id) == 5, (
+            'Проверьте, что рейтинг произведения обновляется при удалении '
+            'отзыва.'
+        )
+
+        user.delete()
+        moderator.delete()
+        assert self.get_rating(client, title_id) is None, (
+            'Проверьте, что рейтинг произведения обновляется при каскадном '
+            'удалении отзывов вместе с автором.'
+        )
+
+    def test_02_rebuild_ratings(self, client, admin_client, admin,
+                                user_client, user):
+        from reviews.models import Title
+
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        Title.objects.filter(pk=title_id).update(score_sum=0, review_count=7)
+        call_command('rebuild_ratings')
+        assert self.get_rating(client, title_id) == 5, (
+            'Проверьте, что команда `rebuild_ratings` пересчитывает рейтинг '
+            'произведений по отзывам.'
+        )
+
+    def test_03_title_list_without_reviews_join(self, client, admin_client,
+                                                admin, user_client, user):
+        create_reviews(admin_client, {admin: admin_client, user: user_client})
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.TITLES_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert not any(
+            'reviews_review' in query['sql']
+            for query in context.captured_queries
+        ), (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` не обращается '
+            'к таблице отзывов для вычисления рейтинга.'
+        )
+
+    def test_04_stale_instances_keep_rating(self, client, admin_client,
+                                            admin, user_client, user):
+        from reviews.models import Review, Title
+
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        first = Review.objects.get(pk=review_id)
+        second = Review.objects.get(pk=review_id)
+        first.score = 8
+        first.save()
+        second.score = 6
+        second.save()
+        title = Title.objects.get(pk=title_id)
+        expected = sum(
+            Review.objects.filter(title_id=title_id).values_list(
+                'score', flat=True
+            )
+        )
+        assert title.score_sum == expected, (
+            'Проверьте, что изменение оценки считается от сохранённой '
+            'в базе оценки, а не от загруженной в устаревший экземпляр.'
+        )
+
+        deferred = Title.objects.defer('description').get(pk=title_id)
+        Title.objects.filter(pk=title_id).update(score_sum=100)
+        deferred.name = 'Новое название'
+        deferred.save()
+        title.refresh_from_db()
+        assert (title.name, title.score_sum) == ('Новое название', 100), (
+            'Проверьте, что сохранение произведения с отложенными полями '
+            'не перезаписывает агрегаты рейтинга.'
+        )
+
+        Title.objects.filter(pk=title_id).delete()
+        title.save()
+        assert Title.objects.filter(pk=title_id).exists(), (
+            'Проверьте, что сохранение произведения, строка которого '
+            'удалена, создаёт её заново.'
+        )
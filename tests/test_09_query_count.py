@@ -0,0 +1,114 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_titles
+
+
+def count_queries(client, url, method='get', data=None):
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data=data)
+    return response, len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryCount:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def test_01_title_list_constant_queries(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        client.get(self.TITLES_URL)
+        client.get(f'{self.TITLES_URL}?genre={genres[0]["slug"]}')
+        _, one_title = count_queries(client, f'{self.TITLES_URL}?limit=1')
+        response, all_titles = count_queries(
+            client, f'{self.TITLES_URL}?limit={len(titles)}'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert one_title == all_titles, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` выполняет '
+            'одинаковое количество SQL-запросов независимо от размера '
+            'страницы: категории и жанры должны загружаться одним запросом.'
+        )
+
+        _, filtered = count_queries(
+            client, f'{self.TITLES_URL}?genre={genres[0]["slug"]}'
+        )
+        assert filtered == all_titles, (
+            f'Проверьте, что фильтрация `{self.TITLES_URL}` не добавляет '
+            'SQL-запросов на каждое произведение.'
+        )
+
+    def test_02_title_write_representation(self, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        data = {
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': [genre['slug'] for genre in genres],
+            'category': categories[0]['slug'],
+        }
+        response, post_queries = count_queries(
+            admin_client, self.TITLES_URL, 'post', data
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(response.json()['genre']) == len(genres)
+        response, patch_queries = count_queries(
+            admin_client,
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            'patch',
+            {'genre': [genres[2]['slug']]}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['genre'] == [genres[2]], (
+            'Проверьте, что ответ на PATCH-запрос к '
+            f'`{self.TITLE_DETAIL_URL_TEMPLATE}` содержит обновлённые жанры.'
+        )
+        # Из них до пяти запросов — таблицы лидеров и статистика
+        # категории и жанров, и по два на каждый удалённый жанр.
+        assert post_queries <= 15 and patch_queries <= 19, (
+            'Проверьте, что ответ на запись произведения не выполняет '
+            'лишних SQL-запросов.'
+        )
+
+    def test_03_nested_routes_query_budget(self, client, admin_client, admin,
+                                           user_client, user,
+                                           moderator_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        review_url = f'{reviews_url}{reviews[0]["id"]}/'
+        comments_url = f'{review_url}comments/'
+        comment_url = f'{comments_url}{comments[0]["id"]}/'
+        # Запросы: пользователь, родительский объект, COUNT/max(updated_at)
+        # (у отзывов COUNT ограничен порогом и идёт отдельно), страница;
+        # запись — ещё BEGIN, INSERT, пересчёт рейтинга, таблиц
+        # лидеров и статистики категории и жанров; отклонённый повторный
+        # отзыв — ещё проверку, что ошибку вызвал именно он; изменение
+        # отзыва — ещё чтение прежней оценки под блокировкой.
+        budgets = (
+            ('get', client, reviews_url, None, HTTPStatus.OK, 4),
+            ('get', client, review_url, None, HTTPStatus.OK, 1),
+            ('post', moderator_client, reviews_url, {'text': 'Ок', 'score': 3},
+             HTTPStatus.CREATED, 8),
+            ('post', moderator_client, reviews_url, {'text': 'Ок', 'score': 3},
+             HTTPStatus.BAD_REQUEST, 5),
+            ('patch', admin_client, review_url, {'score': 2}, HTTPStatus.OK,
+             9),
+            ('get', client, comments_url, None, HTTPStatus.OK, 3),
+            ('get', client, comment_url, None, HTTPStatus.OK, 1),
+            ('post', moderator_client, comments_url, {'text': 'Ок'},
+             HTTPStatus.CREATED, 3),
+        )
+        for method, api_client, url, data, status, budget in budgets:
+            response, queries = count_queries(api_client, url, method, data)
+            assert response.status_code == status
+            assert queries <= budget, (
+                f'Проверьте, что {method.upper()}-запрос к `{url}` выполняет '
+                f'не больше {budget} SQL-запросов, сейчас — {queries}.'
+            )
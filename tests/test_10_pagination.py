@@ -0,0 +1,216 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.core.cache.backends import locmem
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from tests.utils import create_reviews
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    """Общий для процессов кеш: выборки ETag тогда тоже кешируются."""
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path / 'cache'),
+    }}
+
+
+def walk_cursor_pages(client, url):
+    results = []
+    pages = 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что в курсорном режиме пагинации не вычисляется '
+            'общее количество объектов.'
+        )
+        results.extend(data['results'])
+        url = data['next']
+        pages += 1
+    return results, pages
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_titles_cursor_mode(self, client, admin_client, admin,
+                                   user_client, user):
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        results, pages = walk_cursor_pages(
+            client, f'{self.TITLES_URL}?pagination=cursor&limit=1'
+        )
+        assert pages == len(titles)
+        assert [title['name'] for title in results] == sorted(
+            title['name'] for title in titles
+        ), (
+            f'Проверьте, что курсорная пагинация `{self.TITLES_URL}` '
+            'возвращает все произведения в порядке сортировки по названию.'
+        )
+
+        response = client.get(f'{self.TITLES_URL}?limit=1&offset=1')
+        data = response.json()
+        assert data['count'] == len(titles), (
+            f'Проверьте, что пагинация limit/offset для `{self.TITLES_URL}` '
+            'работает для клиентов, не включивших курсорный режим.'
+        )
+
+    def test_02_reviews_cursor_mode(self, client, admin_client, admin,
+                                    user_client, user, moderator_client,
+                                    moderator):
+        reviews, titles = create_reviews(
+            admin_client,
+            {
+                admin: admin_client,
+                user: user_client,
+                moderator: moderator_client
+            }
+        )
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        results, pages = walk_cursor_pages(
+            client, f'{url}?pagination=cursor&limit=2'
+        )
+        assert pages == 2
+        assert [review['id'] for review in results] == [
+            review['id'] for review in reversed(reviews)
+        ], (
+            f'Проверьте, что курсорная пагинация `{self.REVIEWS_URL_TEMPLATE}`'
+            ' возвращает отзывы от новых к старым без пропусков и повторов.'
+        )
+
+        response = client.get(f'{url}?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CachedCount:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def test_01_count_cached_and_invalidated(self, shared_cache, client,
+                                             admin_client, admin,
+                                             user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{url}?offset=1')
+        assert response.json()['count'] == len(reviews)
+        assert not any(
+            'COUNT(' in query['sql'] for query in context.captured_queries
+        ), (
+            f'Проверьте, что `count` для `{self.REVIEWS_URL_TEMPLATE}` '
+            'берётся из кеша при повторном запросе.'
+        )
+
+        admin_client.delete(self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        ))
+        response = client.get(url)
+        assert response.json()['count'] == len(reviews) - 1, (
+            'Проверьте, что закешированное значение `count` сбрасывается '
+            'при удалении отзыва.'
+        )
+
+    def test_02_count_threshold(self, admin_client, admin, user_client,
+                                user, moderator_client, moderator):
+        from api.pagination import CachedCountReviewPagination
+        from reviews.models import Review
+
+        create_reviews(admin_client, {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        })
+        paginator = CachedCountReviewPagination()
+        paginator.count_threshold = 1
+        request = Request(APIRequestFactory().get('/reviews/?limit=1'))
+        page = paginator.paginate_queryset(Review.objects.all(), request)
+        data = paginator.get_paginated_response(page).data
+        assert len(data['results']) == 1
+        assert data['count'] is None, (
+            'Проверьте, что при превышении порога `count` не вычисляется.'
+        )
+        assert data['next'], (
+            'Проверьте, что при превышении порога ссылка на следующую '
+            'страницу сохраняется.'
+        )
+
+    def test_03_count_process_local_cache(self, settings, monkeypatch,
+                                          admin_client, admin, user_client,
+                                          user):
+        from api.pagination import (CachedCountMixin,
+                                    CachedCountReviewPagination)
+        from reviews.models import Review
+
+        reviews = create_reviews(admin_client, {
+            admin: admin_client, user: user_client
+        })[0]
+        request = Request(APIRequestFactory().get('/reviews/'))
+        paginator = CachedCountReviewPagination()
+        assert paginator.get_cached_count(
+            Review.objects.all(), request
+        ) == len(reviews)
+        # Изменение в другом процессе: версии моделей здесь не меняются.
+        assert paginator.get_cached_count(
+            Review.objects.none(), request
+        ) == len(reviews)
+        now = time.time()
+        monkeypatch.setattr(
+            locmem.time, 'time',
+            lambda: now + settings.LOCAL_CACHE_TIMEOUT + 1
+        )
+        assert paginator.get_cached_count(
+            Review.objects.none(), request
+        ) == 0, (
+            'Проверьте, что с локальным кешем процесса `count` хранится '
+            'не дольше `LOCAL_CACHE_TIMEOUT` секунд.'
+        )
+
+        assert CachedCountMixin().get_count_window(request) == 0, (
+            'Проверьте, что окно подсчёта по умолчанию берётся из '
+            '`count_window`.'
+        )
+
+    def test_04_count_threshold_endpoint(self, monkeypatch, client,
+                                         admin_client, admin, user_client,
+                                         user, moderator_client, moderator):
+        from api.pagination import CachedCountReviewPagination
+
+        reviews, titles = create_reviews(admin_client, {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        })
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        monkeypatch.setattr(CachedCountReviewPagination, 'count_threshold', 1)
+        data = client.get(url, {'limit': 1}).json()
+        assert data['count'] is None, (
+            f'Проверьте, что `{self.REVIEWS_URL_TEMPLATE}` не считает '
+            'отзывы дальше `count_threshold`: для длинного списка `count` '
+            'равен None.'
+        )
+        assert data['next'] and len(data['results']) == 1
+        data = client.get(url, {'limit': 2, 'offset': 1}).json()
+        assert data['count'] == len(reviews), (
+            'Проверьте, что `count` вычисляется точно, если страница '
+            'доходит до конца списка.'
+        )
+        monkeypatch.setattr(CachedCountReviewPagination, 'count_threshold', 10)
+        assert client.get(url).json()['count'] == len(reviews)
@@ -0,0 +1,56 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def search(self, client, text):
+        response = client.get(self.TITLES_URL, {'search': text})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с параметром '
+            '`search` возвращает ответ со статусом 200.'
+        )
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_titles(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        assert self.search(client, 'терминат') == [titles[0]['name']], (
+            'Проверьте, что поиск находит произведение по началу слова '
+            'из названия.'
+        )
+        assert self.search(client, 'yippie') == [titles[1]['name']], (
+            'Проверьте, что поиск находит произведение по описанию.'
+        )
+        assert self.search(client, '"*) OR (') == [], (
+            'Проверьте, что служебные символы в поисковой строке не '
+            'приводят к ошибке.'
+        )
+
+    def test_02_search_ranking_and_sync(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[1]['id']),
+            data={'description': 'Совсем не Терминатор'}
+        )
+        assert self.search(client, 'терминатор') == [
+            titles[0]['name'], titles[1]['name']
+        ], (
+            'Проверьте, что совпадение в названии ранжируется выше '
+            'совпадения в описании и индекс обновляется при изменении.'
+        )
+
+        admin_client.delete(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+        call_command('rebuild_search_index')
+        assert self.search(client, 'терминатор') == [titles[1]['name']], (
+            'Проверьте, что удалённое произведение исключается из индекса.'
+        )
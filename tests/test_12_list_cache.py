@@ -0,0 +1,131 @@
+from http import HTTPStatus
+
+import time
+
+import pytest
+from django.core.cache.backends import locmem
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import get_models_version
+from api.checks import check_shared_cache
+from reviews.models import Category, Genre, GenreTitle, Title
+from tests.utils import create_categories
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ListCache:
+
+    CATEGORY_URL = '/api/v1/categories/'
+    CATEGORY_DETAIL_URL_TEMPLATE = '/api/v1/categories/{slug}/'
+    CACHE_STATS_URL = '/api/v1/cache/stats/'
+
+    def test_01_category_list_cached(self, client, admin_client):
+        categories = create_categories(admin_client)
+        response = client.get(self.CATEGORY_URL)
+        assert response['X-Cache'] == 'MISS'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.CATEGORY_URL)
+        assert response['X-Cache'] == 'HIT'
+        assert response.json()['count'] == len(categories)
+        assert not context.captured_queries, (
+            f'Проверьте, что повторный GET-запрос к `{self.CATEGORY_URL}` '
+            'обслуживается из кеша без обращения к базе данных.'
+        )
+
+        response = client.get(
+            self.CATEGORY_URL, {'search': categories[0]['name']}
+        )
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == 1
+
+        admin_client.delete(
+            self.CATEGORY_DETAIL_URL_TEMPLATE.format(
+                slug=categories[0]['slug']
+            )
+        )
+        response = client.get(self.CATEGORY_URL)
+        assert response.json()['count'] == len(categories) - 1, (
+            f'Проверьте, что кеш `{self.CATEGORY_URL}` сбрасывается при '
+            'удалении категории.'
+        )
+        admin_client.post(
+            self.CATEGORY_URL, data={'name': 'Музыка', 'slug': 'music'}
+        )
+        response = client.get(self.CATEGORY_URL)
+        assert response.json()['count'] == len(categories), (
+            f'Проверьте, что кеш `{self.CATEGORY_URL}` сбрасывается при '
+            'создании категории.'
+        )
+
+    def test_02_cache_stats(self, client, user_client, admin_client):
+        client.get(self.CATEGORY_URL)
+        client.get(self.CATEGORY_URL)
+        response = user_client.get(self.CACHE_STATS_URL)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.get(self.CACHE_STATS_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['categories-list'] == {
+            'hits': 1, 'misses': 1, 'hit_ratio': 0.5
+        }
+
+    def test_03_process_local_cache(self, settings, monkeypatch, client,
+                                    admin_client):
+        categories = create_categories(admin_client)
+        client.get(self.CATEGORY_URL)
+        # Запись в другом процессе: сигналы этого процесса не срабатывают.
+        Category.objects.bulk_create([Category(name='Музыка', slug='music')])
+        response = client.get(self.CATEGORY_URL)
+        assert response['X-Cache'] == 'HIT'
+        now = time.time()
+        monkeypatch.setattr(
+            locmem.time, 'time',
+            lambda: now + settings.LOCAL_CACHE_TIMEOUT + 1
+        )
+        response = client.get(self.CATEGORY_URL)
+        assert response.json()['count'] == len(categories) + 1, (
+            'Проверьте, что с локальным кешем процесса список хранится '
+            'не дольше `LOCAL_CACHE_TIMEOUT` секунд'
+        )
+
+        assert check_shared_cache(None) == []
+        settings.SERVER_WORKERS = 2
+        assert [error.id for error in check_shared_cache(None)] == [
+            'api.E001'
+        ], (
+            'Проверьте, что проверка `manage.py check` запрещает несколько '
+            'рабочих процессов с локальным кешем'
+        )
+
+    def test_04_version_bumped_on_commit(
+            self, django_capture_on_commit_callbacks):
+        models = (Category, Genre, GenreTitle, Title)
+        before = get_models_version(models)
+        with transaction.atomic():
+            with django_capture_on_commit_callbacks() as callbacks:
+                category = Category.objects.create(name='Кино', slug='kino')
+                genre = Genre.objects.create(name='Драма', slug='drama')
+                title = Title.objects.create(
+                    name='Фильм', year=2000, category=category
+                )
+                title.genre.set([genre])
+            assert get_models_version(models) == before, (
+                'Проверьте, что версии моделей увеличиваются только после '
+                'фиксации транзакции, а не внутри неё.'
+            )
+            assert callbacks
+        after = get_models_version(models)
+        assert all(
+            int(new) > int(old)
+            for old, new in zip(before.split('.'), after.split('.'))
+        ), (
+            'Проверьте, что после фиксации транзакции версии изменённых '
+            'моделей и жанров произведения увеличены.'
+        )
+
+        before = get_models_version(models)
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Category.objects.create(name='Музыка', slug='music')
+                raise RuntimeError
+        assert get_models_version(models) == before
@@ -0,0 +1,133 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from reviews.models import Review
+from tests.utils import create_comments, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ConditionalGet:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def check_not_modified(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        etag = response.get('ETag')
+        assert etag, f'Проверьте, что ответ на GET-запрос к `{url}` содержит ETag.'
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        return etag
+
+    def test_01_conditional_get(self, client, admin_client, admin,
+                                user_client, user, moderator_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_url = self.TITLE_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        comments_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        )
+        title_etag = self.check_not_modified(client, title_url)
+        reviews_etag = self.check_not_modified(client, reviews_url)
+        comments_etag = self.check_not_modified(client, comments_url)
+
+        response = client.get(title_url)
+        response = client.get(
+            title_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{title_url}` с актуальным '
+            '`If-Modified-Since` возвращает ответ со статусом 304.'
+        )
+
+        create_single_review(moderator_client, titles[0]['id'], 'new', 1)
+        for url, etag in (
+            (title_url, title_etag), (reviews_url, reviews_etag)
+        ):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после нового отзыва GET-запрос к `{url}` '
+                'со старым ETag возвращает ответ со статусом 200.'
+            )
+        assert client.get(title_url).json()['rating'] == 3
+
+        admin_client.delete(f'{comments_url}{comments[0]["id"]}/')
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=comments_etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после удаления комментария GET-запрос к '
+            f'`{comments_url}` со старым ETag возвращает ответ со статусом '
+            '200.'
+        )
+
+    def test_02_write_in_other_process(self, client, admin_client, admin,
+                                       user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        etag = self.check_not_modified(client, reviews_url)
+        # UPDATE без сигналов — как запись в другом рабочем процессе,
+        # которая не меняет версии моделей в локальном кеше этого.
+        Review.objects.filter(pk=reviews[0]['id']).update(
+            text='Изменён', updated_at=timezone.now()
+        )
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что с локальным кешем процесса выборка для ETag '
+            'списка не кешируется и запись в другом процессе меняет ETag.'
+        )
+
+    def test_03_cursor_mode_no_count(self, client, admin_client, admin,
+                                     user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        for url in (
+            '/api/v1/titles/?pagination=cursor&limit=1',
+            f'{reviews_url}?pagination=cursor&limit=1',
+        ):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            assert not [
+                query['sql'] for query in context.captured_queries
+                if 'COUNT(' in query['sql'] or 'MAX(' in query['sql']
+            ], (
+                f'Проверьте, что GET-запрос к `{url}` в курсорном режиме '
+                'не выполняет COUNT(*) и агрегаты по всему списку.'
+            )
+            self.check_not_modified(client, url)
+
+        url = f'{reviews_url}?pagination=cursor&limit=1'
+        etag = client.get(url)['ETag']
+        page = client.get(url).json()['results']
+        Review.objects.filter(pk=page[0]['id']).update(
+            text='Изменён', updated_at=timezone.now()
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что в курсорном режиме изменение строки страницы '
+            'меняет ETag.'
+        )
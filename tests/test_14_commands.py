@@ -0,0 +1,79 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14Commands:
+
+    def test_01_loaddb(self, client):
+        from reviews.models import Comment, GenreTitle, Review, Title
+
+        out = StringIO()
+        call_command('loaddb', batch_size=10, stdout=out)
+        assert 'строк/с' in out.getvalue(), (
+            'Проверьте, что команда `loaddb` сообщает скорость загрузки.'
+        )
+        assert Title.objects.count() == 32
+        assert Review.objects.count() == 72
+        assert Comment.objects.exists() and GenreTitle.objects.exists()
+        title = Title.objects.get(pk=1)
+        assert title.review_count == Review.objects.filter(
+            title=title
+        ).count(), (
+            'Проверьте, что после `loaddb` пересчитываются рейтинги '
+            'произведений.'
+        )
+        assert str(Review.objects.get(pk=1).pub_date.date()) == '2019-09-24', (
+            'Проверьте, что `loaddb` сохраняет дату публикации из CSV.'
+        )
+
+        call_command('loaddb', stdout=StringIO())
+        assert Review.objects.count() == 72, (
+            'Проверьте, что повторный запуск `loaddb` не дублирует данные.'
+        )
+
+    def test_02_generatedb(self):
+        from django.db.models import Count, Sum
+
+        from reviews.models import Comment, Review, Title
+
+        options = {
+            'seed': 7, 'users': 30, 'titles': 40, 'reviews': 300,
+            'comments': 50, 'batch_size': 64, 'stdout': StringIO()
+        }
+        call_command('generatedb', **options)
+        assert Title.objects.count() == 40
+        assert Comment.objects.count() == 50
+        reviews = Review.objects.count()
+        assert 250 <= reviews <= 350, (
+            'Проверьте, что `generatedb` создаёт запрошенное количество '
+            'отзывов.'
+        )
+        assert not Review.objects.values('title', 'author').annotate(
+            total=Count('id')
+        ).filter(total__gt=1).exists()
+        counts = sorted(
+            Title.objects.values_list('review_count', flat=True),
+            reverse=True
+        )
+        assert counts[0] >= 5 * counts[len(counts) // 2], (
+            'Проверьте, что отзывы распределены по произведениям неравномерно.'
+        )
+        assert Title.objects.aggregate(total=Sum('score_sum'))['total'] == (
+            Review.objects.aggregate(total=Sum('score'))['total']
+        )
+        scores = list(Review.objects.order_by('id').values_list(
+            'score', flat=True
+        ))
+
+        Review.objects.all().delete()
+        Title.objects.all().delete()
+        call_command('generatedb', **options)
+        assert list(Review.objects.order_by('id').values_list(
+            'score', flat=True
+        )) == scores, (
+            'Проверьте, что `generatedb` с одинаковым `seed` генерирует '
+            'одинаковые данные.'
+        )
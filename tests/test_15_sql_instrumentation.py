@@ -0,0 +1,85 @@
+import json
+import logging
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+
+from api.middleware import HybridMiddleware
+from tests.utils import create_titles
+
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15SqlInstrumentation:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_server_timing(self, client, admin_client):
+        create_titles(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.TITLES_URL)
+        header = response.get('Server-Timing')
+        assert header, (
+            'Проверьте, что ответ содержит заголовок `Server-Timing`.'
+        )
+        match = SERVER_TIMING_DB.search(header)
+        assert match, (
+            'Проверьте, что `Server-Timing` содержит метрику `db` с '
+            'длительностью и числом SQL-запросов.'
+        )
+        assert int(match.group(2)) == len(context.captured_queries), (
+            'Проверьте, что в `Server-Timing` указано фактическое число '
+            'SQL-запросов.'
+        )
+        assert 'total;dur=' in header
+        assert 'dbdup' not in header
+
+    def test_02_duplicates_logged(self, client, admin_client, settings,
+                                  caplog):
+        create_titles(admin_client)
+        settings.SQL_INSTRUMENTATION = {'DUPLICATE_THRESHOLD': 1}
+        caplog.clear()
+        with caplog.at_level(logging.INFO, logger='api.sql'):
+            response = client.get(self.TITLES_URL)
+        assert 'dbdup' in response['Server-Timing']
+        records = [
+            json.loads(record.getMessage()) for record in caplog.records
+            if record.name == 'api.sql'
+        ]
+        assert len(records) == 1, (
+            'Проверьте, что на каждый запрос пишется одна строка лога '
+            '`api.sql`.'
+        )
+        record = records[0]
+        assert record['route'] == 'titles-list'
+        assert record['status'] == 200
+        assert record['duplicates'], (
+            'Проверьте, что повторяющиеся SQL-запросы попадают в лог.'
+        )
+        assert caplog.records[-1].levelno == logging.WARNING
+
+    def test_03_sampling(self, client, settings):
+        settings.SQL_INSTRUMENTATION = {'SAMPLE_RATE': 0}
+        response = client.get(self.TITLES_URL)
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что при `SAMPLE_RATE` = 0 запросы не '
+            'инструментируются.'
+        )
+
+    def test_04_hybrid_pass_through(self):
+        response = HttpResponse()
+
+        async def get_response(request):
+            return response
+
+        assert HybridMiddleware(lambda request: response)(None) is response
+        middleware = HybridMiddleware(get_response)
+        assert async_to_sync(middleware)(None) is response, (
+            'Проверьте, что `HybridMiddleware` по умолчанию передаёт запрос '
+            'дальше и под WSGI, и под ASGI.'
+        )
@@ -0,0 +1,90 @@
+import pstats
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.fixture(autouse=True)
+def profiles_dir(settings, tmp_path):
+    settings.PROFILING = {'DIR': tmp_path, 'SAMPLE_INTERVAL': 0.0005}
+    return tmp_path
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Profiling:
+
+    TITLES_URL = '/api/v1/titles/'
+    PROFILES_URL = '/api/v1/profiles/'
+    PROFILE_URL_TEMPLATE = '/api/v1/profiles/{profile_id}/'
+
+    def test_01_cprofile(self, admin_client, profiles_dir):
+        create_titles(admin_client)
+        response = admin_client.get(
+            self.TITLES_URL, {'genre': 'fantasy'}, HTTP_X_PROFILE='cprofile'
+        )
+        assert response.status_code == HTTPStatus.OK
+        profile_id = response.get('X-Profile-Id')
+        assert profile_id, (
+            'Проверьте, что при заголовке `X-Profile` ответ администратору '
+            'содержит заголовок `X-Profile-Id`.'
+        )
+        response = admin_client.get(self.PROFILES_URL)
+        assert response.status_code == HTTPStatus.OK
+        profiles = response.json()
+        assert profiles[0]['id'] == profile_id
+        assert profiles[0]['mode'] == 'cprofile'
+        assert profiles[0]['path'].startswith(self.TITLES_URL)
+
+        response = admin_client.get(
+            self.PROFILE_URL_TEMPLATE.format(profile_id=profile_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        path = profiles_dir / 'downloaded.prof'
+        path.write_bytes(b''.join(response.streaming_content))
+        stats = pstats.Stats(str(path))
+        assert stats.total_calls > 0, (
+            'Проверьте, что скачанный профиль читается модулем `pstats`.'
+        )
+
+    def test_02_sampler(self, admin_client):
+        response = admin_client.get(self.TITLES_URL, HTTP_X_PROFILE='sample')
+        profile_id = response['X-Profile-Id']
+        response = admin_client.get(
+            self.PROFILE_URL_TEMPLATE.format(profile_id=profile_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        content = b''.join(response.streaming_content).decode()
+        for line in content.splitlines():
+            stack, count = line.rsplit(' ', 1)
+            assert int(count) > 0
+
+    def test_03_not_admin(self, client, user_client, profiles_dir):
+        for api_client in (client, user_client):
+            response = api_client.get(
+                self.TITLES_URL, HTTP_X_PROFILE='cprofile'
+            )
+            assert response.status_code == HTTPStatus.OK
+            assert 'X-Profile-Id' not in response, (
+                'Проверьте, что профилирование доступно только '
+                'администраторам.'
+            )
+        assert not list(profiles_dir.iterdir())
+        response = user_client.get(self.PROFILES_URL)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        response = client.get(
+            self.PROFILE_URL_TEMPLATE.format(profile_id='0' * 32)
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_04_retention(self, admin_client, settings, profiles_dir):
+        settings.PROFILING = {'DIR': profiles_dir, 'MAX_PROFILES': 2}
+        for _ in range(4):
+            admin_client.get(self.TITLES_URL, HTTP_X_PROFILE='cprofile')
+        response = admin_client.get(self.PROFILES_URL)
+        assert len(response.json()) == 2, (
+            'Проверьте, что хранятся только последние `MAX_PROFILES` '
+            'профилей.'
+        )
+        assert len(list(profiles_dir.iterdir())) == 4
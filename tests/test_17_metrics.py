@@ -0,0 +1,99 @@
+import multiprocessing
+import re
+
+import pytest
+
+from api.metrics import REQUESTS_TOTAL, MetricsStore, store
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(settings, tmp_path):
+    settings.METRICS = {'DIR': tmp_path, 'FLUSH_INTERVAL': 0}
+    store.pid = None
+    return tmp_path
+
+
+def get_sample(text, name, **labels):
+    pattern = re.escape(name) + r'\{([^}]*)\} ([\d.e+-]+)'
+    for match in re.finditer(pattern, text):
+        pairs = dict(re.findall(r'(\w+)="([^"]*)"', match.group(1)))
+        if pairs == labels:
+            return float(match.group(2))
+    return None
+
+
+def increment_in_child(directory):
+    store = MetricsStore(directory)
+    store.inc(
+        REQUESTS_TOTAL,
+        {'route': 'titles-list', 'method': 'GET', 'status': '200'},
+        5
+    )
+    store.flush()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Metrics:
+
+    METRICS_URL = '/metrics'
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_request_metrics(self, client):
+        client.get(self.TITLES_URL)
+        client.get(self.TITLES_URL)
+        client.get('/api/v1/titles/100500/')
+        response = client.get(self.METRICS_URL)
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        assert '# TYPE yamdb_http_request_duration_seconds histogram' in text
+        assert get_sample(
+            text, 'yamdb_http_requests_total',
+            method='GET', route='titles-list', status='200'
+        ) == 2, (
+            'Проверьте, что запросы учитываются по имени маршрута и коду '
+            'ответа.'
+        )
+        assert get_sample(
+            text, 'yamdb_http_requests_total',
+            method='GET', route='titles-detail', status='404'
+        ) == 1
+        assert get_sample(
+            text, 'yamdb_http_request_duration_seconds_bucket',
+            method='GET', route='titles-list', status='200', le='+Inf'
+        ) == 2
+        assert get_sample(
+            text, 'yamdb_db_queries_total', route='titles-list'
+        ) > 0, 'Проверьте, что метрики содержат число SQL-запросов.'
+
+    def test_02_cache_hit_ratio(self, client):
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/categories/')
+        text = client.get(self.METRICS_URL).content.decode()
+        assert get_sample(
+            text, 'yamdb_cache_hit_ratio', cache='categories-list'
+        ) == 0.5
+
+    def test_03_multiple_processes(self, client, metrics_dir):
+        client.get(self.TITLES_URL)
+        process = multiprocessing.get_context('fork').Process(
+            target=increment_in_child, args=(metrics_dir,)
+        )
+        process.start()
+        process.join()
+        text = client.get(self.METRICS_URL).content.decode()
+        assert get_sample(
+            text, 'yamdb_http_requests_total',
+            method='GET', route='titles-list', status='200'
+        ) == 6, (
+            'Проверьте, что счётчики суммируются по всем рабочим процессам.'
+        )
+
+    def test_04_email_queue_depth(self, client):
+        client.post('/api/v1/auth/signup/', data={
+            'username': 'metrics', 'email': 'metrics@yamdb.fake'
+        })
+        text = client.get(self.METRICS_URL).content.decode()
+        assert 'yamdb_email_queue_depth 1.0' in text, (
+            'Проверьте, что метрики содержат длину очереди писем.'
+        )
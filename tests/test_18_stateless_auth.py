@@ -0,0 +1,155 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.authentication import get_access_token
+from tests.utils import create_titles
+
+USER_TABLE = '"users_user"'
+
+
+def get_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {get_access_token(user)}'
+    )
+    return client
+
+
+def get_user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if USER_TABLE in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18StatelessAuth:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+    USER_DETAIL_URL_TEMPLATE = '/api/v1/users/{username}/'
+    ME_URL = '/api/v1/users/me/'
+
+    def test_01_token_flow(self, client, django_user_model):
+        data = {'username': 'stateless', 'email': 'stateless@yamdb.fake'}
+        client.post('/api/v1/auth/signup/', data=data)
+        user = django_user_model.objects.get(username=data['username'])
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': user.generate_confirmation_token,
+        })
+        assert response.status_code == HTTPStatus.OK
+        api_client = APIClient()
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(self.TITLES_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert not get_user_queries(context), (
+            'Проверьте, что токен из `/auth/token/` содержит роль и флаги '
+            'пользователя и аутентификация не обращается к таблице '
+            'пользователей.'
+        )
+
+    def test_02_no_user_queries(self, admin, user):
+        admin_client = get_client(admin)
+        titles, _, _ = create_titles(admin_client)
+        user_client = get_client(user)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Тест', 'score': 7})
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
+        assert not get_user_queries(context), (
+            'Проверьте, что создание отзыва не загружает пользователя '
+            'из базы данных.'
+        )
+        review_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=response.json()['id']
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.patch(review_url, data={'score': 9})
+        assert response.status_code == HTTPStatus.OK
+        assert len(get_user_queries(context)) <= 1, (
+            'Проверьте, что при изменении отзыва пользователь не '
+            'загружается для аутентификации.'
+        )
+
+    def test_03_role_from_claims(self, admin, user, moderator):
+        titles, _, _ = create_titles(get_client(admin))
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        response = get_client(user).post(
+            url, data={'text': 'Тест', 'score': 7}
+        )
+        review_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=response.json()['id']
+        )
+        response = get_client(moderator).delete(review_url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        response = get_client(user).post(
+            self.TITLES_URL, data={'name': 'Тест', 'year': 2000}
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        response = get_client(user).get(self.ME_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email
+
+    def test_04_role_change_revokes_tokens(self, admin, user):
+        user_client = get_client(user)
+        assert user_client.get(self.ME_URL).status_code == HTTPStatus.OK
+        response = get_client(admin).patch(
+            self.USER_DETAIL_URL_TEMPLATE.format(username=user.username),
+            data={'role': 'moderator'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = user_client.get(self.ME_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что после смены роли ранее выданные токены '
+            'пользователя перестают действовать.'
+        )
+        user.refresh_from_db()
+        response = get_client(user).get(self.ME_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['role'] == 'moderator'
+
+    def test_05_profile_change_keeps_tokens(self, user):
+        user_client = get_client(user)
+        response = user_client.patch(self.ME_URL, data={'bio': 'Новое'})
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(self.ME_URL).status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение профиля без смены роли не отзывает '
+            'токены.'
+        )
+
+    def test_06_rename_revokes_tokens(self, admin, user):
+        user_client = get_client(user)
+        response = get_client(admin).patch(
+            self.USER_DETAIL_URL_TEMPLATE.format(username=user.username),
+            data={'username': 'renamed'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(self.ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что после смены имени пользователя ранее выданные '
+            'токены со старым именем перестают действовать.'
+        )
+        user.refresh_from_db()
+        response = get_client(user).get(self.ME_URL)
+        assert response.json()['username'] == 'renamed'
+
+    def test_07_deleted_user(self, admin, user):
+        user_client = get_client(user)
+        get_client(admin).delete(
+            self.USER_DETAIL_URL_TEMPLATE.format(username=user.username)
+        )
+        response = user_client.get(self.TITLES_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -0,0 +1,177 @@
+import smtplib
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from users.models import OutboxEmail
+from users.outbox import send_batch
+
+
+class FlakyBackend(EmailBackend):
+    """
+    Почтовый бэкенд, который считает открытия и роняет первые письма.
+
+    После `refuse_after` удачных открытий сервер становится недоступен,
+    а письмо номер `crash_on` роняет отправку необработанной ошибкой.
+    """
+
+    opened = 0
+    failures = 0
+    refuse_after = None
+    crash_on = None
+
+    def open(self):
+        if FlakyBackend.opened == FlakyBackend.refuse_after:
+            raise ConnectionRefusedError('Сервер недоступен')
+        FlakyBackend.opened += 1
+
+    def send_messages(self, messages):
+        if FlakyBackend.failures:
+            FlakyBackend.failures -= 1
+            raise smtplib.SMTPServerDisconnected('Соединение разорвано')
+        if len(mail.outbox) + 1 == FlakyBackend.crash_on:
+            raise RuntimeError('Процесс упал')
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def flaky_backend(settings):
+    settings.EMAIL_BACKEND = 'tests.test_19_email_outbox.FlakyBackend'
+    FlakyBackend.opened = 0
+    FlakyBackend.failures = 0
+    FlakyBackend.refuse_after = None
+    FlakyBackend.crash_on = None
+    return FlakyBackend
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19EmailOutbox:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def signup(self, client, number):
+        return client.post(self.URL_SIGNUP, data={
+            'username': f'user{number}',
+            'email': f'user{number}@yamdb.fake',
+        })
+
+    def test_01_signup_enqueues(self, client):
+        response = self.signup(client, 1)
+        assert response.status_code == HTTPStatus.OK
+        assert not mail.outbox, (
+            'Проверьте, что регистрация не отправляет письмо синхронно.'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.recipient == 'user1@yamdb.fake'
+        assert email.sent_at is None
+
+        call_command('send_emails')
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['user1@yamdb.fake']
+        email.refresh_from_db()
+        assert email.sent_at is not None
+        call_command('send_emails')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно.'
+        )
+
+    def test_02_single_connection(self, client, flaky_backend, settings):
+        settings.EMAIL_OUTBOX = {'BATCH_SIZE': 10}
+        for number in range(5):
+            self.signup(client, number)
+        call_command('send_emails')
+        assert len(mail.outbox) == 5
+        assert flaky_backend.opened == 1, (
+            'Проверьте, что пачка писем отправляется через одно '
+            'соединение.'
+        )
+
+    def test_03_retry_with_backoff(self, client, flaky_backend, settings):
+        settings.EMAIL_OUTBOX = {'BACKOFF': 10, 'MAX_ATTEMPTS': 2}
+        self.signup(client, 1)
+        flaky_backend.failures = 1
+        call_command('send_emails')
+        assert not mail.outbox
+        email = OutboxEmail.objects.get()
+        assert email.attempts == 1
+        assert 'SMTPServerDisconnected' in email.last_error
+        assert email.next_attempt_at > timezone.now() + timedelta(seconds=5), (
+            'Проверьте, что после ошибки письмо откладывается.'
+        )
+
+        call_command('send_emails')
+        assert not mail.outbox, (
+            'Проверьте, что письмо не отправляется до окончания задержки.'
+        )
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_emails')
+        assert len(mail.outbox) == 1
+
+    def test_04_attempts_exhausted(self, client, flaky_backend, settings):
+        settings.EMAIL_OUTBOX = {'BACKOFF': 0, 'MAX_ATTEMPTS': 2}
+        self.signup(client, 1)
+        flaky_backend.failures = 5
+        call_command('send_emails')
+        call_command('send_emails')
+        call_command('send_emails')
+        email = OutboxEmail.objects.get()
+        assert email.attempts == 2, (
+            'Проверьте, что число попыток ограничено `MAX_ATTEMPTS`.'
+        )
+        assert email.sent_at is None
+
+    def test_05_server_unavailable(self, client, flaky_backend, settings):
+        settings.EMAIL_OUTBOX = {'BACKOFF': 10}
+        for number in range(3):
+            self.signup(client, number)
+        flaky_backend.refuse_after = 0
+        call_command('send_emails')
+        assert not OutboxEmail.objects.filter(attempts=0).exists(), (
+            'Проверьте, что при недоступном сервере попытка засчитывается '
+            'всем письмам пачки, а команда не падает.'
+        )
+        assert not OutboxEmail.objects.filter(
+            next_attempt_at__lte=timezone.now()
+        ).exists()
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        flaky_backend.refuse_after = 1
+        flaky_backend.failures = 1
+        assert send_batch() == (0, 3), (
+            'Проверьте, что ошибка повторного открытия соединения '
+            'откладывает оставшиеся письма пачки.'
+        )
+        assert set(
+            OutboxEmail.objects.values_list('attempts', flat=True)
+        ) == {2}
+        assert OutboxEmail.objects.filter(
+            last_error__startswith='ConnectionRefusedError'
+        ).count() == 2
+
+    def test_06_sent_marked_and_claimed(self, client, flaky_backend):
+        for number in range(3):
+            self.signup(client, number)
+        flaky_backend.crash_on = 2
+        with pytest.raises(RuntimeError):
+            send_batch()
+        assert len(mail.outbox) == 1
+        sent = OutboxEmail.objects.filter(sent_at__isnull=False)
+        assert sent.count() == 1, (
+            'Проверьте, что письмо отмечается отправленным сразу после '
+            'отправки, а не в конце пачки.'
+        )
+        flaky_backend.crash_on = None
+        assert send_batch() == (0, 0), (
+            'Проверьте, что письма, забранные одним процессом, не '
+            'отправляет другой.'
+        )
+        OutboxEmail.objects.filter(sent_at__isnull=True).update(
+            next_attempt_at=timezone.now()
+        )
+        assert send_batch() == (2, 0)
+        assert len(mail.outbox) == 3
@@ -0,0 +1,132 @@
+import json
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.throttling import IPTokenBucketThrottle, TokenBucketThrottle
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': rates,
+        }
+    return set_rates
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(
+        TokenBucketThrottle, 'timer', staticmethod(lambda: now[0])
+    )
+    return now
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Throttling:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+
+    def signup(self, client, username, ip='10.0.0.1'):
+        return client.post(
+            self.URL_SIGNUP,
+            data={'username': username, 'email': f'{username}@yamdb.fake'},
+            REMOTE_ADDR=ip
+        )
+
+    def test_01_username_bucket(self, client, rates, clock):
+        rates(signup_username='2/min')
+        for _ in range(2):
+            assert self.signup(client, 'bucket').status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as context:
+            response = self.signup(client, 'Bucket', ip='10.0.0.2')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что `{self.URL_SIGNUP}` ограничивает частоту '
+            'запросов для одного имени пользователя.'
+        )
+        assert int(response['Retry-After']) == 30
+        assert not context.captured_queries, (
+            'Проверьте, что отклонённый запрос не обращается к базе данных.'
+        )
+        assert self.signup(client, 'other').status_code == HTTPStatus.OK
+
+        clock[0] += 30
+        assert self.signup(client, 'bucket').status_code == HTTPStatus.OK, (
+            'Проверьте, что корзина пополняется со временем.'
+        )
+        assert self.signup(
+            client, 'bucket'
+        ).status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+    def test_02_ip_bucket(self, client, rates, clock):
+        rates(signup_ip='3/hour')
+        for number in range(3):
+            response = self.signup(client, f'user{number}')
+            assert response.status_code == HTTPStatus.OK
+        response = self.signup(client, 'user3')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что `{self.URL_SIGNUP}` ограничивает частоту '
+            'запросов с одного IP-адреса.'
+        )
+        response = self.signup(client, 'user3', ip='10.0.0.9')
+        assert response.status_code == HTTPStatus.OK
+
+    def test_03_token_endpoint(self, client, rates, clock):
+        rates(token_username='1/min')
+        data = {'username': 'nobody', 'confirmation_code': '123'}
+        response = client.post(self.URL_TOKEN, data=data)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.URL_TOKEN, data=data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что `{self.URL_TOKEN}` ограничивает подбор кода '
+            'подтверждения для одного имени пользователя.'
+        )
+        assert not context.captured_queries
+
+    def test_04_non_object_body(self, client, rates, clock):
+        rates(signup_username='1/min', token_username='1/min')
+        for url in (self.URL_SIGNUP, self.URL_TOKEN):
+            response = client.post(
+                url, data=json.dumps([{'username': 'bucket'}]),
+                content_type='application/json'
+            )
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что POST-запрос к `{url}` с JSON-массивом в '
+                'теле возвращает ответ со статусом 400.'
+            )
+
+    def test_05_parallel_requests(self, rates, monkeypatch):
+        rates(signup_ip='1/min')
+        view = SimpleNamespace(throttle_scope='signup')
+        request = Request(APIRequestFactory().post('/'))
+        throttle = IPTokenBucketThrottle()
+        parallel = []
+        get = throttle.cache.get
+
+        def get_with_parallel_request(*args, **kwargs):
+            # Параллельный запрос приходит, когда корзина уже прочитана,
+            # но ещё не записана.
+            value = get(*args, **kwargs)
+            if not parallel:
+                parallel.append(None)
+                parallel[0] = IPTokenBucketThrottle().allow_request(
+                    request, view
+                )
+            return value
+
+        monkeypatch.setattr(throttle.cache, 'get', get_with_parallel_request)
+        allowed = throttle.allow_request(request, view)
+        assert [allowed, *parallel] == [True, False], (
+            'Проверьте, что параллельные запросы не расходуют один и тот же '
+            'жетон корзины.'
+        )
@@ -0,0 +1,98 @@
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+
+from api import async_views
+from tests.utils import create_comments, create_titles
+
+
+@pytest.fixture
+def async_client():
+    client = AsyncClient()
+
+    def request(method, url, token=None, **extra):
+        if token:
+            extra['authorization'] = f'Bearer {token}'
+
+        async def send():
+            return await getattr(client, method)(url, **extra)
+        return async_to_sync(send)()
+    return request
+
+
+@pytest.fixture
+def pooled_calls(monkeypatch):
+    calls = []
+    run_pooled_view = async_views.run_pooled_view
+
+    def spy(view, request, *args, **kwargs):
+        calls.append(request.path)
+        return run_pooled_view(view, request, *args, **kwargs)
+
+    monkeypatch.setattr(async_views, 'run_pooled_view', spy)
+    return calls
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21AsyncViews:
+
+    def test_01_same_output(self, client, admin_client, async_client,
+                            pooled_calls, user, user_client, moderator,
+                            moderator_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {user: user_client, moderator: moderator_client}
+        )
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        urls = (
+            '/api/v1/titles/',
+            '/api/v1/titles/?genre=horror&limit=1&offset=1',
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+            '/api/v1/categories/',
+            '/api/v1/genres/?pagination=cursor&limit=1',
+        )
+        for url in urls:
+            expected = client.get(url)
+            assert expected.status_code == HTTPStatus.OK
+            response = async_client('get', url)
+            assert response.status_code == expected.status_code
+            assert response.json() == expected.json(), (
+                f'Проверьте, что асинхронный обработчик `{url}` отдаёт '
+                'тот же ответ, что и синхронный.'
+            )
+        assert len(pooled_calls) == len(urls), (
+            'Проверьте, что под ASGI запросы чтения выполняются '
+            'в пуле потоков.'
+        )
+
+    def test_02_writes_and_middleware(self, admin_client, async_client,
+                                      token_admin, pooled_calls,
+                                      settings, tmp_path):
+        settings.PROFILING = {'DIR': tmp_path}
+        create_titles(admin_client)
+        response = async_client(
+            'post', '/api/v1/categories/',
+            data={'name': 'Музыка', 'slug': 'music'},
+            content_type='application/json',
+            token=token_admin['access']
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert not pooled_calls, (
+            'Проверьте, что запросы на запись не выполняются в пуле чтения.'
+        )
+        response = async_client(
+            'get', '/api/v1/titles/', token=token_admin['access'],
+            **{'x-profile': 'cprofile'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert 'X-Profile-Id' in response, (
+            'Проверьте, что профилирование работает и под ASGI.'
+        )
+        assert '"0 queries"' not in response['Server-Timing'], (
+            'Проверьте, что под ASGI SQL-запросы считаются в потоке '
+            'пула.'
+        )
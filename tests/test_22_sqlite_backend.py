@@ -0,0 +1,116 @@
+import sqlite3
+import threading
+
+import pytest
+from django.db import connection
+from django.db.utils import OperationalError
+
+from api_yamdb.sqlite.base import DatabaseWrapper
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    """Соединение настроенного бэкенда с файловой базой SQLite."""
+    path = tmp_path / 'db.sqlite3'
+    wrappers = []
+
+    def make(**options):
+        wrapper = DatabaseWrapper(
+            {
+                **connection.settings_dict,
+                'NAME': str(path),
+                'OPTIONS': options,
+            },
+            alias=f'file_{len(wrappers)}'
+        )
+        wrappers.append(wrapper)
+        return wrapper
+
+    db = make()
+    with db.cursor() as cursor:
+        cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)')
+    yield path, make
+    for wrapper in wrappers:
+        wrapper.close()
+
+
+def hold_write_lock(path, seconds):
+    """Держит блокировку записи из другого соединения `seconds` секунд."""
+    other = sqlite3.connect(
+        path, isolation_level=None, timeout=0, check_same_thread=False
+    )
+    other.execute('BEGIN IMMEDIATE')
+    timer = threading.Timer(seconds, other.close)
+    timer.start()
+    return timer
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22SQLiteBackend:
+
+    def test_01_pragmas(self, file_db):
+        path, make = file_db
+        db = make(pragmas={'cache_size': -1024})
+        with db.cursor() as cursor:
+            values = {}
+            for name in (
+                'journal_mode', 'synchronous', 'busy_timeout',
+                'mmap_size', 'cache_size', 'foreign_keys'
+            ):
+                cursor.execute(f'PRAGMA {name}')
+                values[name] = cursor.fetchone()[0]
+        assert values == {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'busy_timeout': 5000,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -1024,
+            'foreign_keys': 1,
+        }, (
+            'Проверьте, что при подключении выполняются PRAGMA по умолчанию '
+            'и переопределения из `OPTIONS["pragmas"]`'
+        )
+
+    def test_02_begin_immediate(self, file_db):
+        path, make = file_db
+        db = make(pragmas={'busy_timeout': 0}, lock_retries=0)
+        db.ensure_connection()
+        timer = hold_write_lock(path, 0.2)
+        with pytest.raises(OperationalError):
+            db.set_autocommit(
+                False, force_begin_transaction_with_broken_autocommit=True
+            )
+        timer.join()
+        assert not db.connection.in_transaction, (
+            'Проверьте, что `atomic()` начинает транзакцию с '
+            '`BEGIN IMMEDIATE`: блокировка записи должна браться сразу'
+        )
+
+    def test_03_lock_retry(self, file_db):
+        path, make = file_db
+        db = make(
+            pragmas={'busy_timeout': 0},
+            lock_retries=10,
+            lock_backoff=0.02,
+            lock_max_backoff=0.1
+        )
+        timer = hold_write_lock(path, 0.1)
+        with db.cursor() as cursor:
+            cursor.execute('INSERT INTO item (name) VALUES (%s)', ['a'])
+        timer.join()
+
+        impatient = make(pragmas={'busy_timeout': 0}, lock_retries=10)
+        timer = hold_write_lock(path, 0.1)
+        with pytest.raises(OperationalError):
+            with impatient.cursor() as cursor:
+                cursor.execute('BEGIN')
+                cursor.execute('INSERT INTO item (name) VALUES (%s)', ['b'])
+        impatient.connection.rollback()
+        timer.join()
+
+        with db.cursor() as cursor:
+            cursor.execute('SELECT name FROM item')
+            assert cursor.fetchall() == [('a',)], (
+                'Проверьте, что запрос вне транзакции при блокировке '
+                'повторяется с задержкой, а внутри транзакции — нет'
+            )
@@ -0,0 +1,109 @@
+import sqlite3
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from api import db_router
+from api.middleware import ReplicaRoutingMiddleware
+from reviews.models import Title
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def replica(settings, tmp_path, monkeypatch):
+    """Реплика SQLite во временном файле."""
+    settings.DATABASE_ROUTING = {
+        **settings.DATABASE_ROUTING,
+        'REPLICAS': ['replica'],
+        'STICKY_SECONDS': 60,
+    }
+    path = tmp_path / 'replica.sqlite3'
+    monkeypatch.setitem(
+        connections.databases,
+        'replica',
+        {**connections.databases['default'], 'NAME': str(path)}
+    )
+    monkeypatch.setattr(db_router, '_lag_checks', {})
+    yield path
+    connections['replica'].close()
+    del connections['replica']
+
+
+def routed_request(method, authorization=None, write=False):
+    """Выполняет запрос через middleware и возвращает базы чтения."""
+    reads = []
+
+    def view(request):
+        reads.append(router.db_for_read(Title))
+        if write:
+            router.db_for_write(Title)
+            reads.append(router.db_for_read(Title))
+        return HttpResponse()
+
+    headers = {'HTTP_AUTHORIZATION': authorization} if authorization else {}
+    request = getattr(RequestFactory(), method)('/api/v1/titles/', **headers)
+    ReplicaRoutingMiddleware(view)(request)
+    return reads
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23DatabaseRouter:
+
+    def test_01_sticky_reads(self, settings, replica):
+        settings.DATABASE_ROUTING['MAX_LAG'] = None
+        assert routed_request('get', 'Bearer a') == ['replica'], (
+            'Проверьте, что GET-запросы читают с реплики'
+        )
+        assert routed_request('post', 'Bearer a', write=True) == [
+            'default', 'default'
+        ], (
+            'Проверьте, что небезопасные запросы и чтение после записи '
+            'идут в основную базу'
+        )
+        assert routed_request('get', 'Bearer a') == ['default'], (
+            'Проверьте, что после записи клиент читает из основной базы '
+            'в течение `STICKY_SECONDS`'
+        )
+        assert routed_request('get', 'Bearer b') == ['replica'], (
+            'Проверьте, что закрепление за основной базой касается только '
+            'клиента, который писал'
+        )
+        assert router.db_for_read(Title) == 'default', (
+            'Проверьте, что чтение вне HTTP-запросов идёт в основную базу'
+        )
+
+    def test_02_sync_and_lag(self, admin_client, client, replica):
+        titles, _, _ = create_titles(admin_client)
+        call_command('sync_replicas')
+        assert Title.objects.using('replica').count() == len(titles), (
+            'Проверьте, что `sync_replicas` копирует основную базу в реплику'
+        )
+        assert routed_request('get') == ['replica']
+
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Новое', 'year': 2000,
+            'genre': [titles[0]['genre'][0]],
+            'category': titles[0]['category'],
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        assert client.get('/api/v1/titles/').json()['count'] == 2, (
+            'Проверьте, что анонимные GET-запросы читают с реплики'
+        )
+        assert admin_client.get('/api/v1/titles/').json()['count'] == 3, (
+            'Проверьте, что клиент после записи видит свои изменения, '
+            'а кеш не отдаёт ему данные, прочитанные с реплики'
+        )
+
+        with sqlite3.connect(replica) as raw:
+            raw.execute(
+                f'UPDATE {db_router.SYNC_TABLE} SET synced_at = synced_at - 60'
+            )
+        db_router._lag_checks.clear()
+        assert routed_request('get') == ['default'], (
+            'Проверьте, что реплики, отстающие больше `MAX_LAG`, '
+            'не используются'
+        )
@@ -0,0 +1,79 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments
+
+# Полный просмотр таблицы без индекса: `SCAN reviews_title`
+# (в SQLite до 3.36 — `SCAN TABLE reviews_title`). `SCAN subquery` —
+# просмотр ограниченного LIMIT подзапроса Django, а не таблицы.
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(?!subquery$)(?P<table>\w+)$')
+
+
+def get_full_scans(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        plan = [row[-1] for row in cursor.fetchall()]
+    return [detail for detail in plan if FULL_SCAN.match(detail)]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24QueryPlans:
+
+    def test_01_list_endpoints_use_indexes(self, admin_client, admin,
+                                           moderator, moderator_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, moderator: moderator_client}
+        )
+        title = titles[0]
+        reviews_url = f'/api/v1/titles/{title["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        urls = (
+            '/api/v1/titles/',
+            '/api/v1/titles/?offset=1',
+            '/api/v1/titles/?pagination=cursor',
+            f'/api/v1/titles/?year={title["year"]}',
+            f'/api/v1/titles/?category={title["category"]}',
+            f'/api/v1/titles/?genre={title["genre"][0]}',
+            '/api/v1/titles/top/',
+            f'/api/v1/titles/top/?category={title["category"]}',
+            f'/api/v1/titles/trending/?genre={title["genre"][0]}',
+            (
+                f'/api/v1/titles/trending/?category={title["category"]}'
+                f'&genre={title["genre"][0]}'
+            ),
+            reviews_url,
+            f'{reviews_url}?pagination=cursor',
+            comments_url,
+            f'{comments_url}?pagination=cursor',
+            '/api/v1/categories/',
+            '/api/v1/categories/?pagination=cursor',
+            '/api/v1/categories/?stats=true',
+            '/api/v1/genres/',
+            '/api/v1/genres/?pagination=cursor',
+            '/api/v1/genres/?stats=true',
+            '/api/v1/users/',
+        )
+        scans = {}
+        for url in urls:
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.get(url)
+            assert response.status_code == HTTPStatus.OK, url
+            statements = [
+                query['sql'] for query in context.captured_queries
+                if query['sql'].startswith('SELECT')
+            ]
+            assert statements, url
+            for sql in statements:
+                found = get_full_scans(sql)
+                if found:
+                    scans.setdefault(url, []).append((found, sql))
+        assert not scans, (
+            'Проверьте, что запросы списков используют индексы и не читают '
+            f'таблицы целиком: {scans}'
+        )
@@ -0,0 +1,159 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews.models import LeaderboardEntry, Review
+from tests.utils import create_single_review, create_titles
+
+TOP_URL = '/api/v1/titles/top/'
+TRENDING_URL = '/api/v1/titles/trending/'
+
+
+def get_leaders(client, url, field, **params):
+    response = client.get(url, params)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со статусом '
+        '200.'
+    )
+    return [(title['id'], title[field]) for title in response.json()]
+
+
+def get_entries():
+    return sorted(
+        tuple(
+            round(value, 6) if isinstance(value, float) else value or 0
+            for value in entry
+        )
+        for entry in LeaderboardEntry.objects.values_list(
+            'title_id', 'category_id', 'genre_id', 'score_sum',
+            'review_count', 'top_score', 'trending_key'
+        )
+    )
+
+
+@pytest.fixture
+def reviewed_titles(admin_client, admin, user_client, moderator_client):
+    """Три отзыва на 5 у первого произведения и один на 10 у второго."""
+    titles, categories, genres = create_titles(admin_client)
+    first, second = titles
+    for client in (admin_client, user_client, moderator_client):
+        create_single_review(client, first['id'], 'Отзыв', 5)
+    review = create_single_review(admin_client, second['id'], 'Отзыв', 10)
+    return first, second, review.json()['id']
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Leaderboards:
+
+    def test_01_top(self, client, admin_client, reviewed_titles):
+        first, second, review_id = reviewed_titles
+        assert get_leaders(client, TOP_URL, 'score') == [
+            (second['id'], round(65 / 11, 2)),
+            (first['id'], round(70 / 13, 2)),
+        ], (
+            'Проверьте, что `/api/v1/titles/top/` упорядочивает произведения '
+            'по байесовской оценке (PRIOR_WEIGHT * PRIOR_MEAN + сумма) / '
+            '(PRIOR_WEIGHT + отзывов)'
+        )
+        assert get_leaders(
+            client, TOP_URL, 'score', category=first['category']
+        ) == [(first['id'], round(70 / 13, 2))]
+        assert get_leaders(
+            client, TOP_URL, 'score', genre=second['genre'][0]
+        ) == [(second['id'], round(65 / 11, 2))]
+        assert get_leaders(client, TOP_URL, 'score', genre='unknown') == [], (
+            'Проверьте, что для несуществующего жанра возвращается пустой '
+            'список'
+        )
+        assert len(get_leaders(client, TOP_URL, 'score', limit=1)) == 1
+        response = client.get(TOP_URL, {'limit': 0})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        response = admin_client.patch(f'/api/v1/titles/{first["id"]}/', data={
+            'category': second['category'], 'genre': second['genre'],
+        })
+        assert response.status_code == HTTPStatus.OK
+        assert [
+            title_id for title_id, _ in get_leaders(
+                client, TOP_URL, 'score',
+                category=second['category'], genre=second['genre'][0]
+            )
+        ] == [second['id'], first['id']], (
+            'Проверьте, что при смене категории и жанров произведение '
+            'переходит в таблицы лидеров новых категории и жанров'
+        )
+        assert get_leaders(
+            client, TOP_URL, 'score', genre=first['genre'][0]
+        ) == []
+
+        response = admin_client.delete(
+            f'/api/v1/titles/{second["id"]}/reviews/{review_id}/'
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert get_leaders(client, TOP_URL, 'score') == [
+            (first['id'], round(70 / 13, 2))
+        ], (
+            'Проверьте, что произведение без отзывов исключается из '
+            '`/api/v1/titles/top/`'
+        )
+
+        entries = get_entries()
+        call_command('rebuild_leaderboards')
+        assert entries == get_entries(), (
+            'Проверьте, что таблицы лидеров, обновлённые сигналами, '
+            'совпадают с пересчитанными командой `rebuild_leaderboards`'
+        )
+
+    def test_02_trending(self, settings, client, admin_client,
+                         reviewed_titles):
+        first, second, review_id = reviewed_titles
+        leaders = get_leaders(client, TRENDING_URL, 'trend')
+        assert [title_id for title_id, _ in leaders] == [
+            first['id'], second['id']
+        ]
+        assert [trend for _, trend in leaders] == pytest.approx(
+            [3, 1], abs=1e-3
+        ), (
+            'Проверьте, что популярность свежих отзывов равна их числу'
+        )
+
+        half_life = settings.LEADERBOARDS['TRENDING_HALF_LIFE']
+        Review.objects.filter(title_id=first['id']).update(
+            pub_date=timezone.now() - timedelta(seconds=2 * half_life)
+        )
+        call_command('rebuild_leaderboards')
+        leaders = get_leaders(client, TRENDING_URL, 'trend')
+        assert leaders == [
+            (second['id'], pytest.approx(1, abs=1e-3)),
+            (first['id'], pytest.approx(0.75, abs=1e-3)),
+        ], (
+            'Проверьте, что вклад отзыва в популярность уменьшается вдвое '
+            'за TRENDING_HALF_LIFE'
+        )
+
+        Review.objects.filter(title_id=first['id']).first().delete()
+        response = admin_client.delete(
+            f'/api/v1/titles/{second["id"]}/reviews/{review_id}/'
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        create_single_review(admin_client, second['id'], 'Отзыв', 7)
+        assert get_leaders(client, TRENDING_URL, 'trend') == [
+            (second['id'], pytest.approx(1, abs=1e-3)),
+            (first['id'], pytest.approx(0.5, abs=1e-3)),
+        ], (
+            'Проверьте, что популярность обновляется при создании и '
+            'удалении отзывов'
+        )
+
+        settings.LEADERBOARDS = {
+            **settings.LEADERBOARDS, 'TRENDING_MIN_WEIGHT': 0.8
+        }
+        assert get_leaders(client, TRENDING_URL, 'trend') == [
+            (second['id'], pytest.approx(1, abs=1e-3)),
+        ], (
+            'Проверьте, что произведения с весом отзывов меньше '
+            'TRENDING_MIN_WEIGHT не попадают в `/api/v1/titles/trending/`'
+        )
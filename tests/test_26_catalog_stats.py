@@ -0,0 +1,107 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.models import CategoryStats
+from tests.utils import create_single_review, create_titles
+
+CATEGORIES_URL = '/api/v1/categories/'
+GENRES_URL = '/api/v1/genres/'
+
+
+def get_stats(client, url):
+    response = client.get(url, {'stats': 'true'})
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}?stats=true` возвращает ответ '
+        'со статусом 200.'
+    )
+    return {
+        item['slug']: (
+            item['stats']['title_count'],
+            item['stats']['review_count'],
+            item['stats']['mean_score'],
+            {
+                score: count
+                for score, count in item['stats']['histogram'].items()
+                if count
+            },
+        )
+        for item in response.json()['results']
+    }
+
+
+def check_stats():
+    call_command('rebuild_catalog_stats', '--check')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26CatalogStats:
+
+    def test_01_stats(self, client, admin_client, user_client):
+        titles, categories, genres = create_titles(admin_client)
+        first, second = titles
+        response = client.get(CATEGORIES_URL)
+        assert 'stats' not in response.json()['results'][0], (
+            'Проверьте, что статистика категорий отдаётся только с '
+            'параметром `stats=true`'
+        )
+
+        create_single_review(admin_client, first['id'], 'Отзыв', 4)
+        create_single_review(user_client, first['id'], 'Отзыв', 8)
+        review = create_single_review(admin_client, second['id'], 'Отзыв', 10)
+        assert get_stats(client, CATEGORIES_URL) == {
+            'films': (1, 2, 6.0, {'4': 1, '8': 1}),
+            'books': (1, 1, 10.0, {'10': 1}),
+        }, (
+            'Проверьте, что `/api/v1/categories/?stats=true` возвращает '
+            'число произведений и отзывов, среднюю оценку и гистограмму '
+            'оценок каждой категории'
+        )
+        assert get_stats(client, GENRES_URL) == {
+            'horror': (1, 2, 6.0, {'4': 1, '8': 1}),
+            'comedy': (1, 2, 6.0, {'4': 1, '8': 1}),
+            'drama': (1, 1, 10.0, {'10': 1}),
+        }
+
+        response = admin_client.patch(f'/api/v1/titles/{first["id"]}/', data={
+            'category': second['category'], 'genre': second['genre'],
+        })
+        assert response.status_code == HTTPStatus.OK
+        response = admin_client.patch(
+            f'/api/v1/titles/{second["id"]}/reviews/{review.json()["id"]}/',
+            data={'score': 1}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert get_stats(client, CATEGORIES_URL) == {
+            'films': (0, 0, None, {}),
+            'books': (2, 3, round(13 / 3, 2), {'1': 1, '4': 1, '8': 1}),
+        }, (
+            'Проверьте, что статистика обновляется при изменении оценки, '
+            'категории и жанров произведения'
+        )
+        assert get_stats(client, GENRES_URL) == {
+            'horror': (0, 0, None, {}),
+            'comedy': (0, 0, None, {}),
+            'drama': (2, 3, round(13 / 3, 2), {'1': 1, '4': 1, '8': 1}),
+        }
+        check_stats()
+
+        response = admin_client.delete(f'/api/v1/titles/{first["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert get_stats(client, GENRES_URL)['drama'] == (
+            1, 1, 1.0, {'1': 1}
+        ), (
+            'Проверьте, что при удалении произведения его отзывы исключаются '
+            'из статистики'
+        )
+        check_stats()
+
+    def test_02_rebuild(self, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Отзыв', 7)
+        CategoryStats.objects.update(review_count=0)
+        with pytest.raises(CommandError):
+            check_stats()
+        call_command('rebuild_catalog_stats')
+        check_stats()
@@ -0,0 +1,117 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.test_25_leaderboards import get_entries
+from tests.utils import create_categories, create_genre
+
+BULK_URL = '/api/v1/titles/bulk/'
+
+
+def make_titles(count, category='films', genre=('horror', 'comedy')):
+    return [
+        {
+            'name': f'Произведение {number}',
+            'year': 2000,
+            'description': 'Описание',
+            'category': category,
+            'genre': list(genre),
+        }
+        for number in range(count)
+    ]
+
+
+def post_bulk(client, titles):
+    return client.post(
+        BULK_URL, data=json.dumps(titles), content_type='application/json'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27BulkTitles:
+
+    def test_01_bulk_create(self, client, admin_client, user_client):
+        create_categories(admin_client)
+        create_genre(admin_client)
+        titles = make_titles(2) + [
+            {**make_titles(1)[0], 'category': 'unknown'},
+            {**make_titles(1)[0], 'genre': []},
+            'не произведение',
+            *make_titles(1, category='books', genre=('drama', 'drama')),
+        ]
+        response = post_bulk(admin_client, titles)
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос администратора к `{BULK_URL}` '
+            'возвращает ответ со статусом 201, если создано хотя бы одно '
+            'произведение'
+        )
+        data = response.json()
+        assert [item['index'] for item in data['created']] == [0, 1, 5]
+        assert [item['index'] for item in data['errors']] == [2, 3, 4], (
+            'Проверьте, что ошибки возвращаются по индексу произведения и '
+            'не мешают создать остальные'
+        )
+        assert 'category' in data['errors'][0]['errors']
+        assert 'genre' in data['errors'][1]['errors']
+
+        title_id = data['created'][0]['id']
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['name'] == titles[0]['name']
+        assert [genre['slug'] for genre in response.json()['genre']] == [
+            'comedy', 'horror'
+        ]
+        response = client.get(
+            f'/api/v1/titles/{data["created"][2]["id"]}/'
+        )
+        assert [genre['slug'] for genre in response.json()['genre']] == [
+            'drama'
+        ]
+        response = client.get('/api/v1/titles/', {'search': 'произведение'})
+        assert response.json()['count'] == 3, (
+            'Проверьте, что созданные пачкой произведения попадают в список '
+            'и в поисковый индекс'
+        )
+
+        call_command('rebuild_catalog_stats', '--check')
+        entries = get_entries()
+        call_command('rebuild_leaderboards')
+        assert entries == get_entries(), (
+            'Проверьте, что произведения, созданные пачкой, попадают в '
+            'таблицы лидеров'
+        )
+
+        for client_, status in (
+            (client, HTTPStatus.UNAUTHORIZED),
+            (user_client, HTTPStatus.FORBIDDEN),
+        ):
+            assert post_bulk(client_, make_titles(1)).status_code == status
+        assert post_bulk(admin_client, []).status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
+        assert post_bulk(admin_client, titles[2:5]).status_code == (
+            HTTPStatus.BAD_REQUEST
+        ), (
+            'Проверьте, что без созданных произведений возвращается ответ '
+            'со статусом 400'
+        )
+
+    def test_02_constant_queries(self, admin_client):
+        create_categories(admin_client)
+        create_genre(admin_client)
+        counts = []
+        # Пачки вставки ограничены числом параметров запроса SQLite (999),
+        # поэтому сравниваются размеры, умещающиеся в одну пачку.
+        for size in (1, 20):
+            with CaptureQueriesContext(connection) as context:
+                response = post_bulk(admin_client, make_titles(size))
+            assert response.status_code == HTTPStatus.CREATED
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1], (
+            f'Проверьте, что число SQL-запросов к `{BULK_URL}` не зависит '
+            'от числа произведений'
+        )
@@ -0,0 +1,109 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments
+
+
+def get_sparse(client, url, **params):
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` с параметрами {params} '
+        'возвращает ответ со статусом 200.'
+    )
+    return response.json(), [query['sql'] for query in context.captured_queries]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28SparseFields:
+
+    def test_01_titles(self, client, admin_client, admin, moderator,
+                       moderator_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, moderator: moderator_client}
+        )
+        _, full_queries = get_sparse(client, '/api/v1/titles/')
+        data, queries = get_sparse(
+            client, '/api/v1/titles/', fields='id,name'
+        )
+        assert [set(title) for title in data['results']] == [
+            {'id', 'name'}
+        ] * len(titles), (
+            'Проверьте, что `?fields=` оставляет в ответе только выбранные '
+            'поля'
+        )
+        assert not any('"description"' in sql for sql in queries), (
+            'Проверьте, что `?fields=` не читает из базы колонки '
+            'невыбранных полей'
+        )
+        assert len(queries) < len(full_queries), (
+            'Проверьте, что без поля `genre` жанры не загружаются'
+        )
+
+        data, queries = get_sparse(
+            client, '/api/v1/titles/', exclude='description,genre',
+            pagination='cursor'
+        )
+        assert set(data['results'][0]) == {
+            'id', 'name', 'year', 'rating', 'category'
+        }
+        assert {
+            title['category']['slug'] for title in data['results']
+        } == {title['category'] for title in titles}
+        assert not any('"description"' in sql for sql in queries)
+
+        data, _ = get_sparse(
+            client, f'/api/v1/titles/{titles[0]["id"]}/', fields='rating'
+        )
+        assert data == {'rating': 5}
+        data, _ = get_sparse(client, '/api/v1/titles/top/', fields='id,score')
+        assert [set(title) for title in data] == [{'id', 'score'}]
+
+        response = client.get('/api/v1/titles/', {'fields': 'id,secret'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что неизвестное поле в `?fields=` возвращает ответ '
+            'со статусом 400'
+        )
+
+    def test_02_reviews_comments_users(self, client, admin_client, admin,
+                                       moderator, moderator_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, moderator: moderator_client}
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data, queries = get_sparse(client, reviews_url, fields='id,score')
+        assert [set(review) for review in data['results']] == [
+            {'id', 'score'}
+        ] * len(data['results'])
+        assert not any('"text"' in sql for sql in queries)
+        assert not any('users_user' in sql for sql in queries), (
+            'Проверьте, что без поля `author` автор не загружается'
+        )
+
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        data, _ = get_sparse(
+            client, comments_url, exclude='text', pagination='cursor'
+        )
+        assert set(data['results'][0]) == {'id', 'author', 'pub_date'}
+        data, _ = get_sparse(
+            client, f'{comments_url}{comments[0]["id"]}/', fields='author'
+        )
+        assert data == {'author': comments[0]['author']}
+
+        data, _ = get_sparse(admin_client, '/api/v1/users/', fields='username')
+        assert [set(user) for user in data['results']] == [
+            {'username'}
+        ] * len(data['results'])
+
+        response = admin_client.patch(
+            f'{reviews_url}{reviews[0]["id"]}/?fields=id', data={'score': 1}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['score'] == 1, (
+            'Проверьте, что `?fields=` не влияет на запись'
+        )